@@ -36,6 +36,7 @@ def parseArgs() -> argparse.Namespace:
 	groupRemoteCSE.add_argument('--no-validation', action='store_false', dest='validationenabled', default=None, help='disable validation of attributes and arguments')
 
 	parser.add_argument('--db-reset', action='store_true', dest='dbreset', default=None, help='reset the DB when starting the CSE')
+	parser.add_argument('--db-repair', action='store_true', dest='dbrepair', default=None, help='re-count the content instances of all containers when starting the CSE')
 	parser.add_argument('--db-storage', action='store', dest='dbstoragemode', default=None, choices=[ 'memory', 'disk' ], type=str.lower, help='specify the DB´s storage mode')
 	parser.add_argument('--log-level', action='store', dest='loglevel', default=None, choices=[ 'info', 'error', 'warn', 'debug', 'off'], type=str.lower, help='set the log level, or turn logging off')
 	parser.add_argument('--import-directory', action='store', dest='importdirectory', default=None, help='specify the import directory')
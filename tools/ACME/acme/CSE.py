@@ -21,6 +21,7 @@ from Logging import Logging
 from NotificationManager import NotificationManager
 from RegistrationManager import RegistrationManager
 from RemoteCSEManager import RemoteCSEManager
+from RetentionManager import RetentionManager
 from SecurityManager import SecurityManager
 from Statistics import Statistics
 from Storage import Storage
@@ -40,6 +41,7 @@ httpServer:HttpServer				= None
 notification:NotificationManager	= None
 registration:RegistrationManager 	= None
 remote:RemoteCSEManager				= None
+retention:RetentionManager			= None
 security:SecurityManager 			= None
 statistics:Statistics				= None
 storage:Storage						= None
@@ -62,7 +64,7 @@ aeStartupDelay:int 					= 5	# seconds
 #def startup(args=None, configfile=None, resetdb=None, loglevel=None):
 def startup(args: argparse.Namespace, **kwargs: Dict[str, Any]) -> None:
 	global announce, dispatcher, group, httpServer, notification, validator
-	global registration, remote, security, statistics, storage, event
+	global registration, remote, retention, security, statistics, storage, event
 	global rootDirectory
 	global aeStatistics
 
@@ -130,6 +132,9 @@ def startup(args: argparse.Namespace, **kwargs: Dict[str, Any]) -> None:
 	if not importer.importResources():
 		return
 
+	# Initialize the retention manager
+	retention = RetentionManager()
+
 	# Initialize the remote CSE manager
 	remote = RemoteCSEManager()
 	remote.start()
@@ -151,6 +156,8 @@ def shutdown() -> None:
 		stopApps()
 	if remote is not None:
 		remote.shutdown()
+	if retention is not None:
+		retention.shutdown()
 	if group is not None:
 		group.shutdown()
 	if announce is not None:
@@ -31,6 +31,7 @@ class Configuration(object):
 		argsConfigfile			= args.configfile if args is not None and 'configfile' in args else defaultConfigFile
 		argsLoglevel			= args.loglevel if args is not None and 'loglevel' in args else None
 		argsDBReset				= args.dbreset if args is not None and 'dbreset' in args else False
+		argsDBRepair			= args.dbrepair if args is not None and 'dbrepair' in args else False
 		argsDBStorageMode		= args.dbstoragemode if args is not None and 'dbstoragemode' in args else None
 		argsImportDirectory		= args.importdirectory if args is not None and 'importdirectory' in args else None
 		argsAppsEnabled			= args.appsenabled if args is not None and 'appsenabled' in args else None
@@ -56,15 +57,24 @@ class Configuration(object):
 				'http.root'							: config.get('server.http', 'root', 					fallback=''),
 				'http.address'						: config.get('server.http', 'address', 					fallback='http://127.0.0.1:8080'),
 				'http.multiThread'					: config.getboolean('server.http', 'multiThread', 		fallback=True),
+				'http.enableExport'					: config.getboolean('server.http', 'enableExport', 		fallback=False),
 
 				#
 				#	Database
 				#
 
+				'db.type'							: config.get('database', 'type', 						fallback='tinydb').lower(),	# tinydb, sqlite
 				'db.path'							: config.get('database', 'path', 						fallback='./data'),
 				'db.inMemory'						: config.getboolean('database', 'inMemory', 			fallback=False),
 				'db.cacheSize'						: config.getint('database', 'cacheSize', 				fallback=0),		# Default: no caching
+				'db.resourceCacheSize'				: config.getint('database', 'resourceCacheSize', 		fallback=1000),
+				'db.walFsync'						: config.get('database', 'walFsync', 					fallback='interval').lower(),	# always, interval, never
+				'db.walSyncInterval'				: config.getfloat('database', 'walSyncInterval', 		fallback=1.0),		# Seconds
+				'db.walCompactInterval'				: config.getint('database', 'walCompactInterval', 		fallback=300),		# Seconds
 				'db.resetAtStartup' 				: config.getboolean('database', 'resetAtStartup',		fallback=False),
+				'db.repairAtStartup' 				: config.getboolean('database', 'repairAtStartup',		fallback=False),
+				'db.ingestionQueueSize'				: config.getint('database', 'ingestionQueueSize', 		fallback=1000),
+				'db.ingestionBatchSize'				: config.getint('database', 'ingestionBatchSize', 		fallback=100),
 
 				#
 				#	Logging
@@ -136,6 +146,10 @@ class Configuration(object):
 
 				'cse.cnt.mni'						: config.getint('cse.resource.cnt', 'mni', 				fallback=10),
 				'cse.cnt.mbs'						: config.getint('cse.resource.cnt', 'mbs', 				fallback=10000),
+				'cse.cnt.asyncIngestion'			: config.getlist('cse.resource.cnt', 'asyncIngestion',	fallback=[]),		# type: ignore
+				'cse.cnt.aggregationPercentiles'	: config.getlist('cse.resource.cnt', 'aggregationPercentiles', fallback=[ '50', '90', '99' ]),	# type: ignore
+				'cse.cnt.aggregationCacheSize'		: config.getint('cse.resource.cnt', 'aggregationCacheSize', fallback=100),
+				'cse.cnt.retentionInterval'			: config.getint('cse.resource.cnt', 'retentionInterval', fallback=300),
 
 				#
 				#	Defaults for Access Control Policies
@@ -190,6 +204,15 @@ class Configuration(object):
 			Configuration._configuration['server.http.mappings'] = config.items('server.http.mappings')
 			#print(config.items('server.http.mappings'))
 
+		# Read container retention policies
+		Configuration._configuration['cse.cnt.retentionPolicies'] = {}
+		if config.has_section('cse.resource.cnt.retention'):
+			for name, value in config.items('cse.resource.cnt.retention'):
+				if (stages := Utils.parseRetentionStages(value)) is None:
+					print('Configuration Error: Wrong format for [cse.resource.cnt.retention]:%s: %s' % (name, value))
+					return False
+				Configuration._configuration['cse.cnt.retentionPolicies'][name] = stages
+
 		# Some clean-ups and overrites
 
 		# CSE type
@@ -220,6 +243,10 @@ class Configuration(object):
 		if argsDBReset is True:
 			Configuration._configuration['db.resetAtStartup'] = True
 
+		# Override DB repair from command line
+		if argsDBRepair is True:
+			Configuration._configuration['db.repairAtStartup'] = True
+
 		# Override DB storage mode from command line
 		if argsDBStorageMode is not None:
 			Configuration._configuration['db.inMemory'] = argsDBStorageMode == 'memory'
@@ -245,6 +272,7 @@ class Configuration(object):
 		Configuration._configuration['http.address'] = Utils.normalizeURL(Configuration._configuration['http.address'])
 		Configuration._configuration['http.root'] = Utils.normalizeURL(Configuration._configuration['http.root'])
 		Configuration._configuration['cse.remote.root'] = Utils.normalizeURL(Configuration._configuration['cse.remote.root'])
+		Configuration._configuration['cse.cnt.asyncIngestion'] = [ c for c in Configuration._configuration['cse.cnt.asyncIngestion'] if len(c) > 0 ]
 
 
 		#
@@ -264,6 +292,31 @@ class Configuration(object):
 			print('Configuration Error: Missing configuration [cse.remote]:resourceName')
 			return False
 
+		# check the database type
+		if (val := Configuration._configuration['db.type']) not in [ 'tinydb', 'sqlite' ]:
+			print('Configuration Error: Unknown [database]:type: %s' % val)
+			return False
+
+		# check the ingestion queue
+		if Configuration._configuration['db.ingestionQueueSize'] < 1 or Configuration._configuration['db.ingestionBatchSize'] < 1:
+			print('Configuration Error: [database]:ingestionQueueSize and ingestionBatchSize must be greater than 0')
+			return False
+
+		# check the aggregation percentiles
+		try:
+			Configuration._configuration['cse.cnt.aggregationPercentiles'] = [ float(p) for p in Configuration._configuration['cse.cnt.aggregationPercentiles'] if len(p) > 0 ]
+		except ValueError:
+			print('Configuration Error: [cse.resource.cnt]:aggregationPercentiles must be numbers')
+			return False
+		if any(p < 0.0 or p > 100.0 for p in Configuration._configuration['cse.cnt.aggregationPercentiles']):
+			print('Configuration Error: [cse.resource.cnt]:aggregationPercentiles must be between 0 and 100')
+			return False
+
+		# check the WAL fsync policy
+		if (val := Configuration._configuration['db.walFsync']) not in [ 'always', 'interval', 'never' ]:
+			print('Configuration Error: Unknown [database]:walFsync: %s' % val)
+			return False
+
 		# Everything is fine
 		return True
 
@@ -54,6 +54,8 @@ class Constants(object):
 	tsFCNT_LA	= 'm2m:la'
 	tPCH_PCU	=  -20006
 	tsPCH_PCU	= 'm2m:pcu'
+	tCNT_AGG	=  -20007
+	tsCNT_AGG	= 'm2m:agg'
 
 	# <mgmtObj> Specializations
 
@@ -80,8 +82,8 @@ class Constants(object):
 
 	# List of virtual resources
 
-	tVirtualResources 				= [ tCNT_LA, tCNT_OL, tFCNT_LA, tFCNT_OL, tGRP_FOPT, tPCH_PCU ]
-	tVirtualResourcesNames 			= [ 'la', 'ol', 'fopt', 'pcu' ]
+	tVirtualResources 				= [ tCNT_LA, tCNT_OL, tCNT_AGG, tFCNT_LA, tFCNT_OL, tGRP_FOPT, tPCH_PCU ]
+	tVirtualResourcesNames 			= [ 'la', 'ol', 'agg', 'fopt', 'pcu' ]
 
 	# Supported by this CSE
 	supportedResourceTypes 			= [ tACP, tAE, tCNT, tCIN, tCSEBase, tGRP, tMGMTOBJ, tNOD, tCSR, tSUB, tFCNT, tFCI ]
@@ -160,8 +162,14 @@ class Constants(object):
 	hfOrigin						= 'X-M2M-Origin'
 	hfRI 							= 'X-M2M-RI'
 	hfRVI							= 'X-M2M-RVI'
+	hfContentStatus					= 'X-M2M-CTS'
+	hfContinuationToken				= 'X-M2M-CTK'
 	hfvContentType					= 'application/json'
 	hfvRVI 							= '3'
+	hfvContentStatusPartial			= '1'	# partial content. A continuation token is returned
+
+	# Key in the request environment for the continuation token of a partial discovery result
+	envContinuationToken			= 'acme.continuationToken'
 
 	# Subscription-related
 
@@ -8,18 +8,24 @@
 #	through here.
 #
 
-import sys, traceback, re
+import sys, traceback, base64, itertools, json
+from threading import Lock
 from flask import Request
-from typing import Any, List, Tuple, Union
+from typing import Any, Dict, Iterator, List, Set, Tuple, Union
 from Logging import Logging
 from Configuration import Configuration
 from Constants import Constants as C
+from Exporter import Exporter
 import CSE, Utils
 from resources.Resource import Resource
+from FilterCriteria import FilterCriteria
 
 
 class Dispatcher(object):
 
+	discoveryChunkSize: int	= 100		# number of discovery candidates that are read at a time
+	streamChunkSize: int	= 100		# number of references that are serialized at a time for a streamed discovery result
+
 	def __init__(self) -> None:
 		self.rootPath 			= Configuration.get('http.root')
 		self.enableTransit 		= Configuration.get('cse.enableTransitRequests')
@@ -29,6 +35,10 @@ class Dispatcher(object):
 		self.csern				= Configuration.get('cse.rn')
 		self.csiLen 			= len(self.csi)
 		self.cseidLen 			= len(self.cseid)
+		self.ingestionContainers	= set(Configuration.get('cse.cnt.asyncIngestion'))	# srn or ri
+		self.ingestionLocks: Dict[str, Lock] = {}	# parent ri -> lock that serializes the parent updates of ingested resources
+		self.ingestionLocksLock		= Lock()
+		self.exporter				= Exporter()
 
 		Logging.log('Dispatcher initialized')
 
@@ -74,7 +84,7 @@ class Dispatcher(object):
 		return self.handleRetrieveRequest(request, id, originator)
 
 
-	def handleRetrieveRequest(self, request: Request, id: str, originator: str) ->  Tuple[Union[Resource, dict], int, str]:
+	def handleRetrieveRequest(self, request: Request, id: str, originator: str) ->  Tuple[Union[Resource, dict, Iterator[str]], int, str]:
 		Logging.logDebug('Handle retrieve resource: %s' % id)
 
 		try:
@@ -99,10 +109,23 @@ class Dispatcher(object):
 			if rcn not in [C.rcnDiscoveryResultReferences, C.rcnAttributesAndChildResourceReferences, C.rcnChildResourceReferences, C.rcnChildResources, C.rcnAttributesAndChildResources]:	# Only allow those two
 				return None, C.rcInvalidArguments, 'invalid arguments for rcn'
 
+			# Stream the references of an unpaged and unsorted result in the order of the discovery.
+			# Access is checked during the discovery
+			if 'lim' not in handling and rcn in [ C.rcnDiscoveryResultReferences, C.rcnChildResourceReferences ] and not Configuration.get('cse.sortDiscoveredResources'):
+				matches, rc, msg = self.discoverResourcesIterator(id, originator, handling, fo, conditions, attributes)
+				if matches is None:
+					return None, rc, msg
+				if 'ofst' in handling:
+					matches = itertools.islice(matches, handling['ofst']-1, None)
+				return self._streamReferences(matches, rcn, drt), C.rcOK, None
+
 			# do discovery
-			rs, _, msg = self.discoverResources(id, originator, handling, fo, conditions, attributes)
+			rs, rc, msg = self.discoverResources(id, originator, handling, fo, conditions, attributes)
+			if rc == C.rcBadRequest:
+				return None, rc, msg
 
 			if rs is not None:
+				self._setContinuationToken(request, handling)
 	
 				# check and filter by ACP
 				allowedResources = []
@@ -140,7 +163,7 @@ class Dispatcher(object):
 
 		elif fu == 2 or rcn == C.rcnAttributes:	# normal retrieval
 			Logging.logDebug('Get resource: %s' % id)
-			resource, res, msg = self.retrieveResource(id)
+			resource, res, msg = self.retrieveResource(id, request)
 			if resource is None:
 				return None, res, msg
 			if not CSE.security.hasAccess(originator, resource, C.permRETRIEVE):
@@ -150,6 +173,7 @@ class Dispatcher(object):
 				return resource, res, msg
 
 			children = self.discoverChildren(id, resource, originator, handling)
+			self._setContinuationToken(request, handling)
 
 			# Handle more sophisticated result content types
 			if rcn == C.rcnAttributesAndChildResources:
@@ -177,11 +201,17 @@ class Dispatcher(object):
 			return None, C.rcInvalidArguments, 'unknown filter usage (fu)'
 
 
-	def retrieveResource(self, id: str = None) -> Tuple[Resource, int, str]:
-		return self._retrieveResource(srn=id) if Utils.isStructured(id) else self._retrieveResource(ri=id)
+	def _setContinuationToken(self, request: Request, handling: dict) -> None:
+		""" Pass the continuation token of a partial discovery result to the response. """
+		if (token := handling.get('__ctk__')) is not None and request is not None:
+			request.environ[C.envContinuationToken] = token
+
+
+	def retrieveResource(self, id: str = None, request: Request = None) -> Tuple[Resource, int, str]:
+		return self._retrieveResource(srn=id, request=request) if Utils.isStructured(id) else self._retrieveResource(ri=id, request=request)
 
 
-	def _retrieveResource(self, ri: str = None, srn: str = None) -> Tuple[Resource, int, str]:
+	def _retrieveResource(self, ri: str = None, srn: str = None, request: Request = None) -> Tuple[Resource, int, str]:
 		Logging.logDebug('Retrieve resource: %s' % (ri if srn is None else srn))
 
 		if ri is not None:
@@ -194,7 +224,7 @@ class Dispatcher(object):
 		if r is not None:
 			# Check for virtual resource
 			if r.ty != C.tGRP_FOPT and Utils.isVirtualResource(r): # fopt is handled elsewhere
-				return r.handleRetrieveRequest()
+				return r.handleRetrieveRequest(request=request)
 			return r, C.rcOK, None
 		Logging.logDebug('%s: %s' % (msg, ri))
 		return None, rc, msg
@@ -203,44 +233,63 @@ class Dispatcher(object):
 	#########################################################################
 
 	#
-	#	Discover Resources
+	#	Export resources
 	#
 
+	def exportRequest(self, request: Request, _id: Tuple[str, str, str]) -> Tuple[Tuple[int, Iterator[bytes]], int, str]:
+		""" Export the instances of a container. Return the number of exported instances and
+			an iterator over the bytes of the exported archive. See Exporter.streamInstances().
+		"""
+		originator, _, _, _, _ = Utils.getRequestHeaders(request)
+		id, csi, srn = _id
+		Logging.logDebug('EXPORT ID: %s, originator: %s' % (id if id is not None else srn, originator))
 
-	# def discoverResources(self, id, handling, fo, conditions=None, attributes=None, rootResource=None):
-	# 	if rootResource is None:
-	# 		(rootResource, _) = self.retrieveResource(id)
-	# 		if rootResource is None:
-	# 			return (None, C.rcNotFound)
-	# 	return (CSE.storage.discoverResources(rootResource, handling, conditions, attributes, fo), C.rcOK)
+		# No ID, return immediately 
+		if id is None and srn is None:
+			return None, C.rcNotFound, 'missing identifier'
+		if CSE.remote.isTransitID(id):
+			return None, C.rcOperationNotAllowed, 'operation not allowed for transit requests'
+		srn, id = self._buildSRNFromHybrid(srn, id) # Hybrid
 
-	def discoverResources(self, id: str, originator: str, handling: dict, fo: int = 1, conditions: dict = None, attributes: dict = None, rootResource: Resource = None) -> Tuple[List[Resource], int, str]:
-		if rootResource is None:
-			rootResource, _, msg = self.retrieveResource(id)
-			if rootResource is None:
-				return None, C.rcNotFound, msg
+		resource, rc, msg = self.retrieveResource(id)
+		if resource is None:
+			return None, rc, msg
+		if resource.ty != C.tCNT:
+			return None, C.rcOperationNotAllowed, 'export is only supported for <container> resources'
+		if not CSE.security.hasAccess(originator, resource, C.permRETRIEVE):
+			return None, C.rcOriginatorHasNoPrivilege, 'originator has no RETRIEVE permissions'
+		for c in [ 'cra', 'crb' ]:
+			if (v := request.args.get(c)) is not None and not CSE.validator.validateRequestArgument(c, v)[0]:
+				return None, C.rcBadRequest, 'error validating "%s" argument' % c
 
-		# get all direct children
-		dcrs = self.directChildResources(id)
+		return self.exporter.streamInstances(resource.ri, request.args.get('cra'), request.args.get('crb')), C.rcOK, None
 
-		# Slice the page (offset and limit)
-		offset = handling['ofst'] if 'ofst' in handling else 1			# default: 1 (first resource
-		limit = handling['lim'] if 'lim' in handling else sys.maxsize	# default: system max size or "maxint"
-		dcrs = dcrs[offset-1:offset-1+limit]							# now dcrs only contains the desired child resources for ofst and lim
 
-		# Get level
-		level = handling['lvl'] if 'lvl' in handling else sys.maxsize	# default: system max size or "maxint"
+	#########################################################################
 
-		# a bit of optimization. This length stays the same.
-		allLen = ((len(conditions) if conditions is not None else 0) +
-		  (len(attributes) if attributes is not None else 0) +
-		  (len(conditions.get('ty'))-1 if conditions is not None else 0) +		# -1 : compensate for len(conditions) in line 1
-		  (len(conditions.get('cty'))-1 if conditions is not None else 0) +		# -1 : compensate for len(conditions) in line 1 
-		  (len(conditions.get('lbl'))-1 if conditions is not None else 0) 		# -1 : compensate for len(conditions) in line 1 
-		)
+	#
+	#	Discover Resources
+	#
 
-		# Discover the resources
-		discoveredResources = self._discoverResources(rootResource, originator, level, fo, allLen, dcrs=dcrs, conditions=conditions, attributes=attributes)
+
+	def discoverResources(self, id: str, originator: str, handling: dict, fo: int = 1, conditions: dict = None, attributes: dict = None, rootResource: Resource = None) -> Tuple[List[Resource], int, str]:
+		""" Discover the resources below a resource. The matching resources are found in the
+			order of their structured paths: a parent before its children, siblings ordered
+			by their rn. "ofst" and "lim" select a page of them, and the discovery stops as
+			soon as the page is complete. For a full page a continuation token is stored as
+			handling['__ctk__']. Passed as the "ctk" argument, the discovery continues after
+			the last resource of the page.
+		"""
+		matches, rc, msg = self.discoverResourcesIterator(id, originator, handling, fo, conditions, attributes, rootResource)
+		if matches is None:
+			return None, rc, msg
+
+		# Slice the page (offset and limit). This stops the discovery when the page is complete
+		offset = handling['ofst'] if 'ofst' in handling else 1			# default: 1 (first resource)
+		limit = handling['lim'] if 'lim' in handling else None			# default: no limit
+		discoveredResources = list(itertools.islice(matches, offset-1, offset-1+limit if limit is not None else None))
+		if limit is not None and limit > 0 and len(discoveredResources) == limit:	# there might be more
+			handling['__ctk__'] = self._continuationToken(discoveredResources[-1])
 
 		# sort resources by type and then by lowercase rn
 		if Configuration.get('cse.sortDiscoveredResources'):
@@ -248,139 +297,177 @@ class Dispatcher(object):
 
 		return discoveredResources, C.rcOK, None
 
-		# return CSE.storage.discoverResources(rootResource, handling, conditions, attributes, fo), C.rcOK
+
+	def discoverResourcesIterator(self, id: str, originator: str, handling: dict, fo: int = 1, conditions: dict = None, attributes: dict = None, rootResource: Resource = None) -> Tuple[Iterator[Resource], int, str]:
+		""" Return an iterator over all the discovered resources, in the order of their
+			structured paths. The resources are only discovered while iterating. "ofst"
+			and "lim" are ignored, but a continuation token ("ctk") is not.
+		"""
+		if rootResource is None:
+			rootResource, _, msg = self.retrieveResource(id)
+			if rootResource is None:
+				return None, C.rcNotFound, msg
+
+		# Continue after the resource of a continuation token
+		cursor = None
+		if (token := handling.get('ctk')) is not None and (cursor := self._continuationCursor(token)) is None:
+			return None, C.rcBadRequest, 'invalid continuation token'
+
+		# Get level
+		level = handling['lvl'] if 'lvl' in handling else sys.maxsize	# default: system max size or "maxint"
+
+		# Compile the filter criteria once for all resources
+		criteria = FilterCriteria(conditions, attributes, fo)
+
+		if (ris := self._discoveryCandidates(rootResource, level, fo, conditions, attributes, cursor)) is not None:
+			# Only read and match the candidates that were found in the indexes
+			Logging.logDebug('Discovering %d candidate resources' % len(ris))
+			matches = self._discoverCandidates(ris, originator, criteria)
+		else:
+			matches = self._discoverResources(rootResource, originator, level, fo, criteria, conditions=conditions, cursor=cursor)
+		return matches, C.rcOK, None
 
 
-	def _discoverResources(self, rootResource : Resource, originator : str, level : int, fo : int, allLen : int, dcrs : list = None, conditions : dict = None, attributes : dict = None) -> List[Resource]:
+	def _discoverResources(self, rootResource : Resource, originator : str, level : int, fo : int, criteria : FilterCriteria, conditions : dict = None, cursor : List[str] = None) -> Iterator[Resource]:
+		""" Traverse the resource tree below a resource and yield the matching resources, a
+			parent before its children and siblings ordered by their rn. If a *cursor* (the
+			segments of a structured path) is given, then only the resources after it are yielded.
+		"""
 		if rootResource is None or level == 0:		# no resource or level == 0
-			return []
+			return
 
-		# get all direct children, if not provided
-		if dcrs is None:
-			if len(dcrs := self.directChildResources(rootResource.ri)) == 0:
-				return []
+		# get all direct children
+		dcrs = self._discoveryChildResources(rootResource.ri, fo, conditions)
+		dcrs.sort(key=lambda r: r.rn)
 
-		# Filter and add those left to the result
-		discoveredResources = []
+		# Filter and yield those left
 		for r in dcrs:
 
 			# Exclude virtual resources
 			if Utils.isVirtualResource(r):
 				continue
 
-			# check permissions and filter. Only then add a resource
+			if cursor is not None:
+				path = r.__srn__.split('/')
+				if path == cursor[:len(path)]:	# the cursor's resource or one of its parents: only continue below it
+					yield from self._discoverResources(r, originator, level-1, fo, criteria, conditions=conditions, cursor=cursor)
+					continue
+				if path < cursor:				# before the cursor, together with all its children
+					continue
+				cursor = None					# this and all following siblings are after the cursor
+
+			# check permissions and filter. Only then yield a resource
 			# First match then access. bc if no match then we don't need to check permissions (with all the overhead)
-			if self._matchResource(r, conditions, attributes, fo, allLen) and CSE.security.hasAccess(originator, r, C.permDISCOVERY):
-				discoveredResources.append(r)
+			if criteria.match(r) and CSE.security.hasAccess(originator, r, C.permDISCOVERY):
+				yield r
 
 			# Iterate recursively over all (not only the filtered) direct child resources
-			discoveredResources.extend(self._discoverResources(r, originator, level-1, fo, allLen, conditions=conditions, attributes=attributes))
+			yield from self._discoverResources(r, originator, level-1, fo, criteria, conditions=conditions)
 
-		return discoveredResources
 
+	def _discoverCandidates(self, ris: List[str], originator: str, criteria: FilterCriteria) -> Iterator[Resource]:
+		""" Yield the matching resources of a list of candidates. The candidates are read in
+			chunks, so that those after a complete page are not read at all.
+		"""
+		for i in range(0, len(ris), self.discoveryChunkSize):
+			for r in CSE.storage.retrieveResourcesByRI(ris[i:i + self.discoveryChunkSize]):
+				if not Utils.isVirtualResource(r) and criteria.match(r) and CSE.security.hasAccess(originator, r, C.permDISCOVERY):
+					yield r
 
 
-	def _matchResource(self, r : Resource, conditions : dict, attributes : dict, fo : int, allLen : int) -> bool:	
-		""" Match a filter to a resource. """
+	def _continuationToken(self, resource: Resource) -> str:
+		""" Return an opaque continuation token for the discovery after a resource. """
+		return base64.urlsafe_b64encode(resource.__srn__.encode('utf-8')).decode('ascii').rstrip('=')
 
-		# TODO: Implement a couple of optimizations. Can we determine earlier that a match will fail?
 
-		ty = r.ty
+	def _continuationCursor(self, token: str) -> List[str]:
+		""" Return the segments of the structured path of a continuation token, or None if it is invalid. """
+		try:
+			srn = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+		except (ValueError, UnicodeDecodeError):
+			return None
+		return srn.split('/') if len(srn) > 0 else None
+
+
+
+	def _discoveryChildResources(self, ri: str, fo: int, conditions: dict = None) -> List[Resource]:
+		""" Return the direct child resources of a resource for discovery. If all conditions
+			must match and a creation or modification time range is given, then only those
+			instances of a container are retrieved that are in that range. Instances are
+			never modified, so their lt is their ct.
+		"""
+		if conditions is not None and fo == C.foAND:
+			after, before = self._discoveryTimeRange(conditions)
+			if after is not None or before is not None:
+				return CSE.storage.childResourcesInTimeRange(ri, after, before)
+		return self.directChildResources(ri)
+
+
+	def _discoveryTimeRange(self, conditions: dict) -> Tuple[str, str]:
+		""" Return the (after, before) creation time range of instances that all conditions allow. """
+		after = max((conditions[c] for c in [ 'cra', 'ms' ] if c in conditions), default=None)
+		before = min((conditions[c] for c in [ 'crb', 'us' ] if c in conditions), default=None)
+		return after, before
+
+
+	def _discoveryCandidates(self, rootResource: Resource, level: int, fo: int, conditions: dict, attributes: dict, cursor: List[str] = None) -> List[str]:
+		""" Plan a discovery with the indexes of the storage. Return the ri of the resources
+			below the root resource that can match, or None if the resource tree must be
+			traversed instead.
+
+			The conditions "ty" and "lbl" are answered by the indexes, as well as "cty" and
+			"sza"/"szb", which only apply to <contentInstance> resp. <contentInstance> and
+			<flexContainer> resources. For fo=AND the candidates of these conditions are
+			intersected (and instances are restricted by their creation time), for fo=OR they
+			are united, which is only possible if there are no other conditions. Only the
+			candidates after the *cursor* are returned, in the order of the tree traversal.
+
+			Instances are taken from the instance index of the containers below the root
+			resource, already restricted by their creation time for fo=AND. So e.g. the
+			instances of a container in a time range are found by a binary search.
+		"""
+		if conditions is None:
+			return None
+		if (srn := CSE.storage.structuredPathFromRI(rootResource.ri)) is None:
+			return None
 
-		# get the parent resource
-		#
-		#	TODO when determines how the parentAttribute is actually encoded
-		#
-		# pr = None
-		# if (pi := r.get('pi')) is not None:
-		# 	pr = storage.retrieveResource(ri=pi)
-
-		# The matching works like this: go through all the conditions, compare them, and
-		# increment 'found' when matching. For fo=AND found must equal all conditions.
-		# For fo=OR found must be > 0.
-		found = 0
-
-		# check conditions
-		if conditions is not None:
-
-			# Types
-			# Multiple occurences of ty is always OR'ed. Therefore we add the count of
-			# ty's to found (to indicate that the whole set matches)
-			if (tys := conditions.get('ty')) is not None:
-				found += len(tys) if str(ty) in tys else 0
-			if (ct := r.ct) is not None:
-				found += 1 if (c_crb := conditions.get('crb')) is not None and (ct < c_crb) else 0
-				found += 1 if (c_cra := conditions.get('cra')) is not None and (ct > c_cra) else 0
-
-			if (lt := r.lt) is not None:
-				found += 1 if (c_ms := conditions.get('ms')) is not None and (lt > c_ms) else 0
-				found += 1 if (c_us := conditions.get('us')) is not None and (lt < c_us) else 0
-
-			if (st := r.st) is not None:
-				found += 1 if (c_sts := conditions.get('sts')) is not None and (str(st) > c_sts) else 0
-				found += 1 if (c_stb := conditions.get('stb')) is not None and (str(st) < c_stb) else 0
-
-			if (et := r.et) is not None:
-				found += 1 if (c_exb := conditions.get('exb')) is not None and (et < c_exb) else 0
-				found += 1 if (c_exa := conditions.get('exa')) is not None and (et > c_exa) else 0
-
-			# Check labels similar to types
-			rlbl = r.lbl
-			if rlbl is not None and (lbls := conditions.get('lbl')) is not None:
-				for l in lbls:
-					if l in rlbl:
-						found += len(lbls)
-						break
-			# special handling of label-list
-			# if (lbl := r.lbl) is not None and (c_lbl := conditions.get('lbl')) is not None:
-			# 	lbla = c_lbl.split()
-			# 	fnd = 0
-			# 	for l in lbla:
-			# 		fnd += 1 if l in lbl else 0
-			# 	found += 1 if (fo == 1 and fnd == len(lbl)) or (fo == 2 and fnd > 0) else 0	# fo==or -> find any label
-				#	# TODO labelsQuery
-
-
-			if ty in [ C.tCIN, C.tFCNT ]:	# special handling for CIN, FCNT
-				if (cs := r.cs) is not None:
-					found += 1 if (sza := conditions.get('sza')) is not None and (str(cs) >= sza) else 0
-					found += 1 if (szb := conditions.get('szb')) is not None and (str(cs) < szb) else 0
-
-			# ContentFormats
-			# Multiple occurences of cnf is always OR'ed. Therefore we add the count of
-			# cnf's to found (to indicate that the whole set matches)
-			# Similar to types.
-			if ty in [ C.tCIN ]:	# special handling for CIN
-				if (cnfs := conditions.get('cty')) is not None:
-					found += len(cnfs) if r.cnf in cnfs else 0
-
-			# TODO childLabels
-			# TODO parentLabels
-			# TODO childResourceType
-			# TODO parentResourceType
-
-
-			# Attributes:
-			if attributes is not None:
-				for name in attributes:
-					val = attributes[name]
-					if '*' in val:
-						val = val.replace('*', '.*')
-						found += 1 if (rval := r[name]) is not None and re.match(val, str(rval)) else 0
-					else:
-						found += 1 if (rval := r[name]) is not None and str(val) == str(rval) else 0
-
-			# TODO childAttribute
-			# TODO parentAttribute
-
-
-		# Test whether the OR or AND criteria is fullfilled
-		if not ((fo == C.foOR  and found > 0) or 		# OR and found something
-				(fo == C.foAND and allLen == found)		# AND and found everything
-			   ): 
-			return False
-
-		return True
+		if fo == C.foAND:
+			after, before = self._discoveryTimeRange(conditions)
+		else:
+			if (attributes is not None and len(attributes) > 0) or len(conditions.keys() - { 'ty', 'cty', 'lbl', 'sza', 'szb' }) > 0:
+				return None		# other conditions can match any resource
+			after, before = None, None
+
+		def ofTypes(tys: List[int]) -> Set[str]:
+			instanceTypes = [ ty for ty in tys if ty in CSE.storage.instanceTypes ]
+			ris = CSE.storage.instancesBelow(rootResource.ri, instanceTypes, level, after, before)
+			if len(instanceTypes) < len(tys):
+				ris |= CSE.storage.resourcesOfTypes([ ty for ty in tys if ty not in instanceTypes ], srn, level)
+			return ris
+
+		candidates: List[Set[str]] = []
+		if len(conditions.get('ty') or []) > 0:
+			tys = []
+			for t in conditions['ty']:
+				try:
+					tys.append(int(t))
+				except ValueError:
+					pass		# an invalid type never matches
+			candidates.append(ofTypes(tys))
+		if len(conditions.get('cty') or []) > 0:
+			candidates.append(ofTypes([ C.tCIN ]))
+		if 'sza' in conditions or 'szb' in conditions:
+			candidates.append(ofTypes([ C.tCIN, C.tFCNT ]))
+		if len(lbls := conditions.get('lbl') or []) > 0:
+			candidates.append(CSE.storage.resourcesWithLabels(lbls))	# multiple labels are always OR'ed
+		if len(candidates) == 0:
+			return None
+
+		if fo == C.foAND:
+			ris = set.intersection(*sorted(candidates, key=len))
+		else:
+			ris = set.union(*candidates)
+		return CSE.storage.descendantsInIndex(srn, ris, level, after, before, cursor)
 
 
 	#########################################################################
@@ -416,6 +503,15 @@ class Dispatcher(object):
 
 
 	def handleCreateRequest(self, request: Request, id: str, originator: str, ct: str, ty: int) -> Tuple[Union[Resource, dict], int, str]:
+		# Buffer the resource updates of the request and write each resource only once at the end
+		CSE.storage.beginUnitOfWork()
+		try:
+			return self._handleCreateRequest(request, id, originator, ct, ty)
+		finally:
+			CSE.storage.commitUnitOfWork()
+
+
+	def _handleCreateRequest(self, request: Request, id: str, originator: str, ct: str, ty: int) -> Tuple[Union[Resource, dict], int, str]:
 		Logging.logDebug('Adding new resource')
 
 		try:
@@ -448,6 +544,10 @@ class Dispatcher(object):
 		if Utils.isVirtualResource(pr):
 			return pr.handleCreateRequest(request, id, originator, ct, ty)
 
+		# Create multiple <contentInstance> resources at once
+		if ty == C.tCIN and isinstance(request.json, dict) and isinstance(request.json.get(C.tsCIN), list):
+			return self.createInstances(request, pr, originator, rcn)
+
 		# Add new resource
 		try:
 			nr, msg = Utils.resourceFromJSON(request.json, pi=pr.ri, ty=ty)
@@ -472,7 +572,8 @@ class Dispatcher(object):
 		originator = rres[0]
 
 		# Create the resource. If this fails we register everything
-		if (result := self.createResource(nr, pr, originator))[0] is None:
+		create = self.ingestResource if self._isIngestedResource(nr, pr) else self.createResource
+		if (result := create(nr, pr, originator))[0] is None:
 			CSE.registration.checkResourceDeletion(nr, originator) # deregister resource. Ignore result, we take this from the creation
 			return result
 
@@ -543,6 +644,137 @@ class Dispatcher(object):
 		return resource, C.rcCreated, None 	# everything is fine. resource created.
 
 
+	def createInstances(self, request: Request, parentResource: Resource, originator: str, rcn: int = None) -> Tuple[dict, int, str]:
+		""" Create multiple <contentInstance> resources with one request. The request's
+			"m2m:cin" contains a list of resources instead of a single one. Each of
+			them is checked and activated individually, but they are written in one
+			batch and the parent is validated only once.
+			The result is an aggregated response with one response per resource.
+		"""
+		_, _, _, rqi, _ = Utils.getRequestHeaders(request)
+		Logging.logDebug('Adding %d resources' % len(request.json[C.tsCIN]))
+
+		results = []
+		srns: Set[str] = set()	# to detect duplicates in the request
+		for jsn in request.json[C.tsCIN]:
+			results.append(self._prepareInstance(jsn, parentResource, originator, srns))
+		resources = [ resource for resource, _, _ in results if resource is not None ]
+
+		if len(resources) > 0:
+			CSE.storage.createResources(resources)
+			parentResource, _, _ = parentResource.dbReload()			# Read the resource again in case it was updated in the DB
+			parentResource.childrenAdded(resources, originator)		# notify the parent resource
+			CSE.event.createResource.callForEach(resources)			# type: ignore
+
+		# construct aggregated response
+		items = []
+		for resource, rsc, msg in results:
+			item = { 'rsc' : rsc, 
+					 'rqi' : rqi,
+					 'rvi' : '3'
+				   }
+			if resource is not None:
+				item['to'] = resource.__srn__
+				if rcn != C.rcnNothing:
+					item['pc'] = resource.asJSON()
+			elif msg is not None:
+				item['pc'] = { 'm2m:dbg' : msg }
+			items.append(item)
+		return { 'm2m:agr' : { 'm2m:rsp' : items } }, C.rcOK, None	# OK regardless of the individual results
+
+
+	def _prepareInstance(self, jsn: dict, parentResource: Resource, originator: str, srns: Set[str]) -> Tuple[Resource, int, str]:
+		""" Create and activate one resource of a createInstances() request, but don't store it yet. """
+		if not isinstance(jsn, dict):
+			return None, C.rcBadRequest, 'malformed content'
+		try:
+			nr, msg = Utils.resourceFromJSON({ C.tsCIN : jsn }, pi=parentResource.ri, ty=C.tCIN)
+			if nr is None:
+				return None, C.rcBadRequest, msg
+		except Exception as e:
+			return None, C.rcBadRequest, str(e)
+		if not parentResource.canHaveChild(nr):
+			return None, C.rcInvalidChildResourceType, 'Invalid child resource type'
+		if not (cres := parentResource.childWillBeAdded(nr, originator))[0]:
+			return None, cres[1], cres[2]
+		nr[nr._srn] = Utils.structuredPath(nr)
+		if nr.__srn__ in srns or CSE.storage.hasResource(nr.ri, nr.__srn__):
+			return None, C.rcConflict, 'resource already exists'
+		if (rres := CSE.registration.checkResourceCreation(nr, originator, parentResource))[1] != C.rcOK:
+			return None, rres[1], rres[2]
+		if not (res := nr.activate(parentResource, rres[0]))[0]:
+			return None, res[1], res[2]
+		srns.add(nr.__srn__)
+		return nr, C.rcCreated, None
+
+
+	def ingestResource(self, resource: Resource, parentResource: Resource, originator: str = None) -> Tuple[Resource, int, str]:
+		""" Add a <contentInstance> to a container with asynchronous ingestion. The
+			resource is validated and gets its attributes here, but it is written to
+			the database later in a batch by the storage. The parent is notified
+			afterwards, see ingestedResourcesWritten().
+		"""
+		Logging.logDebug('Ingesting resource ri: %s, type: %d' % (resource.ri, resource.ty))
+
+		# if not already set: determine and add the srn
+		if resource.__srn__ is None:
+			resource[resource._srn] = Utils.structuredPath(resource)
+
+		# Backpressure: wait until the storage has written enough of the pending resources
+		CSE.storage.waitForIngestion()
+
+		# The parent is updated here (its state tag) and when the storage informs about
+		# the written resources. Both must not overwrite each other's updates.
+		with self._ingestionLock(parentResource.ri):
+			# Activate the resource first, there is nothing in the DB to read yet
+			if not (res := resource.activate(parentResource, originator))[0]:
+				return None, res[1], res[2]
+			if (res := CSE.storage.ingestResource(resource))[1] != C.rcCreated:
+				return None, res[1], res[2]
+
+		return resource, C.rcCreated, None
+
+
+	def ingestedResourcesWritten(self, resources: List[Resource]) -> None:
+		""" Called by the storage after a batch of ingested resources was written.
+			Notify the parents and send the create events. The updates of a parent
+			are written only once for all its resources of the batch. Only the
+			parent's lock is held meanwhile, so that e.g. slow notifications for one
+			container don't block the ingestion into the others.
+		"""
+		resourcesByPI: Dict[str, List[Resource]] = {}
+		for resource in resources:
+			resourcesByPI.setdefault(resource.pi, []).append(resource)
+		for pi, children in resourcesByPI.items():
+			with self._ingestionLock(pi):
+				CSE.storage.beginUnitOfWork()
+				try:
+					for resource in children:
+						if (parentResource := CSE.storage.retrieveResource(ri=pi)[0]) is None:	# removed in the meantime
+							break
+						parentResource.childAdded(resource, resource[Resource._originator])		# notify the parent resource
+						CSE.event.createResource(resource)	# type: ignore
+				finally:
+					CSE.storage.commitUnitOfWork()
+
+
+	def _ingestionLock(self, pi: str) -> Lock:
+		""" Return the lock for the updates of a parent of ingested resources. There is one
+			for each container with asynchronous ingestion.
+		"""
+		with self.ingestionLocksLock:
+			if (lock := self.ingestionLocks.get(pi)) is None:
+				lock = self.ingestionLocks[pi] = Lock()
+			return lock
+
+
+	def _isIngestedResource(self, resource: Resource, parentResource: Resource) -> bool:
+		""" Check whether a new resource is ingested asynchronously. """
+		return (resource.ty == C.tCIN and 
+				parentResource.ty == C.tCNT and 
+				(parentResource.ri in self.ingestionContainers or parentResource.__srn__ in self.ingestionContainers))
+
+
 	#########################################################################
 
 	#
@@ -778,6 +1010,53 @@ class Dispatcher(object):
 			parentResource.childRemoved(resource, originator)
 		return resource, rc, msg
 
+	def deleteChildResources(self, parentResource: Resource, originator: str = None) -> None:
+		"""	Delete all descendants of a resource in one batch. Notifications are only
+			checked for resources that have subscriptions in the subtree, and only
+			resources that implement their own deactivate() are deactivated.
+		"""
+		if len(resources := CSE.storage.descendantResources(parentResource.ri)) == 0:
+			return
+		Logging.logDebug('Removing %d sub-resources of ri: %s' % (len(resources), parentResource.ri))
+
+		# Send the notifications first, because the subscriptions are removed with the subtree
+		byRI = { r.ri : r for r in resources }
+		byRI[parentResource.ri] = parentResource
+		subscribed = { r.pi for r in resources if r.ty == C.tSUB }
+		if len(subscribed) > 0:
+			for r in resources:
+				if r.ri in subscribed and not self._hasOwnDeactivate(r):
+					CSE.notification.checkSubscriptions(r, C.netResourceDelete)
+				if r.pi in subscribed:
+					CSE.notification.checkSubscriptions(byRI[r.pi], C.netDeleteDirectChild, r)
+
+		for r in resources:
+			if self._hasOwnDeactivate(r):	# e.g. to remove a subscription
+				r.deactivate(originator)
+
+		CSE.storage.deleteResources(resources)
+		CSE.event.deleteResource.callForEach(resources) 	# type: ignore
+
+
+	def evictInstances(self, parentResource: Resource, ris: List[str]) -> None:
+		"""	Remove instances of a container, e.g. when its limits are exceeded. Instances
+			don't have children, and the container updates its counters itself. So
+			they are deleted directly in the storage, without deactivating them and
+			without calling the container's childRemoved().
+		"""
+		resources = [ r for ri in ris if (r := CSE.storage.retrieveResource(ri=ri)[0]) is not None ]
+		if len(resources) == 0:
+			return
+		Logging.logDebug('Evicting %d instances of ri: %s' % (len(resources), parentResource.ri))
+		CSE.storage.deleteResources(resources)
+		CSE.notification.checkChildSubscriptions(parentResource, C.netDeleteDirectChild, resources)
+		CSE.event.deleteResource.callForEach(resources) 	# type: ignore
+
+
+	def _hasOwnDeactivate(self, resource: Resource) -> bool:
+		return type(resource).deactivate is not Resource.deactivate
+
+
 	#########################################################################
 
 	#
@@ -813,8 +1092,7 @@ class Dispatcher(object):
 		result = []
 		rss = CSE.storage.retrieveResourcesByType(ty)
 		for rs in (rss or []):
-			r, _ = Utils.resourceFromJSON(rs)
-			result.append(r)
+			result.append(Utils.resourceFromDB(rs))
 		return result
 
 
@@ -934,6 +1212,11 @@ class Dispatcher(object):
 					return None, 'error validating "%s" argument' % c
 				handling[c] = v # string
 				del args[c]
+		if (v := args.get('ctk')) is not None:	# continuation token
+			if self._continuationCursor(v) is None:
+				return None, 'invalid continuation token'
+			handling['ctk'] = v
+			del args['ctk']
 		result['__handling__'] = handling
 
 
@@ -998,14 +1281,17 @@ class Dispatcher(object):
 
 	#	Create a m2m:uril structure from a list of resources
 	def _resourcesToURIList(self, resources: List[Resource], drt: int) -> dict:
-		# cseid = '/' + Configuration.get('cse.csi') + '/'
-		cseid = '/%s/' % self.csi
 		lst = []
 		for r in resources:
-			lst.append(Utils.structuredPath(r) if drt == C.drtStructured else cseid + r.ri)
+			lst.append(self._resourceURI(r, drt))
 		return { 'm2m:uril' : lst }
 
 
+	def _resourceURI(self, resource: Resource, drt: int) -> str:
+		# cseid = '/' + Configuration.get('cse.csi') + '/'
+		return Utils.structuredPath(resource) if drt == C.drtStructured else '/%s/%s' % (self.csi, resource.ri)
+
+
 	# def _attributesAndChildResources(self, parentResource, resources):
 	# 	result = parentResource.asJSON()
 	# 	ch = []
@@ -1059,16 +1345,48 @@ class Dispatcher(object):
 			return targetResource
 		t = []
 		for r in resources:
-			if r.ty in [ C.tCNT_OL, C.tCNT_LA, C.tFCNT_OL, C.tFCNT_LA ]:	# Skip latest, oldest virtual resources
-				continue
-			ref = { 'nm' : r['rn'], 'typ' : r['ty'], 'val' :  Utils.structuredPath(r) if drt == C.drtStructured else r.ri}
-			if r.ty == C.tFCNT:
-				ref['spty'] = r.cnd		# TODO Is this correct? Actually specializationID in TS-0004 6.3.5.29, but this seems to be wrong
-			t.append(ref)
+			if (ref := self._resourceReference(r, drt)) is not None:
+				t.append(ref)
 		targetResource[tp] = t
 		return targetResource
 
 
+	def _resourceReference(self, r: Resource, drt: int) -> dict:
+		""" Return the child resource reference of a resource, or None for virtual resources. """
+		if r.ty in [ C.tCNT_OL, C.tCNT_LA, C.tCNT_AGG, C.tFCNT_OL, C.tFCNT_LA ]:	# Skip latest, oldest, aggregation virtual resources
+			return None
+		ref = { 'nm' : r['rn'], 'typ' : r['ty'], 'val' :  Utils.structuredPath(r) if drt == C.drtStructured else r.ri}
+		if r.ty == C.tFCNT:
+			ref['spty'] = r.cnd		# TODO Is this correct? Actually specializationID in TS-0004 6.3.5.29, but this seems to be wrong
+		return ref
+
+
+	def _streamReferences(self, resources: Iterator[Resource], rcn: int, drt: int) -> Iterator[str]:
+		""" Serialize discovered resources as a URI list (rcn=11) or as a list of child
+			resource references (rcn=6) in JSON, piece by piece while the resources are
+			discovered. This is only used when cse.sortDiscoveredResources is disabled: the
+			references stay in the order of the discovery (by structured path), so that
+			nothing must be collected first.
+			The status is already sent when the discovery fails, so an error is logged and
+			the JSON document is closed with the references sent so far.
+		"""
+		if rcn == C.rcnDiscoveryResultReferences:
+			name, empty = 'm2m:uril', json.dumps({ 'm2m:uril' : [] })
+			references: Iterator[Any] = (self._resourceURI(r, drt) for r in resources)
+		else:
+			name, empty = 'm2m:rrl', json.dumps({})		# like _resourceTreeReferences()
+			references = (ref for r in resources if (ref := self._resourceReference(r, drt)) is not None)
+
+		prefix = '{"%s": [' % name
+		try:
+			while len(chunk := [ json.dumps(ref) for ref in itertools.islice(references, self.streamChunkSize) ]) > 0:
+				yield prefix + ', '.join(chunk)
+				prefix = ', '
+		except Exception:
+			Logging.logErr('Exception while streaming discovery result: %s' % traceback.format_exc())
+		yield empty if prefix != ', ' else ']}'
+
+
 	# Retrieve full child resources of a resource and add them to a new target resource
 	def _childResourceTree(self, resources: List[Resource], targetResource: Union[Resource, dict]) -> None:
 		if len(resources) == 0:
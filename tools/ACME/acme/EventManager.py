@@ -8,7 +8,7 @@
 #
 
 import threading
-from typing import Callable, Any
+from typing import Callable, Any, List
 from Logging import Logging
 from Constants import Constants as C
 import CSE
@@ -53,6 +53,21 @@ class Event(list):
 			function(*args, **kwargs)
 
 
+	def callForEach(self, arguments: List[Any]) -> None:
+		"""	Raise the event once for each element of *arguments*, but call the
+			handlers for all of them in a single thread.
+		"""
+		if len(arguments) == 0:
+			return
+		thrd = threading.Thread(target=self._callForEachThread, args=(arguments,))
+		thrd.setDaemon(True)		# Make the thread a daemon of the main thread
+		thrd.start()
+
+	def _callForEachThread(self, arguments: List[Any]) -> None:
+		for argument in arguments:
+			self._callThread(argument)
+
+
 	def __repr__(self) -> str:
 		return "Event(%s)" % list.__repr__(self)
 
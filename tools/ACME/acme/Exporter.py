@@ -0,0 +1,170 @@
+#
+#	Exporter.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Entity to export the <contentInstance> resources of a container into a
+#	columnar file for analytics.
+#
+#	The file is a NumPy .npz archive (a zip file of .npy arrays) that can be
+#	read with numpy.load(), but NumPy is not needed to write it. The columns are
+#	laid out like Arrow arrays:
+#
+#		ct, cnf, con	strings: "<name>.offsets" (int64, n+1 entries) and "<name>.data"
+#						(uint8, UTF-8). Value i is data[offsets[i]:offsets[i+1]].
+#						A con that is not a string is exported as JSON.
+#		st, cs			int64, -1 if the attribute is missing.
+#
+#	The instances are read from the storage in chunks, and the columns are
+#	buffered in temporary files until the archive is written. For the HTTP
+#	endpoint the archive is not buffered, but streamed while it is written.
+#
+
+import io, json, struct, sys, tempfile, zipfile
+from array import array
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple, Union
+import CSE
+from Logging import Logging
+
+
+class Exporter(object):
+
+	chunkSize: int	= 500		# number of instances that are read from the storage at a time
+	blockSize: int	= 65536		# number of bytes that are written to the archive at a time
+
+	stringColumns	= [ 'ct', 'cnf', 'con' ]
+	integerColumns	= [ 'st', 'cs' ]
+
+
+	def exportInstances(self, pi: str, file: Union[str, BinaryIO], after: str = None, before: str = None, compress: bool = False) -> int:
+		""" Export the instances of the container *pi* that were created after *after* and
+			before *before* to *file*, which is a path or a file object. Return the number
+			of exported instances.
+		"""
+		count, buffers, offsets = self._collectColumns(pi, after, before)
+		try:
+			with zipfile.ZipFile(file, 'w', compression=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED, allowZip64=True) as archive:
+				for _ in self._writeColumns(archive, buffers, offsets, count):
+					pass
+		finally:
+			self._closeBuffers(buffers)
+		return count
+
+
+	def streamInstances(self, pi: str, after: str = None, before: str = None, compress: bool = False) -> Tuple[int, Iterator[bytes]]:
+		""" Export the instances like exportInstances(), but return the number of exported
+			instances and an iterator over the bytes of the archive. The archive is assembled
+			while iterating, so it is never stored as a whole. Only the columns are collected
+			in temporary files first, because a column must be complete to be archived.
+		"""
+		count, buffers, offsets = self._collectColumns(pi, after, before)
+
+		def chunks() -> Iterator[bytes]:
+			stream = _ChunkStream()
+			try:
+				with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED, allowZip64=True) as archive:
+					for _ in self._writeColumns(archive, buffers, offsets, count):
+						if len(data := stream.take()) > 0:
+							yield data
+				yield stream.take()	# the archive's central directory
+			finally:
+				self._closeBuffers(buffers)
+
+		return count, chunks()
+
+
+	def _collectColumns(self, pi: str, after: str, before: str) -> Tuple[int, Dict[str, BinaryIO], Dict[str, int]]:
+		""" Read the instances from the storage in chunks, and write their values to one
+			temporary file per column. Return the number of instances, the files and the
+			lengths of the string columns.
+		"""
+		Logging.log('Exporting instances of: %s' % pi)
+		buffers: Dict[str, Any] = { c : tempfile.TemporaryFile() for c in self.stringColumns + self.integerColumns + [ c + '.offsets' for c in self.stringColumns ] }
+		try:
+			offsets = { c : 0 for c in self.stringColumns }
+			for c in self.stringColumns:
+				self._writeIntegers(buffers[c + '.offsets'], [ 0 ])
+			count = 0
+
+			for documents in CSE.storage.instanceDocuments(pi, after, before, self.chunkSize):
+				for c in self.stringColumns:
+					values = [ self._stringValue(jsn.get(c)) for jsn in documents ]
+					ends = []
+					for value in values:
+						offsets[c] += len(value)
+						ends.append(offsets[c])
+					buffers[c].write(b''.join(values))
+					self._writeIntegers(buffers[c + '.offsets'], ends)
+				for c in self.integerColumns:
+					self._writeIntegers(buffers[c], [ v if isinstance(v := jsn.get(c), int) else -1 for jsn in documents ])
+				count += len(documents)
+		except:
+			self._closeBuffers(buffers)
+			raise
+		Logging.log('Exported %d instances of: %s' % (count, pi))
+		return count, buffers, offsets
+
+
+	def _writeColumns(self, archive: zipfile.ZipFile, buffers: Dict[str, BinaryIO], offsets: Dict[str, int], count: int) -> Iterator[None]:
+		""" Write the collected columns to the archive. Yield after every block. """
+		for c in self.stringColumns:
+			yield from self._writeArray(archive, c + '.offsets', '<i8', count + 1, buffers[c + '.offsets'])
+			yield from self._writeArray(archive, c + '.data', '|u1', offsets[c], buffers[c])
+		for c in self.integerColumns:
+			yield from self._writeArray(archive, c, '<i8', count, buffers[c])
+
+
+	def _closeBuffers(self, buffers: Dict[str, BinaryIO]) -> None:
+		for buffer in buffers.values():
+			buffer.close()
+
+
+	def _stringValue(self, value: Any) -> bytes:
+		if value is None:
+			return b''
+		if not isinstance(value, str):
+			value = json.dumps(value)
+		return value.encode('utf-8')
+
+
+	def _writeIntegers(self, buffer: BinaryIO, values: List[int]) -> None:
+		integers = array('q', values)
+		if sys.byteorder != 'little':
+			integers.byteswap()
+		buffer.write(integers.tobytes())
+
+
+	def _writeArray(self, archive: zipfile.ZipFile, name: str, descr: str, length: int, buffer: BinaryIO) -> Iterator[None]:
+		""" Write a buffered column as a one-dimensional .npy array to the archive. Yield after every block. """
+		header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (descr, length)
+		header += ' ' * (-(len(header) + 11) % 64) + '\n'	# the data must be aligned to 64 bytes
+		buffer.seek(0)
+		with archive.open(name + '.npy', 'w', force_zip64=True) as member:
+			member.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1'))
+			while len(data := buffer.read(self.blockSize)) > 0:
+				member.write(data)
+				yield
+
+
+class _ChunkStream(io.RawIOBase):
+	""" A write-only, unseekable stream that collects the written bytes until they are taken. """
+
+	def __init__(self) -> None:
+		self.chunks: List[bytes] = []
+
+
+	def writable(self) -> bool:
+		return True
+
+
+	def write(self, data: bytes) -> int:
+		self.chunks.append(bytes(data))
+		return len(data)
+
+
+	def take(self) -> bytes:
+		""" Return and remove the bytes written so far. """
+		data = b''.join(self.chunks)
+		self.chunks = []
+		return data
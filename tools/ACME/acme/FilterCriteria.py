@@ -0,0 +1,128 @@
+#
+#	FilterCriteria.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	The filter criteria of a discovery request, compiled once per request into
+#	a predicate that is evaluated for each resource of the discovery.
+#
+
+import re
+from typing import Any, Callable, List
+from Constants import Constants as C
+from resources.Resource import Resource
+
+
+class FilterCriteria(object):
+	"""	With fo=AND a resource must match all criteria, with fo=OR at least one of them.
+		Multiple values of "ty", "cty" and "lbl" are always OR'ed. The tests read the
+		attributes directly from the resources' JSON, except those of the attribute
+		filters, which may be paths.
+	"""
+
+	# Criteria that are not supported yet. No resource matches them
+	# TODO labelsQuery, childLabels, parentLabels, childResourceType, parentResourceType, childAttribute, parentAttribute
+	unsupported = [ 'lbq', 'catr', 'patr' ]
+
+
+	def __init__(self, conditions: dict, attributes: dict, fo: int) -> None:
+		self.fo = fo
+		self.tests: List[Callable[[Resource], bool]] = []	# cheap and selective tests first
+		self.unsatisfiable = False		# whether there is a criterion that no resource matches
+		if conditions is not None:
+			self._compileConditions(conditions)
+			self._compileAttributes(attributes)
+		elif attributes is not None and len(attributes) > 0:
+			self.unsatisfiable = True
+
+
+	def match(self, resource: Resource) -> bool:
+		""" Test whether a resource matches the filter criteria. """
+		if self.fo == C.foAND:
+			if self.unsatisfiable:
+				return False
+			for test in self.tests:
+				if not test(resource):
+					return False
+			return True
+		if self.fo == C.foOR:
+			for test in self.tests:
+				if test(resource):
+					return True
+		return False
+
+
+	def _compileConditions(self, conditions: dict) -> None:
+		tests = self.tests
+
+		# Types
+		if len(tys := conditions.get('ty') or []) > 0:
+			types = { t for t in (self._integer(ty) for ty in tys) if t is not None }
+			tests.append(lambda r: r.json.get('ty') in types)
+
+		# ContentFormats, only for <contentInstance>
+		if len(ctys := conditions.get('cty') or []) > 0:
+			cnfs = set(ctys)
+			tests.append(lambda r: r.json.get('ty') == C.tCIN and r.json.get('cnf') in cnfs)
+
+		# Labels
+		if len(lbls := conditions.get('lbl') or []) > 0:
+			labels = set(lbls)
+			tests.append(lambda r: (rlbl := r.json.get('lbl')) is not None and not labels.isdisjoint(rlbl))
+
+		# Sizes, only for <contentInstance> and <flexContainer>
+		if (sza := conditions.get('sza')) is not None:
+			tests.append(self._numericTest('cs', sza, lambda v, b: v >= b, [ C.tCIN, C.tFCNT ]))
+		if (szb := conditions.get('szb')) is not None:
+			tests.append(self._numericTest('cs', szb, lambda v, b: v < b, [ C.tCIN, C.tFCNT ]))
+
+		# Times. Timestamps are compared as strings
+		for name, attribute, after in [ ('cra', 'ct', True), ('crb', 'ct', False), ('ms', 'lt', True), ('us', 'lt', False), ('exa', 'et', True), ('exb', 'et', False) ]:
+			if (timestamp := conditions.get(name)) is not None:
+				tests.append(self._timeTest(attribute, timestamp, after))
+
+		# States
+		if (sts := conditions.get('sts')) is not None:
+			tests.append(self._numericTest('st', sts, lambda v, b: v > b))
+		if (stb := conditions.get('stb')) is not None:
+			tests.append(self._numericTest('st', stb, lambda v, b: v < b))
+
+		if any(name in conditions for name in self.unsupported):
+			self.unsatisfiable = True
+
+
+	def _compileAttributes(self, attributes: dict) -> None:
+		if attributes is None:
+			return
+		for name in attributes:
+			if '*' in (value := attributes[name]):
+				try:
+					pattern = re.compile(value.replace('*', '.*'))
+				except re.error:
+					self.tests.append(lambda r: False)
+					continue
+				self.tests.append(lambda r, name=name, pattern=pattern: (rval := r[name]) is not None and pattern.match(str(rval)) is not None)	# type: ignore
+			else:
+				self.tests.append(lambda r, name=name, value=str(value): (rval := r[name]) is not None and str(rval) == value)	# type: ignore
+
+
+	def _timeTest(self, attribute: str, timestamp: str, after: bool) -> Callable[[Resource], bool]:
+		if after:
+			return lambda r: (t := r.json.get(attribute)) is not None and t > timestamp
+		return lambda r: (t := r.json.get(attribute)) is not None and t < timestamp
+
+
+	def _numericTest(self, attribute: str, bound: str, compare: Callable[[int, int], bool], types: List[int] = None) -> Callable[[Resource], bool]:
+		if (b := self._integer(bound)) is None:		# an invalid bound never matches
+			return lambda r: False
+		if types is not None:
+			return lambda r: r.json.get('ty') in types and isinstance(v := r.json.get(attribute), int) and compare(v, b)
+		return lambda r: isinstance(v := r.json.get(attribute), int) and compare(v, b)
+
+
+	def _integer(self, value: Any) -> int:
+		try:
+			return int(value)
+		except (TypeError, ValueError):
+			return None
@@ -9,7 +9,7 @@
 #
 
 import json, requests, logging, os, sys, traceback
-from typing import Any, Callable, List, Tuple, Union
+from typing import Any, Callable, Iterator, List, Tuple, Union
 import flask
 from flask import Flask, Request, make_response, request
 from werkzeug.wrappers import Response
@@ -47,6 +47,11 @@ class HttpServer(object):
 		# self.addEndpoint(self.rootPath + '/', handler=self.handleDELETE, methods=['DELETE'])
 		self.addEndpoint(self.rootPath + '/<path:path>', handler=self.handleDELETE, methods=['DELETE'])
 
+		# Register the endpoint for exporting containers
+		if Configuration.get('http.enableExport'):
+			Logging.log('Registering export endpoint at: %s/__export__' % self.rootPath)
+			self.addEndpoint(self.rootPath + '/__export__/<path:path>', handler=self.handleExportGET, methods=['GET'])
+
 		# Register the endpoint for the web UI
 		if Configuration.get('cse.webui.enable'):
 			self.webuiRoot = Configuration.get('cse.webui.root')
@@ -154,6 +159,30 @@ class HttpServer(object):
 			return self._prepareResponse(request, resource, rc, msg)
 
 
+	def handleExportGET(self, path: str = None) -> Response:
+		""" Handle a GET request to export the instances of a container. The
+			columnar file is streamed while it is written. See Exporter.
+		"""
+		Logging.logDebug('==> Export: /%s' % path)	# path = request.path  w/o the root
+		try:
+			result, rc, msg = CSE.dispatcher.exportRequest(request, Utils.retrieveIDFromPath(path, self.csern, self.cseri))
+		except Exception as e:
+			result, rc, msg = self._prepareException(e)
+		if result is None:
+			return self._prepareResponse(request, None, rc, msg)
+		count, chunks = result
+		Logging.logDebug('<== Response (RSC: %d): %d exported instances' % (rc, count))
+
+		resp = Response(chunks, mimetype='application/zip')
+		resp.headers['X-M2M-RSC'] = str(rc)
+		if 'X-M2M-RI' in request.headers:
+			resp.headers['X-M2M-RI'] = request.headers['X-M2M-RI']
+		if 'X-M2M-RVI' in request.headers:
+			resp.headers['X-M2M-RVI'] = request.headers['X-M2M-RVI']
+		resp.headers['Content-Disposition'] = 'attachment; filename=export.npz'
+		return resp
+
+
 	#########################################################################
 
 
@@ -244,7 +273,12 @@ class HttpServer(object):
 
 	#########################################################################
 
-	def _prepareResponse(self, request: Request, resource: Union[Resource, dict, str], returnCode: int, errorMessage: str) -> Response:
+	def _prepareResponse(self, request: Request, resource: Union[Resource, dict, str, Iterator[str]], returnCode: int, errorMessage: str) -> Response:
+		if isinstance(resource, Iterator) and errorMessage is None:
+			# A streamed result (e.g. of a discovery). It has no Content-Length and is sent in
+			# chunks (chunked transfer encoding with HTTP/1.1) while it is produced
+			Logging.logDebug('<== Response (RSC: %d): streamed' % returnCode)
+			return self._setResponseHeaders(request, Response(self._streamResponse(resource)), returnCode)
 		if isinstance(resource, Resource):
 			r = json.dumps(resource.asJSON())
 		elif errorMessage is not None:
@@ -262,20 +296,36 @@ class HttpServer(object):
 			# 	r = ''
 			# 	returnCode = C.rcNotFound
 		Logging.logDebug('<== Response (RSC: %d):\n%s\n' % (returnCode, str(r)))
-		resp = make_response(r)
+		return self._setResponseHeaders(request, make_response(r), returnCode)
+
 
-		# headers
+	def _setResponseHeaders(self, request: Request, resp: Response, returnCode: int) -> Response:
 		resp.headers['X-M2M-RSC'] = str(returnCode)
 		if 'X-M2M-RI' in request.headers:
 			resp.headers['X-M2M-RI'] = request.headers['X-M2M-RI']
 		if 'X-M2M-RVI' in request.headers:
 			resp.headers['X-M2M-RVI'] = request.headers['X-M2M-RVI']
+		if (token := request.environ.get(C.envContinuationToken)) is not None:	# partial discovery result
+			resp.headers[C.hfContentStatus] = C.hfvContentStatusPartial
+			resp.headers[C.hfContinuationToken] = token
 
 		resp.status_code = self._statusCode(returnCode)
 		resp.content_type = C.hfvContentType
 		return resp
 
 
+	def _streamResponse(self, chunks: Iterator[str]) -> Iterator[bytes]:
+		""" Encode the chunks of a streamed response. The status and the headers are
+			already sent when a chunk fails, so an error can only be logged and the
+			response is cut short.
+		"""
+		try:
+			for chunk in chunks:
+				yield chunk.encode('utf-8')
+		except Exception:
+			Logging.logErr('Exception while streaming response: %s' % traceback.format_exc())
+
+
 	def _prepareException(self, e: Exception) -> Tuple[None, int, str]:
 		return None, C.rcInternalServerError, 'encountered exception: %s' % traceback.format_exc().replace('"', '\\"').replace('\n', '\\n')
 
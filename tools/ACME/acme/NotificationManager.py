@@ -108,6 +108,32 @@ class NotificationManager(object):
 
 	#########################################################################
 
+	def checkChildSubscriptions(self, resource: Resource, reason: int, childResources: List[Resource]) -> None:
+		"""	Check the subscriptions of a resource for multiple child resources at once,
+			e.g. for removed instances. The subscriptions are only retrieved once, and
+			each notification target receives a single (aggregated) notification.
+		"""
+		if not Configuration.get('cse.enableNotifications') or len(childResources) == 0:
+			return
+
+		if Utils.isVirtualResource(resource):
+			return 
+
+		subs = CSE.storage.getSubscriptionsForParent(resource.ri)
+		if subs is None or len(subs) == 0:
+			return
+
+		Logging.logDebug('Checking subscription for: %s, reason: %d, children: %d' % (resource.ri, reason, len(childResources)))
+		for sub in subs:
+			if reason not in sub['net']:	# check whether reason is actually included in the subscription
+				continue
+			for nu in self._getNotificationURLs(sub['nus']):
+				if len(childResources) == 1:
+					self._sendNotification(sub['ri'], nu, reason, childResources[0])
+				else:
+					self._sendAggregatedNotification(sub['ri'], nu, reason, childResources)
+
+
 	# Return resolved notification URLs, so also POA from referenced AE's etc
 	def _getNotificationURLs(self, nus: Union[List[str], str], originator: str = None) -> List[str]:
 		if nus is None:
@@ -224,6 +250,25 @@ class NotificationManager(object):
 		return self._sendRequest(nu, ri, notificationRequest, reason, resource)
 
 
+	def _sendAggregatedNotification(self, ri: str, nu: str, reason: int, resources: List[Resource]) -> bool:
+		""" Send the notifications for multiple resources in a single aggregated notification. """
+		Logging.logDebug('Sending aggregated notification to: %s, reason: %d, notifications: %d' % (nu, reason, len(resources)))
+
+		notificationRequest = {
+			'm2m:agn' : {
+				'm2m:sgn' : [ {	'nev' : {
+									'rep' : resource.asJSON(),
+									'net' : reason
+								},
+								'sur' : Utils.fullRI(ri)
+							  } for resource in resources ]
+			}
+		}
+
+		_, rc, _ = CSE.httpServer.sendCreateRequest(nu, Configuration.get('cse.csi'), data=json.dumps(notificationRequest))
+		return rc in [C.rcOK]
+
+
 	def _sendRequest(self, nu: str, ri: str, jsn: dict, reason: int = None, resource: Resource = None, originator: str = None) -> bool:
 		Utils.setXPath(jsn, 'm2m:sgn/sur', Utils.fullRI(ri))
 
@@ -0,0 +1,158 @@
+#
+#	RetentionManager.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Managing entity for the retention policies of containers. The numeric
+#	<contentInstance> resources of a container with a retention policy are
+#	periodically downsampled: older instances are replaced by summary instances
+#	that contain the average of the instances of a time interval.
+#
+
+import math
+from typing import Dict, List, Tuple
+from Configuration import Configuration
+from Constants import Constants as C
+from Logging import Logging
+import CSE, Utils
+from helpers import BackgroundWorker
+from resources.CNT_AGG import numericValues
+from resources.Resource import Resource
+
+
+class RetentionManager(object):
+
+	labelRetention		= 'acme:retention='		# assigns a policy (name or stages) to a container
+	labelDownsampled	= 'acme:downsampled='	# interval of a summary instance
+	labelCount			= 'acme:count='			# number of instances that are averaged by a summary instance
+
+	maxReplacements		= 1000					# max number of instances that are replaced at once
+
+
+	def __init__(self) -> None:
+		self.policies = Configuration.get('cse.cnt.retentionPolicies')
+		self.worker: BackgroundWorker.BackgroundWorker = None
+		if (iv := Configuration.get('cse.cnt.retentionInterval')) > 0:
+			Logging.log('Starting retention worker')
+			self.worker = BackgroundWorker.BackgroundWorker(iv, self.retentionWorker, 'retentionWorker')
+			self.worker.start()
+		Logging.log('RetentionManager initialized')
+
+
+	def shutdown(self) -> None:
+		if self.worker is not None:
+			self.worker.stop()
+		Logging.log('RetentionManager shut down')
+
+
+	#########################################################################
+
+
+	def retentionWorker(self) -> bool:
+		for jsn in CSE.storage.retrieveResourcesByType(C.tCNT):
+			if (stages := self.containerStages(jsn)) is None:
+				continue
+			if (container := CSE.storage.retrieveResource(ri=jsn['ri'])[0]) is None:	# removed in the meantime
+				continue
+			try:
+				self.downsampleContainer(container, stages)
+			except Exception as e:
+				Logging.logErr('Error downsampling container: %s: %s' % (container.ri, str(e)))
+		return True
+
+
+	def containerStages(self, jsn: dict) -> List[Tuple[int, int]]:
+		""" Return the retention stages of a container, or None if it has no (valid) policy. """
+		for lbl in jsn.get('lbl') or []:
+			if isinstance(lbl, str) and lbl.startswith(self.labelRetention):
+				value = lbl[len(self.labelRetention):]
+				if (stages := self.policies.get(value.lower())) is None and (stages := Utils.parseRetentionStages(value)) is None:
+					Logging.logDebug('Unknown retention policy for container: %s: %s' % (jsn['ri'], value))
+				return stages
+		return None
+
+
+	def downsampleContainer(self, container: Resource, stages: List[Tuple[int, int]]) -> None:
+		"""	Downsample the instances of a container. The stages with the oldest instances
+			are handled first, so that instances are not downsampled more than once.
+		"""
+		for age, interval in reversed(stages):
+			cutoff = math.floor(Utils.fromISO8601Date(Utils.getResourceDate(-age)))
+			buckets: Dict[int, List[Tuple[str, float, int, str, int]]] = {}	# interval start -> [ (ri, value, count, ct, st) ]
+			replacements = 0
+			for documents in CSE.storage.instanceDocuments(container.ri, before=Utils.toISO8601Date(float(cutoff))):
+				for jsn in documents:
+					if (ct := Utils.fromISO8601Date(jsn.get('ct', ''))) is None:
+						continue
+					if (start := int(ct // interval) * interval) + interval > cutoff:	# the interval isn't complete yet
+						continue
+					if len(values := numericValues([ jsn.get('con') ])) == 0:	# only numeric instances are downsampled
+						continue
+					downsampled, count = self._summaryAttributes(jsn)
+					if downsampled >= interval:		# already downsampled enough
+						continue
+					buckets.setdefault(start, []).append((jsn['ri'], values[0], count, jsn['ct'], jsn.get('st', 0)))
+					replacements += 1
+				if replacements >= self.maxReplacements:
+					# The latest interval might continue in the next documents
+					latest = max(buckets)
+					entries = buckets.pop(latest)
+					container = self._replaceInstances(container, buckets, interval)
+					buckets, replacements = { latest : entries }, len(entries)
+			if replacements > 0:
+				container = self._replaceInstances(container, buckets, interval)
+
+
+	def _summaryAttributes(self, jsn: dict) -> Tuple[int, int]:
+		""" Return the interval and the number of instances of a summary instance, or (0, 1)
+			for other instances.
+		"""
+		downsampled, count = 0, 1
+		for lbl in jsn.get('lbl') or []:
+			if not isinstance(lbl, str):
+				continue
+			try:
+				if lbl.startswith(self.labelDownsampled):
+					downsampled = int(lbl[len(self.labelDownsampled):])
+				elif lbl.startswith(self.labelCount):
+					count = int(lbl[len(self.labelCount):])
+			except ValueError:
+				pass
+		return downsampled, count
+
+
+	def _replaceInstances(self, container: Resource, buckets: Dict[int, List[Tuple[str, float, int, str, int]]], interval: int) -> Resource:
+		"""	Replace the instances of each interval by a summary instance with their
+			(weighted) average. Return the updated container. A summary gets the ct and
+			st of the oldest instance it replaces, and its lt is its ct (instances are
+			never modified), so that ct, lt and st keep the same order for all the
+			instances of the container, and the summary stays in its interval.
+		"""
+		originator = Configuration.get('cse.originator')
+		summaries = []
+		ris = []
+		for entries in buckets.values():
+			count = sum(c for _, _, c, _, _ in entries)
+			average = math.fsum(v * c for _, v, c, _, _ in entries) / count
+			_, _, _, ct, st = min(entries, key=lambda e: (e[3], e[4]))		# the oldest instance
+			summary, _ = Utils.resourceFromJSON({ C.tsCIN : { 'con' : str(average), 'lbl' : [ '%s%d' % (self.labelDownsampled, interval), '%s%d' % (self.labelCount, count) ] } }, pi=container.ri, ty=C.tCIN)
+			summary[summary._srn] = Utils.structuredPath(summary)
+			if not (res := summary.activate(container, originator))[0]:
+				Logging.logWarn('Cannot create summary instance for container: %s: %s' % (container.ri, res[2]))
+				continue
+			summary['ct'] = summary['lt'] = ct
+			summary['st'] = st
+			summaries.append(summary)
+			ris.extend(ri for ri, _, _, _, _ in entries)
+		if len(summaries) == 0:
+			return container
+		Logging.logDebug('Downsampling %d instances to %d instances of container: %s' % (len(ris), len(summaries), container.ri))
+
+		# Write the summaries before the instances are removed, and validate the container only once
+		CSE.storage.createResources(summaries)
+		CSE.dispatcher.evictInstances(container, ris)
+		container, _, _ = container.dbReload()
+		container.childrenAdded(summaries, originator)
+		CSE.event.createResource.callForEach(summaries)	# type: ignore
+		return container
@@ -29,6 +29,8 @@ logWarnings			= 'lgWrn'
 cseStartUpTime		= 'cseSU'
 cseUpTime			= 'cseUT'
 resourceCount		= 'ctRes'
+resourceCacheHits	= 'rcHit'
+resourceCacheMisses	= 'rcMis'
 
 # TODO startup, uptime, restartcount, errors, warnings
 
@@ -97,6 +99,7 @@ class Statistics(object):
 		s[cseUpTime] = str(datetime.timedelta(seconds=int(datetime.datetime.utcnow().timestamp() - s[cseStartUpTime])))
 		s[cseStartUpTime] = Utils.toISO8601Date(s[cseStartUpTime])
 		s[resourceCount] = s[createdResources] - s[deletedResources]
+		s[resourceCacheHits], s[resourceCacheMisses] = CSE.storage.resourceCacheStatistics()
 		return s
 
 
@@ -4,26 +4,29 @@
 #	(c) 2020 by Andreas Kraft
 #	License: BSD 3-Clause License. See the LICENSE file for further details.
 #
-#	Store, retrieve and manage resources in the database. It currently relies on
-#	the document database TinyDB. It is possible to store resources either on disc
-#	or just in memory.
+#	Store, retrieve and manage resources in the database. The actual database
+#	access is done by a binding that implements the DBBinding interface. It
+#	currently supports the document database TinyDB and SQLite. It is possible
+#	to store resources either on disc or just in memory.
 #
 
-from tinydb import TinyDB, Query, where 		# type: ignore
-from tinydb.storages import MemoryStorage		# type: ignore
-from tinydb.operations import delete 			# type: ignore
+from tinydb import TinyDB, Query 				# type: ignore
+from tinydb.table import Table 					# type: ignore
 # TODO remove mypy type checking supressions above as soon as tinydb provides typing stubs
 # from tinydb_smartcache import SmartCacheTable # TODO Not compatible with TinyDB 4 yet
 
-import os, json, re
-from typing import Tuple, List, Callable, Any
-from threading import Lock
+import os, json, sqlite3, sys, time, heapq, bisect, itertools
+from collections import OrderedDict
+from typing import Tuple, List, Dict, Set, Callable, Union, Any, Iterable, Iterator
+from threading import Condition, Lock, Thread, local
+from queue import Queue
 from Configuration import Configuration
 from Constants import Constants as C
 from Logging import Logging
 from resources.Resource import Resource
 import CSE, Utils
-from helpers import BackgroundWorker
+from helpers import BackgroundWorker, WALStorage
+from helpers.ReadWriteLock import ReadWriteLock, ReadRWLock, WriteRWLock
 
 
 class Storage(object):
@@ -41,18 +44,96 @@ class Storage(object):
 				Logging.logErr('db.path not set')
 				raise RuntimeError('db.path not set')
 
-		self.db = TinyDBBinding(path)
+		# Select the database binding
+		dbType = Configuration.get('db.type')
+		if dbType == 'tinydb':
+			self.db: DBBinding = TinyDBBinding(path)
+		elif dbType == 'sqlite':
+			self.db = SQLiteBinding(path)
+		else:
+			Logging.logErr('Unknown database type: %s' % dbType)
+			raise RuntimeError('Unknown database type: %s' % dbType)
 		self.db.openDB()
 
 		# Reset dbs?
 		if Configuration.get('db.resetAtStartup') is True:
 			self.db.purgeDB()
 
+		# Index of the structured paths. This is used for (almost) every request,
+		# so it is kept in memory, independent of the database binding. The
+		# resource types are indexed as well, for planning discoveries. For the same
+		# reason the structured paths of all resources except instances are kept
+		# sorted, so that the resources below a resource are found by a binary search.
+		self.structuredPathLock = Lock()
+		self.risBySRN: Dict[str, str] = {}		# srn -> ri
+		self.srnsByRI: Dict[str, str] = {}		# ri -> srn
+		self.tysByRI: Dict[str, int] = {}		# ri -> ty
+		self.risByTY: Dict[int, Set[str]] = {}	# ty -> ri
+		self.sortedSRNs: List[str] = []			# srn of all resources except instances, sorted
+		self.rebuildStructuredPathIndex()
+
+		# Index of the <contentInstance> and <flexContainerInstance> resources of
+		# each container, ordered by their creation time (oldest first). The
+		# number of instances and their total size is maintained incrementally.
+		self.instanceLock = Lock()
+		self.instancesByPI: Dict[str, InstanceList] = {}				# pi -> (ct, ri, cs)
+		self.instanceSizes: Dict[str, int] = {}							# pi -> sum of cs
+		self.instanceParents: Dict[str, str] = {}						# ri -> pi
+		self.rebuildInstanceIndex()
+
+		# Inverted index of the labels, for discoveries by label
+		self.labelLock = Lock()
+		self.risByLabel: Dict[str, Set[str]] = {}	# label -> ri
+		self.labelsByRI: Dict[str, Set[str]] = {}	# ri -> labels
+		self.rebuildLabelIndex()
+
+		# LRU cache for resource objects, indexed by ri
+		self.resourceCacheSize = Configuration.get('db.resourceCacheSize')
+		self.resourceCache: Dict[str, Resource] = OrderedDict()
+		self.resourceCacheLock = Lock()
+		self.resourceCacheHits = 0
+		self.resourceCacheMisses = 0
+		self.resourceCacheGeneration = 0	# incremented with every invalidation
+		Logging.log('Resource cache size: %d' % self.resourceCacheSize)
+
+		# Per-thread unit of work that buffers resource updates
+		self.unitOfWork = local()
+
+		# Resources that are ingested asynchronously, and the resources that were
+		# updated while they were waiting to be written. They are written in batches
+		# by the ingestion writer. Until then they are served from here.
+		self.ingestionLock = Lock()
+		self.ingestionSpace = Condition(self.ingestionLock)	# notified when pending resources were written
+		self.pendingResources: Dict[str, Tuple[Resource, Set[str], bool]] = {}	# ri -> (resource, nullified attributes, isNew)
+		self.ingestionQueue: Queue = Queue()	# ri of pending resources
+		self.ingestionQueueSize = Configuration.get('db.ingestionQueueSize')
+		self.ingestionBatchSize = Configuration.get('db.ingestionBatchSize')
+		self.ingestionWriter: Thread = None
+		if len(Configuration.get('cse.cnt.asyncIngestion')) > 0:
+			Logging.log('Starting ingestion writer')
+			self.ingestionWriter = Thread(target=self.ingestionWriterLoop, name='ingestionWriter', daemon=True)
+			self.ingestionWriter.start()
+
+		# Index of expiration times and of containers with a maxInstanceAge.
+		# Entries in the heap are removed lazily: an entry is only valid if it
+		# matches the resource's current et in expirationTimes.
+		self.expirationLock = Lock()
+		self.expirationHeap: List[Tuple[str, str]] = []	# (et, ri)
+		self.expirationTimes: Dict[str, str] = {}		# ri -> et
+		self.miaContainers: Dict[str, int] = {}		# ri -> mia
+		self.expirationWorker: BackgroundWorker.BackgroundWorker = None
+		self.rebuildExpirationIndex()
+
 		# Start background worker to handle expired resources
 		Logging.log('Starting expiration worker')
 		if (iv := Configuration.get('cse.checkExpirationsInterval')) > 0:
 			self.expirationWorker = BackgroundWorker.BackgroundWorker(iv, self.expirationDBWorker, 'expirationDBWorker')
 			self.expirationWorker.start()
+			self._scheduleExpirationWorker()
+
+		# Re-count the instances of all containers, if requested
+		if Configuration.get('db.repairAtStartup') is True:
+			self.repairInstanceTotals()
 
 		Logging.log('Storage initialized')
 
@@ -63,6 +144,15 @@ class Storage(object):
 		if self.expirationWorker is not None:
 			self.expirationWorker.stop()
 
+		# Write the pending resources and stop the ingestion writer
+		if self.ingestionWriter is not None:
+			Logging.log('Stopping ingestion writer')
+			self.ingestionQueue.put(None)
+			self.ingestionWriter.join()
+
+		hits, misses = self.resourceCacheStatistics()
+		Logging.log('Resource cache hits: %d, misses: %d' % (hits, misses))
+
 		self.db.closeDB()
 		Logging.log('Storage shut down')
 
@@ -85,6 +175,8 @@ class Storage(object):
 		srn = resource.__srn__
 		if overwrite:
 			Logging.logDebug('Resource enforced overwrite')
+			if (updates := self._unitOfWorkUpdates()) is not None:
+				updates.pop(ri, None)	# the resource is completely overwritten
 			self.db.upsertResource(resource)
 		else: 
 			# if not self.db.hasResource(ri=ri) and not self.db.hasResource(srn=srn):	# Only when not resource does not exist yet
@@ -96,20 +188,52 @@ class Storage(object):
 
 		# Add path to identifiers db
 		self.db.insertIdentifier(resource, ri, srn)
+		self._indexStructuredPath(ri, srn, resource.ty)
+		self._invalidateCachedResource(ri)	# in case it was overwritten
+		self._indexInstance(resource)
+		self._indexExpiration(resource)
+		self._indexLabels(resource)
+		return True, C.rcCreated, None
+
+
+	def createResources(self, resources: List[Resource]) -> Tuple[bool, int, str]:
+		""" Add multiple new resources in one batch. The caller must make sure that
+			they don't exist yet.
+		"""
+		self.db.insertResources(resources)
+		self.db.insertIdentifiers(resources)
+		for resource in resources:
+			self._indexStructuredPath(resource.ri, resource.__srn__, resource.ty)
+			self._indexInstance(resource)
+			self._indexExpiration(resource)
+			self._indexLabels(resource)
 		return True, C.rcCreated, None
 
 
 	# Check whether a resource with either the ri or the srn already exists
 	def hasResource(self, ri: str, srn: str) -> bool:
-		return self.db.hasResource(ri=ri) or self.db.hasResource(srn=srn)
+		return ri in self.pendingResources or self.db.hasResource(ri=ri) or self.riFromStructuredPath(srn) is not None
 
 
 	def retrieveResource(self, ri: str = None, csi: str = None, srn: str = None) -> Tuple[Resource, int, str]:
 		""" Return a resource via different addressing methods. """
 		resources = []
 
+		updates = self._unitOfWorkUpdates()
+		if ri is None and srn is not None and (self.resourceCacheSize > 0 or updates or self.pendingResources):
+			# Resolve the srn first to make use of the resource cache and the unit of work
+			if (ri := self.riFromStructuredPath(srn)) is None:
+				return None, C.rcNotFound, None
+
+		generation = self.resourceCacheGeneration
 		if ri is not None:		# get a resource by its ri
 			# Logging.logDebug('Retrieving resource ri: %s' % ri)
+			if updates and ri in updates:	# updated in the current unit of work
+				return updates[ri][0].clone(), C.rcOK, None
+			if (pending := self.pendingResources.get(ri)) is not None:	# not written yet
+				return pending[0].clone(), C.rcOK, None
+			if (resource := self._cachedResource(ri)) is not None:
+				return resource, C.rcOK, None
 			resources = self.db.searchResources(ri=ri)
 
 		elif srn is not None:	# get a resource by its structured rn
@@ -123,8 +247,9 @@ class Storage(object):
 
 		# return Utils.resourceFromJSON(resources[0]) if len(resources) == 1 else None,
 		if (l := len(resources)) == 1:
-			r, _ = Utils.resourceFromJSON(resources[0])
-			return r, C.rcOK, None
+			resource = Utils.resourceFromDB(resources[0])
+			self._cacheResource(resource, generation)
+			return resource, C.rcOK, None
 		elif l == 0:
 			return None, C.rcNotFound, None
 	
@@ -140,50 +265,34 @@ class Storage(object):
 
 
 
-	# def discoverResources(self, rootResource, handling, conditions, attributes, fo):
-	# 	# preparations
-	# 	rootSRN = rootResource.__srn__
-	# 	handling['__returned__'] = 0
-	# 	handling['__matched__'] = 0
-	# 	if 'lvl' in handling:
-	# 		handling['__lvl__'] = rootSRN.count('/') + handling['lvl']
-
-	# 	# a bit of optimization. This length stays the same.
-	# 	allLen = ((len(conditions) if conditions is not None else 0) +
-	# 	  (len(attributes) if attributes is not None else 0) +
-	# 	  (len(conditions['ty']) if conditions is not None else 0) - 1 +
-	# 	  (len(conditions['cty']) if conditions is not None else 0) - 1 
-	# 	 )
-
-	# 	rs = self.db.discoverResources(lambda r: _testDiscovery(self,
-	# 															r,
-	# 															rootSRN,
-	# 															handling,
-	# 															conditions,
-	# 															attributes,
-	# 															fo,
-	# 															handling['lim'] if 'lim' in handling else None,
-	# 															handling['ofst'] if 'ofst' in handling else None,
-	# 															allLen))
-		
-	# 	# transform JSONs to resources
-	# 	result = []
-	# 	for r in rs:
-	# 		result.append(Utils.resourceFromJSON(r))
-
-	# 	# sort resources by type and then by lowercase rn
-	# 	if Configuration.get('cse.sortDiscoveredResources'):
-	# 		result.sort(key=lambda x:(x.ty, x.rn.lower()))
-	# 	return result
-
-
 	def updateResource(self, resource: Resource) -> Tuple[Resource, int, str]:
 		if resource is None:
 			Logging.logErr('resource is None')
 			raise RuntimeError('resource is None')
 		ri = resource.ri
 		# Logging.logDebug('Updating resource (ty: %d, ri: %s, rn: %s)' % (resource['ty'], ri, resource['rn']))
-		resource = self.db.updateResource(resource)
+		if (updates := self._unitOfWorkUpdates()) is not None:
+			# Buffer the update until the unit of work is committed. Nullified
+			# attributes are removed from the resource now, but only from the DB later
+			nullified = { k for k, v in resource.json.items() if v is None }
+			for k in nullified:
+				del resource.json[k]
+			if (previous := updates.get(ri)) is not None:
+				nullified |= previous[1] - resource.json.keys()
+			updates[ri] = (resource.clone(), nullified)
+			self._indexExpiration(resource)
+			self._indexInstance(resource)
+			self._indexLabels(resource)
+			return resource, C.rcUpdated, None
+		if self._updatePendingResource(resource, set()):
+			for k in [ k for k, v in resource.json.items() if v is None ]:
+				del resource.json[k]
+		else:
+			resource = self.db.updateResource(resource)
+		self._invalidateCachedResource(ri)
+		self._indexExpiration(resource)
+		self._indexInstance(resource)
+		self._indexLabels(resource)
 		return resource, C.rcUpdated, None
 
 
@@ -192,12 +301,49 @@ class Storage(object):
 			Logging.logErr('resource is None')
 			raise RuntimeError('resource is None')
 		# Logging.logDebug('Removing resource (ty: %d, ri: %s, rn: %s)' % (resource['ty'], ri, resource['rn']))
+		if (updates := self._unitOfWorkUpdates()) is not None:
+			updates.pop(resource.ri, None)
+		self._removePendingResources([ resource ])
 		self.db.deleteResource(resource)
 		self.db.deleteIdentifier(resource)
+		self._unindexStructuredPath(resource.ri)
+		self._invalidateCachedResource(resource.ri)
+		self._unindexExpiration(resource.ri)
+		self._unindexInstances([ resource ])
+		self._unindexLabels([ resource ])
 		return True, C.rcDeleted, None
 
 
 
+	def deleteResources(self, resources: List[Resource]) -> Tuple[bool, int, str]:
+		""" Delete multiple resources, e.g. a whole subtree, in one batch. """
+		if (updates := self._unitOfWorkUpdates()) is not None:
+			for resource in resources:
+				updates.pop(resource.ri, None)
+		self._removePendingResources(resources)
+		self.db.deleteResources(resources)
+		self.db.deleteIdentifiers(resources)
+		for resource in resources:
+			self._unindexStructuredPath(resource.ri)
+			self._invalidateCachedResource(resource.ri)
+			self._unindexExpiration(resource.ri)
+		self._unindexInstances(resources)
+		self._unindexLabels(resources)
+		return True, C.rcDeleted, None
+
+
+	def descendantResources(self, ri: str) -> List[Resource]:
+		""" Return all direct and indirect child resources of a resource. Parents
+			come before their children in the result.
+		"""
+		result = self.directChildResources(ri)
+		i = 0
+		while i < len(result):
+			result.extend(self.directChildResources(result[i].ri))
+			i += 1
+		return result
+
+
 	def directChildResources(self, pi: str, ty: int = None) -> List[Resource]:
 		rs = self.db.searchResources(pi=pi, ty=ty)
 
@@ -205,16 +351,64 @@ class Storage(object):
 		# 	rs = self.tabResources.search((Query().pi == pi) & (Query().ty == ty))
 		# else:
 		# 	rs = self.tabResources.search(Query().pi == pi)			
+		result = self._resourcesFromDB(rs)
+		# Add the ingested resources that are not written yet
+		if self.pendingResources:
+			with self.ingestionLock:
+				result.extend(resource.clone() for resource, _, isNew in self.pendingResources.values() if isNew and resource.pi == pi and (ty is None or resource.ty == ty))
+		return result
+
+
+	def childResourcesInTimeRange(self, pi: str, after: str = None, before: str = None) -> List[Resource]:
+		""" Return the direct child resources of a resource. Of its instances only those
+			are returned that were created after *after* and before *before*. They are
+			found in the instance index, so that the other instances are not read at all.
+		"""
+		result = self._resourcesFromDB(self.db.searchChildResources(pi, self.instanceTypes))
+		for ri in self.instancesInTimeRange(pi, after, before):
+			if (resource := self.retrieveResource(ri=ri)[0]) is not None:
+				result.append(resource)
+		return result
+
+
+	def _resourcesFromDB(self, rs: List[dict]) -> List[Resource]:
+		""" Return the resources for documents from the database, or their versions that
+			are updated in the current unit of work or are not written yet.
+		"""
+		updates = self._unitOfWorkUpdates()
 		result = []
 		for r in rs:
-			resource, _ = Utils.resourceFromJSON(r)
-			if resource is not None:
+			if updates and (update := updates.get(r['ri'])) is not None:	# updated in the current unit of work
+				result.append(update[0].clone())
+			elif (pending := self.pendingResources.get(r['ri'])) is not None:
+				result.append(pending[0].clone())
+			elif (resource := Utils.resourceFromDB(r)) is not None:
 				result.append(resource)
 		return result
 
 
+	def retrieveResourcesByRI(self, ris: List[str], chunkSize: int = 500) -> List[Resource]:
+		""" Return the resources with the given ri, in the same order. They are read from
+			the database in chunks. Resources that don't exist (anymore) are skipped.
+		"""
+		result = []
+		for i in range(0, len(ris), chunkSize):
+			chunk = ris[i:i + chunkSize]
+			documents = { jsn['ri'] : jsn for jsn in self.db.searchResourcesByRI([ ri for ri in chunk if ri not in self.pendingResources ]) }
+			rs = []
+			for ri in chunk:
+				if (jsn := documents.get(ri)) is None and (pending := self.pendingResources.get(ri)) is not None:	# not written yet
+					jsn = pending[0].json
+				if jsn is not None:
+					rs.append(jsn)
+			result.extend(self._resourcesFromDB(rs))
+		return result
+
+
 	def countResources(self) -> int:
-		return self.db.countResources()
+		with self.ingestionLock:
+			pending = sum(1 for _, _, isNew in self.pendingResources.values() if isNew)
+		return self.db.countResources() + pending
 
 
 	def identifier(self, ri: str) -> List[dict]:
@@ -224,17 +418,621 @@ class Storage(object):
 		return self.db.searchIdentifiers(srn=srn)
 
 
+	def structuredPathFromRI(self, ri: str) -> str:
+		""" Return the structured path of a resource by its ri, or None. """
+		return self.srnsByRI.get(ri)
+
+
+	def riFromStructuredPath(self, srn: str) -> str:
+		""" Return the ri of a resource by its structured path, or None. """
+		return self.risBySRN.get(srn)
+
+
 	def searchByTypeFieldValue(self, ty: int, field: str, value: str) -> List[Resource]:
 		"""Search and return all resources of a specific type and a value in a field,
 		and return them in an array."""
 		result = []
 		for j in self.db.searchByTypeFieldValue(ty, field, value):
-			resource, _ = Utils.resourceFromJSON(j)
-			if resource is not None:
+			if (resource := Utils.resourceFromDB(j)) is not None:
 				result.append(resource)
 		return result
 
 
+	#########################################################################
+	##
+	##	Structured path index
+	##
+
+	def rebuildStructuredPathIndex(self) -> None:
+		""" Build the structured path index from the identifiers in the database. """
+		with self.structuredPathLock:
+			self.risBySRN = {}
+			self.srnsByRI = {}
+			self.tysByRI = {}
+			self.risByTY = {}
+			for identifier in self.db.allIdentifiers():
+				self.risBySRN[identifier['srn']] = identifier['ri']
+				self.srnsByRI[identifier['ri']] = identifier['srn']
+				if (ty := identifier.get('ty')) is not None:
+					self.tysByRI[identifier['ri']] = ty
+					self.risByTY.setdefault(ty, set()).add(identifier['ri'])
+			self.sortedSRNs = sorted(srn for ri, srn in self.srnsByRI.items() if self.tysByRI.get(ri) not in self.instanceTypes)
+		Logging.log('Structured path index built (paths: %d)' % len(self.srnsByRI))
+
+
+	def _indexStructuredPath(self, ri: str, srn: str, ty: int) -> None:
+		# Lookups don't lock. Single dictionary operations are atomic
+		with self.structuredPathLock:
+			if (previous := self.srnsByRI.get(ri)) is not None and previous != srn and self.risBySRN.get(previous) == ri:
+				del self.risBySRN[previous]
+				self._removeSortedSRN(previous)
+			self.srnsByRI[ri] = srn
+			self.risBySRN[srn] = ri
+			if (previousTY := self.tysByRI.get(ri)) is not None and previousTY != ty:
+				self.risByTY[previousTY].discard(ri)
+			self.tysByRI[ri] = ty
+			self.risByTY.setdefault(ty, set()).add(ri)
+			if ty not in self.instanceTypes:
+				if (i := bisect.bisect_left(self.sortedSRNs, srn)) == len(self.sortedSRNs) or self.sortedSRNs[i] != srn:
+					self.sortedSRNs.insert(i, srn)
+			else:
+				self._removeSortedSRN(srn)
+
+
+	def _unindexStructuredPath(self, ri: str) -> None:
+		with self.structuredPathLock:
+			if (srn := self.srnsByRI.pop(ri, None)) is not None and self.risBySRN.get(srn) == ri:
+				del self.risBySRN[srn]
+				self._removeSortedSRN(srn)
+			if (ty := self.tysByRI.pop(ri, None)) is not None:
+				self.risByTY[ty].discard(ri)
+
+
+	def _removeSortedSRN(self, srn: str) -> None:
+		""" Must be called while holding the structured path lock. """
+		if (i := bisect.bisect_left(self.sortedSRNs, srn)) < len(self.sortedSRNs) and self.sortedSRNs[i] == srn:
+			del self.sortedSRNs[i]
+
+
+	def resourcesOfTypes(self, tys: List[int], srn: str = None, level: int = sys.maxsize) -> Set[str]:
+		""" Return the ri of the resources of the types *tys*, which must not be instance types.
+			If a structured path *srn* is given then the result contains at least the resources
+			below it, down to *level* levels (1 = direct children), but might contain others.
+			These are either taken from the sorted structured paths or from the type index,
+			whichever holds fewer resources.
+		"""
+		with self.structuredPathLock:
+			if srn is not None:
+				# All paths that start with "<srn>/" are sorted between "<srn>/" and "<srn>0"
+				start = bisect.bisect_left(self.sortedSRNs, srn + '/')
+				end = bisect.bisect_left(self.sortedSRNs, srn + '0', start)
+				if end - start < sum(len(self.risByTY.get(ty, ())) for ty in tys):
+					depth = srn.count('/') + level
+					return { ri for s in itertools.islice(self.sortedSRNs, start, end) if s.count('/') <= depth and self.tysByRI.get(ri := self.risBySRN[s]) in tys }
+			return set().union(*(self.risByTY.get(ty, ()) for ty in tys))
+
+
+	def descendantsInIndex(self, srn: str, ris: Set[str], level: int, after: str = None, before: str = None, cursor: List[str] = None) -> List[str]:
+		""" Return those of the *ris* that are below the structured path *srn*, down to
+			*level* levels (1 = direct children), ordered by the segments of their structured
+			paths. Of the instances only those are returned that were created after *after*
+			and before *before*. If a *cursor* (the segments of a structured path) is given,
+			only the resources after it are returned. The resources are found in the indexes,
+			without reading them.
+		"""
+		prefix = srn + '/'
+		depth = srn.count('/') + level
+		checkRange = after is not None or before is not None
+		inRange: Dict[str, Set[str]] = {}	# pi -> ri of the instances in the time range
+		result = []
+		for ri in ris:
+			if (s := self.srnsByRI.get(ri)) is None or not s.startswith(prefix) or s.count('/') > depth:
+				continue
+			if checkRange and (pi := self.instanceParents.get(ri)) is not None:
+				if pi not in inRange:
+					inRange[pi] = set(self.instancesInTimeRange(pi, after, before))
+				if ri not in inRange[pi]:
+					continue
+			path = s.split('/')
+			if cursor is not None and path <= cursor:
+				continue
+			result.append((path, ri))
+		result.sort()
+		return [ ri for _, ri in result ]
+
+
+	#########################################################################
+	##
+	##	Label index
+	##
+
+	def rebuildLabelIndex(self) -> None:
+		""" Build the label index from the resources in the database. """
+		rs = self.db.discoverResources(lambda r: r.get('lbl'))
+		with self.labelLock:
+			self.labelsByRI = {}
+			self.risByLabel = {}
+			for r in rs:
+				self._indexLabelAttribute(r['ri'], r.get('lbl'))
+		Logging.log('Label index built (labels: %d, resources: %d)' % (len(self.risByLabel), len(self.labelsByRI)))
+
+
+	def resourcesWithLabels(self, lbls: List[str]) -> Set[str]:
+		""" Return the ri of the resources that have at least one of the labels *lbls*. """
+		with self.labelLock:
+			return set().union(*(self.risByLabel.get(l, ()) for l in lbls))
+
+
+	def _indexLabels(self, resource: Resource) -> None:
+		""" Add or update the label index entries of a resource. """
+		with self.labelLock:
+			self._indexLabelAttribute(resource.ri, resource.lbl)
+
+
+	def _unindexLabels(self, resources: List[Resource]) -> None:
+		with self.labelLock:
+			for resource in resources:
+				self._indexLabelAttribute(resource.ri, None)
+
+
+	def _indexLabelAttribute(self, ri: str, lbl: List[str]) -> None:
+		""" Must be called while holding the label lock. """
+		labels = { l for l in lbl if isinstance(l, str) } if isinstance(lbl, list) else set()
+		previous = self.labelsByRI.pop(ri, set())
+		for l in previous - labels:
+			if (ris := self.risByLabel.get(l)) is not None:
+				ris.discard(ri)
+				if len(ris) == 0:
+					del self.risByLabel[l]
+		for l in labels - previous:
+			self.risByLabel.setdefault(l, set()).add(ri)
+		if len(labels) > 0:
+			self.labelsByRI[ri] = labels
+
+
+	#########################################################################
+	##
+	##	Instance index
+	##
+
+	instanceTypes = [ C.tCIN, C.tFCI ]
+
+
+	def instanceTotals(self, pi: str) -> Tuple[int, int]:
+		""" Return the number of instances of a container and their total size. """
+		with self.instanceLock:
+			return len(self.instancesByPI.get(pi, [])), self.instanceSizes.get(pi, 0)
+
+
+	def instanceEntries(self, pi: str) -> List[Tuple[str, str, int]]:
+		""" Return the (ct, ri, cs) entries of the instances of a container, oldest first. """
+		with self.instanceLock:
+			return list(self.instancesByPI.get(pi, []))
+
+
+	def instancesExceedingLimits(self, pi: str, mni: int, mbs: int, mia: int = None) -> List[str]:
+		""" Return the ri of the oldest instances of a container that must be removed, so
+			that at most *mni* instances with a total size of at most *mbs* remain, and
+			none is older than *mia* seconds. A limit that is None is ignored.
+		"""
+		result = []
+		oldest = Utils.getResourceDate(-mia) if mia is not None else None
+		with self.instanceLock:
+			if (instances := self.instancesByPI.get(pi)) is None:
+				return result
+			cni = len(instances)
+			cbs = self.instanceSizes[pi]
+			for ct, ri, cs in instances:
+				if not ((mni is not None and cni > mni) or (mbs is not None and cbs > mbs) or (oldest is not None and ct < oldest)):
+					break
+				result.append(ri)
+				cni -= 1
+				cbs -= cs
+		return result
+
+
+	def instancesInTimeRange(self, pi: str, after: str = None, before: str = None) -> List[str]:
+		""" Return the ri of the instances of a container that were created after *after*
+			and before *before*, oldest first. A limit that is None is ignored.
+		"""
+		with self.instanceLock:
+			if (instances := self.instancesByPI.get(pi)) is None:
+				return []
+			# Binary search on the (ct, ri, cs) entries. An entry with ct == after is
+			# smaller than (after, <max char>), and one with ct == before is larger than (before,)
+			start = instances.bisectRight((after, '\U0010ffff')) if after is not None else 0
+			end = instances.bisectLeft((before,)) if before is not None else len(instances)
+			return [ ri for _, ri, _ in instances.slice(start, end) ]
+
+
+	def instancesBelow(self, ri: str, tys: List[int], level: int, after: str = None, before: str = None) -> Set[str]:
+		""" Return the ri of the instances of the types *tys* below the resource *ri*, down to
+			*level* levels (1 = direct children), that were created after *after* and before
+			*before*. The instances are taken from the instance index of the containers below
+			the resource, so instances of other containers are never looked at.
+		"""
+		containerTypes = [ cty for cty, ity in [ (C.tCNT, C.tCIN), (C.tFCNT, C.tFCI) ] if ity in tys ]
+		if level < 1 or len(containerTypes) == 0 or (srn := self.srnsByRI.get(ri)) is None:
+			return set()
+		containers = [ ri ] if self.tysByRI.get(ri) in containerTypes else []
+		if level > 1:	# instances of the containers further below, too
+			prefix = srn + '/'
+			depth = srn.count('/') + level - 1
+			containers.extend(cri for cri in self.resourcesOfTypes(containerTypes, srn, level - 1)
+								  if (s := self.srnsByRI.get(cri)) is not None and s.startswith(prefix) and s.count('/') <= depth)
+		return set().union(*(self.instancesInTimeRange(cri, after, before) for cri in containers))
+
+
+	def instanceAttributeValues(self, ris: List[str], attribute: str, chunkSize: int = 500) -> List[Any]:
+		""" Return the values of an attribute of the instances *ris* of a container,
+			in the order of *ris*. The values are read from the documents in the
+			database, without creating resources. Only the documents of *ris* are
+			read, *chunkSize* at a time.
+		"""
+		return [ jsn.get(attribute) for documents in self._instanceDocumentsByRI(ris, chunkSize) for jsn in documents ]
+
+
+	def instanceDocuments(self, pi: str, after: str = None, before: str = None, chunkSize: int = 500) -> Iterator[List[dict]]:
+		""" Return the documents of the instances of a container that were created after
+			*after* and before *before*, oldest first, in chunks of at most *chunkSize*
+			documents. Only one chunk is read from the database at a time. Instances
+			that are removed in the meantime are skipped. The documents must not be changed.
+		"""
+		return self._instanceDocumentsByRI(self.instancesInTimeRange(pi, after, before), chunkSize)
+
+
+	def _instanceDocumentsByRI(self, ris: List[str], chunkSize: int) -> Iterator[List[dict]]:
+		for i in range(0, len(ris), chunkSize):
+			chunk = ris[i:i + chunkSize]
+			documents: Dict[str, dict] = {}
+			for ri in chunk:
+				if (pending := self.pendingResources.get(ri)) is not None:	# not written yet
+					documents[ri] = pending[0].json
+			for jsn in self.db.searchResourcesByRI([ ri for ri in chunk if ri not in documents ]):
+				documents[jsn['ri']] = jsn
+			yield [ documents[ri] for ri in chunk if ri in documents ]
+
+
+	def instances(self, pi: str) -> List[Resource]:
+		""" Return the instances of a container, oldest first. """
+		result = []
+		for _, ri, _ in self.instanceEntries(pi):
+			if (resource := self.retrieveResource(ri=ri)[0]) is not None:
+				result.append(resource)
+		return result
+
+
+	def oldestInstance(self, pi: str) -> Resource:
+		""" Return the oldest instance of a container, or None. """
+		with self.instanceLock:
+			if len(instances := self.instancesByPI.get(pi, [])) == 0:
+				return None
+			ri = instances[0][1]
+		return self.retrieveResource(ri=ri)[0]
+
+
+	def oldestInstanceCT(self, pi: str) -> str:
+		""" Return the creation time of the oldest instance of a container, or None. """
+		with self.instanceLock:
+			if len(instances := self.instancesByPI.get(pi, [])) == 0:
+				return None
+			return instances[0][0]
+
+
+	def latestInstance(self, pi: str) -> Resource:
+		""" Return the latest instance of a container, or None. """
+		with self.instanceLock:
+			if len(instances := self.instancesByPI.get(pi, [])) == 0:
+				return None
+			ri = instances[-1][1]
+		return self.retrieveResource(ri=ri)[0]
+
+
+	def rebuildInstanceIndex(self) -> None:
+		""" Build the instance index from the resources in the database. The
+			instance numbers and sizes are counted from scratch.
+		"""
+		with self.instanceLock:
+			self.instancesByPI = {}
+			self.instanceSizes = {}
+			self.instanceParents = {}
+			rs = [ jsn for ty in self.instanceTypes for jsn in self.db.searchResources(ty=ty) ]
+			for jsn in sorted(rs, key=lambda jsn: jsn.get('ct', '')):
+				pi, cs = jsn['pi'], jsn.get('cs') or 0
+				self.instancesByPI.setdefault(pi, InstanceList()).append((jsn.get('ct', ''), jsn['ri'], cs))
+				self.instanceSizes[pi] = self.instanceSizes.get(pi, 0) + cs
+				self.instanceParents[jsn['ri']] = pi
+		Logging.log('Instance index built (instances: %d)' % len(self.instanceParents))
+
+
+	def repairInstanceTotals(self) -> int:
+		""" Rebuild the instance index, and write the re-counted numbers and sizes of the
+			instances ("cni" and "cbs") to every <container> and <flexContainer> whose stored
+			values differ. Return the number of repaired resources.
+		"""
+		self.rebuildInstanceIndex()
+		repaired = 0
+		for ty in [ C.tCNT, C.tFCNT ]:
+			for jsn in self.db.searchResources(ty=ty):
+				resource = Utils.resourceFromDB(jsn)
+				cni, cbs = self.instanceTotals(resource.ri)
+				if ty == C.tCNT:
+					totals = { 'cni' : cni, 'cbs' : cbs }
+				else:	# a <flexContainer> only has the attributes when the respective limit is set
+					totals = { k : v for k, v, limit in [ ('cni', cni, 'mni'), ('cbs', cbs, 'mbs') ] if resource[limit] is not None }
+				if all(resource[k] == v for k, v in totals.items()):
+					continue
+				Logging.logWarn('Repairing instance totals of: %s (cni: %s -> %d, cbs: %s -> %d)' % (resource.ri, resource.cni, cni, resource.cbs, cbs))
+				for k, v in totals.items():
+					resource[k] = v
+				self.updateResource(resource)
+				repaired += 1
+		Logging.log('Instance totals repaired (resources: %d)' % repaired)
+		return repaired
+
+
+	def _indexInstance(self, resource: Resource) -> None:
+		""" Add an instance to the index, or update its entry. """
+		if resource.ty not in self.instanceTypes:
+			return
+		ri, pi = resource.ri, resource.pi
+		entry = (resource.ct or '', ri, resource.cs or 0)
+		with self.instanceLock:
+			instances = self.instancesByPI.setdefault(pi, InstanceList())
+			if ri in self.instanceParents:	# update the entry. Most likely it is one of the latest
+				for i in range(len(instances) - 1, -1, -1):
+					if instances[i][1] == ri:
+						self.instanceSizes[pi] += entry[2] - instances[i][2]
+						instances[i] = entry
+						return
+			self.instanceParents[ri] = pi
+			self.instanceSizes[pi] = self.instanceSizes.get(pi, 0) + entry[2]
+			# Instances are usually added in order of their creation time
+			i = len(instances)
+			while i > 0 and instances[i - 1][0] > entry[0]:
+				i -= 1
+			instances.insert(i, entry)
+			isOldest = i == 0
+		if isOldest and pi in self.miaContainers:	# the container's next instance expiration changed
+			self._scheduleExpirationWorker()
+
+
+	def _unindexInstances(self, resources: List[Resource]) -> None:
+		""" Remove instances from the index. The index of a removed container is dropped. """
+		removed: Dict[str, Set[str]] = {}	# pi -> { ri }
+		with self.instanceLock:
+			for resource in resources:
+				ri = resource.ri
+				if (pi := self.instanceParents.pop(ri, None)) is not None:
+					removed.setdefault(pi, set()).add(ri)
+				if (instances := self.instancesByPI.pop(ri, None)) is not None:		# a container
+					del self.instanceSizes[ri]
+					for _, cri, _ in instances:
+						self.instanceParents.pop(cri, None)
+			for pi, ris in removed.items():
+				if (instances := self.instancesByPI.get(pi)) is None:
+					continue
+				if len(ris) == 1 and instances[0][1] in ris:	# usually the oldest is removed
+					self.instanceSizes[pi] -= instances.popleft()[2]
+				else:
+					self.instanceSizes[pi] -= sum(e[2] for e in instances if e[1] in ris)
+					self.instancesByPI[pi] = InstanceList(e for e in instances if e[1] not in ris)
+
+
+	#########################################################################
+	##
+	##	Resource cache
+	##
+
+	def _cachedResource(self, ri: str) -> Resource:
+		""" Return a copy of a cached resource, or None. """
+		if self.resourceCacheSize <= 0:
+			return None
+		with self.resourceCacheLock:
+			if (resource := self.resourceCache.get(ri)) is None:
+				self.resourceCacheMisses += 1
+				return None
+			self.resourceCache.move_to_end(ri)	# type: ignore
+			self.resourceCacheHits += 1
+		return resource.clone()
+
+
+	def _cacheResource(self, resource: Resource, generation: int) -> None:
+		""" Add a copy of a resource to the cache. This is skipped when the cache
+			was invalidated since *generation* was read, because the resource
+			might be outdated already.
+		"""
+		if self.resourceCacheSize <= 0 or resource is None:
+			return
+		clone = resource.clone()
+		with self.resourceCacheLock:
+			if generation != self.resourceCacheGeneration:
+				return
+			self.resourceCache[clone.ri] = clone
+			self.resourceCache.move_to_end(clone.ri)	# type: ignore
+			if len(self.resourceCache) > self.resourceCacheSize:
+				self.resourceCache.popitem(last=False)	# type: ignore
+
+
+	def _invalidateCachedResource(self, ri: str) -> None:
+		""" Remove a resource from the cache. This must be called *after* the
+			resource was changed in the database.
+		"""
+		with self.resourceCacheLock:
+			self.resourceCacheGeneration += 1
+			self.resourceCache.pop(ri, None)
+
+
+	def resourceCacheStatistics(self) -> Tuple[int, int]:
+		""" Return the hits and misses of the resource cache. """
+		with self.resourceCacheLock:
+			return self.resourceCacheHits, self.resourceCacheMisses
+
+
+	#########################################################################
+	##
+	##	Unit of work
+	##
+
+	def beginUnitOfWork(self) -> None:
+		""" Start buffering resource updates of the current thread. Retrievals in
+			this thread see the buffered updates. Units of work may be nested,
+			only the outermost one writes the updates to the database.
+		"""
+		uow = self.unitOfWork
+		if getattr(uow, 'depth', 0) == 0:
+			uow.depth = 0
+			uow.updates = {}
+		uow.depth += 1
+
+
+	def commitUnitOfWork(self) -> None:
+		""" Write each resource that was updated in the unit of work once to the database. """
+		uow = self.unitOfWork
+		if getattr(uow, 'depth', 0) == 0:
+			return
+		uow.depth -= 1
+		if uow.depth > 0:
+			return
+		updates, uow.updates = uow.updates, None
+		for ri, (resource, nullified) in updates.items():
+			if not self._updatePendingResource(resource, nullified):
+				for k in nullified:
+					resource.json[k] = None		# remove from the DB
+				self.db.updateResource(resource)
+			self._invalidateCachedResource(ri)
+
+
+	def _unitOfWorkUpdates(self) -> Dict[str, Tuple[Resource, Set[str]]]:
+		""" Return the buffered updates (ri -> (resource, nullified attributes)) of the
+			current thread's unit of work, or None.
+		"""
+		return getattr(self.unitOfWork, 'updates', None)
+
+
+	#########################################################################
+	##
+	##	Asynchronous ingestion
+	##
+
+	def ingestResource(self, resource: Resource) -> Tuple[bool, int, str]:
+		""" Add a new resource, but write it to the database later in a batch. The
+			resource is indexed and can be retrieved immediately. The update of its
+			parent resource in the current unit of work is written together with it,
+			so that it doesn't need a write of its own. After writing a batch the
+			dispatcher is informed.
+		"""
+		ri, pi = resource.ri, resource.pi
+		if self.hasResource(ri, resource.__srn__):
+			Logging.logWarn('Resource already exists (Skipping): %s ' % resource)
+			return False, C.rcAlreadyExists, 'resource already exists'
+		updates = self._unitOfWorkUpdates()
+		parentResource, nullified = updates.pop(pi) if updates and pi in updates else (self.retrieveResource(ri=pi)[0], set())
+		if parentResource is None:
+			return False, C.rcNotFound, 'parent resource not found'
+		with self.ingestionLock:
+			self.pendingResources[ri] = (resource.clone(), set(), True)
+			if (parentIsNew := pi not in self.pendingResources):
+				self.pendingResources[pi] = (parentResource, set(), False)
+			self._replacePendingResource(parentResource, nullified)
+		self._indexStructuredPath(ri, resource.__srn__, resource.ty)
+		self._indexInstance(resource)
+		self._indexExpiration(resource)
+		self._indexLabels(resource)
+
+		self.ingestionQueue.put(ri)
+		if parentIsNew:
+			self.ingestionQueue.put(pi)
+		return True, C.rcCreated, None
+
+
+	def waitForIngestion(self) -> None:
+		""" Block while too many ingested resources are waiting to be written. """
+		with self.ingestionSpace:
+			self.ingestionSpace.wait_for(lambda: len(self.pendingResources) < self.ingestionQueueSize)
+
+
+	def ingestionWriterLoop(self) -> None:
+		""" Write the pending resources in batches until None is received. """
+		while True:
+			batch = [ self.ingestionQueue.get() ]
+			while len(batch) < self.ingestionBatchSize and not self.ingestionQueue.empty():
+				batch.append(self.ingestionQueue.get())
+			self._writePendingResources([ ri for ri in batch if ri is not None ])
+			if None in batch:
+				return
+
+
+	def _writePendingResources(self, ris: List[str]) -> None:
+		""" Write the pending resources with the given ri, if they are still pending. """
+		# The lock is held while writing, so that a pending resource that is
+		# deleted concurrently is either not written or deleted afterwards.
+		with self.ingestionLock:
+			newResources = []
+			updatedResources = []
+			for ri in dict.fromkeys(ris):		# unique, in order
+				if (pending := self.pendingResources.get(ri)) is None:	# deleted in the meantime
+					continue
+				resource, nullified, isNew = pending
+				if isNew:
+					newResources.append(resource)
+				else:
+					for k in nullified:
+						resource.json[k] = None		# remove from the DB
+					updatedResources.append(resource)
+			try:
+				if len(newResources) > 0:
+					self.db.insertResources(newResources)
+					self.db.insertIdentifiers(newResources)
+				for resource in updatedResources:
+					self.db.updateResource(resource)
+			except Exception as e:
+				Logging.logErr('Exception while writing ingested resources: %s' % e)
+			for resource in newResources + updatedResources:
+				del self.pendingResources[resource.ri]
+			self.ingestionSpace.notify_all()
+		for resource in updatedResources:
+			self._invalidateCachedResource(resource.ri)
+		if len(newResources) > 0:
+			try:
+				CSE.dispatcher.ingestedResourcesWritten(newResources)
+			except Exception as e:
+				Logging.logErr('Exception while handling ingested resources: %s' % e)
+
+
+	def _updatePendingResource(self, resource: Resource, nullified: Set[str]) -> bool:
+		""" Replace a pending resource with an updated version. Return False if
+			the resource is not pending, then it must be written to the DB by the caller.
+		"""
+		if resource.ri not in self.pendingResources:
+			return False
+		with self.ingestionLock:
+			if resource.ri not in self.pendingResources:	# written in the meantime
+				return False
+			self._replacePendingResource(resource, nullified)
+		return True
+
+
+	def _replacePendingResource(self, resource: Resource, nullified: Set[str]) -> None:
+		""" Replace a pending resource. The ingestion lock must be held by the caller. """
+		pending = self.pendingResources[resource.ri]
+		clone = resource.clone()
+		nullified = (nullified | { k for k, v in clone.json.items() if v is None } | pending[1]) - { k for k, v in clone.json.items() if v is not None }
+		for k in [ k for k, v in clone.json.items() if v is None ]:
+			del clone.json[k]
+		self.pendingResources[resource.ri] = (clone, nullified, pending[2])
+
+
+	def _removePendingResources(self, resources: List[Resource]) -> None:
+		""" Remove deleted resources from the pending resources, so that they are not written. """
+		if not self.pendingResources:
+			return
+		with self.ingestionLock:
+			for resource in resources:
+				self.pendingResources.pop(resource.ri, None)
+			self.ingestionSpace.notify_all()
+
+
 	#########################################################################
 	##
 	##	Subscriptions
@@ -307,154 +1105,378 @@ class Storage(object):
 	def expirationDBWorker(self) -> bool:
 		Logging.logDebug('Looking for expired resources')
 		now = Utils.getResourceDate()
-		rs = self.db.discoverResources(lambda r: 'et' in r and (et := r['et']) is not None and et < now)
-		for j in rs:
-			r, _ = Utils.resourceFromJSON(j)
-			if r  is not None:
-				CSE.dispatcher.deleteResource(r, withDeregistration=True)
-
-		# Check all resources with maxInstanceAge (mia)
-		rs = self.db.discoverResources(lambda r: 'mia' in r)
-		for j in rs:
-			r, _ = Utils.resourceFromJSON(j)
-			if r is not None:
-				r.validateExpirations()
+		for ri in self._dueExpirations(now):
+			resource, _, _ = self.retrieveResource(ri=ri)
+			if resource is not None and (et := resource.et) is not None and et < now:	# might have been deleted or updated meanwhile
+				if CSE.dispatcher.deleteResource(resource, withDeregistration=True)[0] is None:
+					self._indexExpiration(resource)	# try again with the next regular run
+
+		# Check the containers with maxInstanceAge (mia), but only those whose
+		# oldest instance is too old
+		with self.expirationLock:
+			containers = list(self.miaContainers.items())
+		for ri, mia in containers:
+			if (ct := self.oldestInstanceCT(ri)) is not None and ct < Utils.getResourceDate(-mia):
+				if (resource := self.retrieveResource(ri=ri)[0]) is not None:
+					resource.validateExpirations()
+
+		self._scheduleExpirationWorker()
 		return True
 
 
+	def rebuildExpirationIndex(self) -> None:
+		""" Build the expiration index from the resources in the database. """
+		rs = self.db.discoverResources(lambda r: r.get('et') is not None or r.get('mia') is not None)
+		with self.expirationLock:
+			self.expirationHeap = []
+			self.expirationTimes = {}
+			self.miaContainers = {}
+			for r in rs:
+				self._indexExpirationAttributes(r['ri'], r.get('et'), r.get('mia'))
+		Logging.log('Expiration index built (expirations: %d, mia containers: %d)' % (len(self.expirationTimes), len(self.miaContainers)))
+
+
+	def _indexExpiration(self, resource: Resource) -> None:
+		""" Add or update the expiration index entries of a resource. """
+		mia = resource.mia
+		with self.expirationLock:
+			wasNext = self._nextExpiration()
+			wasMia = self.miaContainers.get(resource.ri)
+			self._indexExpirationAttributes(resource.ri, resource.et, mia)
+			isNext = self._nextExpiration()
+		if (isNext is not None and isNext != wasNext) or (mia is not None and mia != wasMia):	# the next expiration might be earlier now
+			self._scheduleExpirationWorker()
+
+
+	def _indexExpirationAttributes(self, ri: str, et: str, mia: int) -> None:
+		""" Must be called while holding the expiration lock. """
+		if isinstance(et, str):
+			if self.expirationTimes.get(ri) != et:
+				self.expirationTimes[ri] = et
+				heapq.heappush(self.expirationHeap, (et, ri))
+				# Get rid of outdated entries when there are too many of them
+				if len(self.expirationHeap) > 2 * len(self.expirationTimes) + 100:
+					self.expirationHeap = [ (et, ri) for ri, et in self.expirationTimes.items() ]
+					heapq.heapify(self.expirationHeap)
+		else:
+			self.expirationTimes.pop(ri, None)
+		if mia is not None:
+			self.miaContainers[ri] = mia
+		else:
+			self.miaContainers.pop(ri, None)
+
+
+	def _unindexExpiration(self, ri: str) -> None:
+		""" Remove a resource from the expiration index. Its heap entry is removed lazily. """
+		with self.expirationLock:
+			self.expirationTimes.pop(ri, None)
+			self.miaContainers.pop(ri, None)
+
+
+	def _nextExpiration(self) -> str:
+		""" Return the earliest et in the index, or None. Outdated heap entries
+			are removed on the way. Must be called while holding the expiration lock.
+		"""
+		heap = self.expirationHeap
+		while len(heap) > 0:
+			et, ri = heap[0]
+			if self.expirationTimes.get(ri) == et:
+				return et
+			heapq.heappop(heap)
+		return None
+
+
+	def _dueExpirations(self, now: str) -> List[str]:
+		""" Remove and return the ri of all resources that expired before *now*. """
+		result = []
+		with self.expirationLock:
+			while (et := self._nextExpiration()) is not None and et < now:
+				_, ri = heapq.heappop(self.expirationHeap)
+				del self.expirationTimes[ri]
+				result.append(ri)
+		return result
+
+
+	def _nextExpirationTime(self) -> float:
+		""" Return the timestamp when the next resource or the next instance of a
+			container with a maxInstanceAge expires, or None.
+		"""
+		with self.expirationLock:
+			et = self._nextExpiration()
+			containers = list(self.miaContainers.items())
+		times = []
+		if et is not None and (ts := Utils.fromISO8601Date(et)) is not None:
+			times.append(ts)
+		for ri, mia in containers:
+			if (ct := self.oldestInstanceCT(ri)) is not None and (ts := Utils.fromISO8601Date(ct)) is not None:
+				times.append(ts + mia)
+		return min(times) if len(times) > 0 else None
+
+
+	def _scheduleExpirationWorker(self) -> None:
+		""" Let the expiration worker run when the next resource or instance
+			expires, if that is before its next regular run.
+		"""
+		if self.expirationWorker is None:
+			return
+		# Overdue resources that could not be deleted are left to the regular runs
+		if (ts := self._nextExpirationTime()) is not None and (delay := ts - time.time()) > 0:
+			self.expirationWorker.wakeUp(delay)
+
+
 
 #########################################################################
-##
-##	internal utilities
-##
+#
+#	Instance index entries of a container
+#
+
+class InstanceList(object):
+	"""	The (ct, ri, cs) entries of the instances of a container, ordered by their
+		creation time. The entries are kept in a list, so that they can be accessed
+		by position in O(1) for binary searches. Removing the oldest entry only
+		advances an offset. The list is compacted when half of it is unused.
+	"""
+
+	def __init__(self, entries: Iterable[Tuple[str, str, int]] = None) -> None:
+		self.entries: List[Tuple[str, str, int]] = list(entries) if entries is not None else []
+		self.offset = 0		# index of the oldest entry in *entries*
+
+
+	def __len__(self) -> int:
+		return len(self.entries) - self.offset
+
 
+	def __iter__(self) -> Iterator[Tuple[str, str, int]]:
+		return itertools.islice(self.entries, self.offset, None)
 
-# # handler function for discovery search and matching resources
-# def _testDiscovery(storage, r, rootSRN, handling, conditions, attributes, fo, lim, ofst, allLen):
-
-# 	# TODO: Implement a couple of optimizations. Can we determine earlier that a match will fail?
-
-# 	# check limits
-# 	# TinyDB doesn't support pagination. So we need to implement it here. See also offset below.
-# 	if lim is not None and handling['__returned__'] >= lim:
-# 		return False
 
-# 	# check for SRN first
-# 	# Add / to the "startswith" check to terminate the search string 
-# 	if (srn := r['__srn__']) is not None and rootSRN.count('/') >= srn.count('/') or not srn.startswith(rootSRN+'/') or srn == rootSRN:
-# 		return False
-
-# 	# Ignore virtual resources TODO: correct?
-# 	# if (ty := r.get('ty')) and ty in C.tVirtualResources:
-# 		# return False
-# 	ty = r.get('ty')
+	def __getitem__(self, index: int) -> Tuple[str, str, int]:
+		return self.entries[self._position(index)]
 
-# 	# ignore some resource types
-# 	if ty in [ C.tGRP_FOPT ]:
-# 		return False
+
+	def __setitem__(self, index: int, entry: Tuple[str, str, int]) -> None:
+		self.entries[self._position(index)] = entry
+
+
+	def append(self, entry: Tuple[str, str, int]) -> None:
+		self.entries.append(entry)
+
+
+	def insert(self, index: int, entry: Tuple[str, str, int]) -> None:
+		self.entries.insert(self._position(index), entry)
+
+
+	def popleft(self) -> Tuple[str, str, int]:
+		entry = self.entries[self._position(0)]
+		self.offset += 1
+		if self.offset * 2 >= len(self.entries):
+			del self.entries[:self.offset]
+			self.offset = 0
+		return entry
+
+
+	def bisectLeft(self, entry: tuple) -> int:
+		return bisect.bisect_left(self.entries, entry, self.offset) - self.offset
+
+
+	def bisectRight(self, entry: tuple) -> int:
+		return bisect.bisect_right(self.entries, entry, self.offset) - self.offset
+
+
+	def slice(self, start: int, end: int) -> List[Tuple[str, str, int]]:
+		""" Return the entries from position *start* to *end* (exclusive). """
+		return self.entries[self.offset + start:self.offset + end]
+
+
+	def _position(self, index: int) -> int:
+		if index < 0:
+			index += len(self)
+		if not 0 <= index <= len(self):		# len(self) for insert() at the end
+			raise IndexError('instance index out of range')
+		return self.offset + index
+
+
+
+#########################################################################
+#
+#	Interface for database bindings
+#
+#	A binding implements the actual access to a database. The Storage class
+#	only uses the methods defined here, so that bindings can be exchanged
+#	via the [database] type configuration.
+
+
+class DBBinding(object):
+
+	def openDB(self) -> None:
+		""" Open or create the database. MUST be implemented by each binding. """
+		raise NotImplementedError('openDB()')
+
+
+	def closeDB(self) -> None:
+		""" Close the database. MUST be implemented by each binding. """
+		raise NotImplementedError('closeDB()')
 
 
-# 	# check level
-# 	if (h_lvl := handling.get('__lvl__')) is not None and srn.count('/') > h_lvl:
-# 		return False
+	def purgeDB(self) -> None:
+		""" Remove all data from the database. MUST be implemented by each binding. """
+		raise NotImplementedError('purgeDB()')
+
+
+	#
+	#	Resources
+	#
+
+	def insertResource(self, resource: Resource) -> None:
+		raise NotImplementedError('insertResource()')
+
+
+	def insertResources(self, resources: List[Resource]) -> None:
+		""" Insert multiple new resources. Bindings SHOULD implement this as a batch. """
+		for resource in resources:
+			self.insertResource(resource)
+
+
+	def upsertResource(self, resource: Resource) -> None:
+		raise NotImplementedError('upsertResource()')
+
+
+	def updateResource(self, resource: Resource) -> Resource:
+		""" Update a resource. Attributes that are None are removed from the
+			database and the resource.
+		"""
+		raise NotImplementedError('updateResource()')
+
+
+	def deleteResource(self, resource: Resource) -> None:
+		raise NotImplementedError('deleteResource()')
+
+
+	def deleteResources(self, resources: List[Resource]) -> None:
+		""" Delete multiple resources. Bindings SHOULD implement this as a batch. """
+		for resource in resources:
+			self.deleteResource(resource)
+
+
+	def searchResources(self, ri: str = None, csi: str = None, srn: str = None, pi: str = None, ty: int = None) -> List[dict]:
+		raise NotImplementedError('searchResources()')
+
+
+	def searchChildResources(self, pi: str, excludeTypes: List[int]) -> List[dict]:
+		""" Return the direct child resources of a resource, except those of the given types. """
+		return [ jsn for jsn in self.searchResources(pi=pi) if jsn.get('ty') not in excludeTypes ]
+
+
+	def searchResourcesByRI(self, ris: List[str]) -> List[dict]:
+		""" Return the resources with the given ri, in no particular order. Missing resources are skipped. """
+		return [ jsn for ri in ris for jsn in self.searchResources(ri=ri) ]
+
+
+	def discoverResources(self, func: Callable) -> List[dict]:
+		""" Return all resources for which func(resource) returns True. """
+		raise NotImplementedError('discoverResources()')
+
+
+	def hasResource(self, ri: str = None, csi: str = None, srn: str = None, ty: int = None) -> bool:
+		raise NotImplementedError('hasResource()')
+
+
+	def countResources(self) -> int:
+		raise NotImplementedError('countResources()')
+
+
+	def searchByTypeFieldValue(self, ty: int, field: str, value: Any) -> List[dict]:
+		raise NotImplementedError('searchByTypeFieldValue()')
+
+
+	#
+	#	Identifiers
+	#
+
+	def insertIdentifier(self, resource: Resource, ri: str, srn: str) -> None:
+		raise NotImplementedError('insertIdentifier()')
+
+
+	def insertIdentifiers(self, resources: List[Resource]) -> None:
+		""" Insert the identifiers of multiple new resources. Bindings SHOULD implement this as a batch. """
+		for resource in resources:
+			self.insertIdentifier(resource, resource.ri, resource.__srn__)
+
+
+	def deleteIdentifier(self, resource: Resource) -> None:
+		raise NotImplementedError('deleteIdentifier()')
+
+
+	def deleteIdentifiers(self, resources: List[Resource]) -> None:
+		""" Delete the identifiers of multiple resources. Bindings SHOULD implement this as a batch. """
+		for resource in resources:
+			self.deleteIdentifier(resource)
+
+
+	def searchIdentifiers(self, ri: str = None, srn: str = None) -> List[dict]:
+		raise NotImplementedError('searchIdentifiers()')
 
-# 	# get the parent resource
-# 	#
-# 	#	TODO when determines how the parentAttribute is actually encoded
-# 	#
-# 	# pr = None
-# 	# if (pi := r.get('pi')) is not None:
-# 	# 	print(pi)
-# 	# 	pr = storage.retrieveResource(ri=pi)
-# 	# print(pr)
-# 	found = 0
 
-# 	# check conditions
-# 	if conditions is not None:
-# 		# found += 1 if (c_ty := conditions.get('ty')) is not None and (str(ty) == c_ty) else 0
+	def allIdentifiers(self) -> List[dict]:
+		raise NotImplementedError('allIdentifiers()')
 
-# 		if (ct := r.get('ct')) is not None:
-# 			found += 1 if (c_crb := conditions.get('crb')) is not None and (ct < c_crb) else 0
-# 			found += 1 if (c_cra := conditions.get('cra')) is not None and (ct > c_cra) else 0
 
-# 		if (lt := r.get('lt')) is not None:
-# 			found += 1 if (c_ms := conditions.get('ms')) is not None and (lt > c_ms) else 0
-# 			found += 1 if (c_us := conditions.get('us')) is not None and (lt < c_us) else 0
+	#
+	#	Subscriptions
+	#
 
-# 		if (st := r.get('st')) is not None:
-# 			found += 1 if (c_sts := conditions.get('sts')) is not None and (str(st) > c_sts) else 0
-# 			found += 1 if (c_stb := conditions.get('stb')) is not None and (str(st) < c_stb) else 0
+	def searchSubscriptions(self, ri: str = None, pi: str = None) -> List[dict]:
+		raise NotImplementedError('searchSubscriptions()')
 
-# 		if (et := r.get('et')) is not None:
-# 			found += 1 if (c_exb := conditions.get('exb')) is not None and (et < c_exb) else 0
-# 			found += 1 if (c_exa := conditions.get('exa')) is not None and (et > c_exa) else 0
 
-# 		# special handling of label-list
-# 		if (lbl := r.get('lbl')) is not None and (c_lbl := conditions.get('lbl')) is not None:
-# 			lbla = c_lbl.split()
-# 			fnd = 0
-# 			for l in lbla:
-# 				fnd += 1 if l in lbl else 0
-# 			found += 1 if (fo == 1 and fnd == len(lbl)) or (fo == 2 and fnd > 0) else 0	# fo==or -> find any label
-# 			#	# TODO labelsQuery
+	def upsertSubscription(self, subscription: Resource) -> bool:
+		raise NotImplementedError('upsertSubscription()')
 
-# 		# Types
-# 		# Multiple occurences of ty is always OR'ed. Therefore we add the count of
-# 		# ty's to found (to indicate that the whole set matches)
-# 		tys = conditions['ty']
-# 		found += len(tys) if str(ty) in tys else 0	
 
-# 		if ty in [ C.tCIN, C.tFCNT ]:	# special handling for CIN, FCNT
-# 			if (cs := r.get('cs')) is not None:
-# 				found += 1 if (sza := conditions.get('sza')) is not None and (str(cs) >= sza) else 0
-# 				found += 1 if (szb := conditions.get('szb')) is not None and (str(cs) < szb) else 0
+	def removeSubscription(self, subscription: Resource) -> bool:
+		raise NotImplementedError('removeSubscription()')
 
-# 		# ContentFormats
-# 		# Multiple occurences of cnf is always OR'ed. Therefore we add the count of
-# 		# cnf's to found (to indicate that the whole set matches)
-# 		if ty in [ C.tCIN ]:	# special handling for CIN
-# 			cnfs = conditions['cty']
-# 			found += len(cnfs) if r.get('cnf') in cnfs else 0
 
+	#
+	#	Statistics
+	#
 
+	def searchStatistics(self) -> dict:
+		raise NotImplementedError('searchStatistics()')
 
 
+	def upsertStatistics(self, stats: dict) -> bool:
+		raise NotImplementedError('upsertStatistics()')
 
-# 	# TODO childLabels
-# 	# TODO parentLabels
-# 	# TODO childResourceType
-# 	# TODO parentResourceType
 
+	#
+	#	App Data
+	#
 
-# 	# Attributes:
-# 	if attributes is not None:
-# 		for name in attributes:
-# 			val = attributes[name]
-# 			if '*' in val:
-# 				val = val.replace('*', '.*')
-# 				found += 1 if (rval := r.get(name)) is not None and re.match(val, str(rval)) else 0
-# 			else:
-# 				found += 1 if (rval := r.get(name)) is not None and str(val) == str(rval) else 0
+	def searchAppData(self, id: str) -> dict:
+		raise NotImplementedError('searchAppData()')
 
-# 	# TODO childAttribute
-# 	# TODO parentAttribute
 
+	def upsertAppData(self, data: dict) -> bool:
+		raise NotImplementedError('upsertAppData()')
 
-# 	# Test whether the OR or AND criteria is fullfilled
-# 	if not ((fo == 2 and found > 0) or 		# OR and found something
-# 			(fo == 1 and allLen == found)	# AND and found everything
-# 	   	   ): 
-# 		return False
 
+	def removeAppData(self, data: dict) -> bool:
+		raise NotImplementedError('removeAppData()')
 
-# 	# Check offset. Dont match if offset not reached
-# 	handling['__matched__'] += 1
-# 	if ofst is not None and handling['__matched__'] <= ofst:
-# 		return False
 
-# 	handling['__returned__'] += 1
-# 	return True
+	#
+	#	Helpers
+	#
 
+	def subscriptionRecord(self, subscription: Resource) -> dict:
+		""" Return the record that is stored for a subscription. """
+		return {	'ri'  : subscription.ri, 
+					'pi'  : subscription.pi,
+					'nct' : subscription.nct,
+					'net' : subscription['enc/net'],
+					'nus' : subscription.nu
+				}
 
 
 
@@ -465,20 +1487,31 @@ class Storage(object):
 #	This class may be moved later to an own module.
 
 
-class TinyDBBinding(object):
+class TinyDBBinding(DBBinding):
 
 	def __init__(self, path: str = None) -> None:
 		self.path = path
 		self.cacheSize = Configuration.get('db.cacheSize')
 		Logging.log('Cache Size: %s' % self.cacheSize)
 
-		# create transaction locks
-		# create transaction locks
-		self.lockResources = Lock()
-		self.lockIdentifiers = Lock()
-		self.lockSubscriptions = Lock()
-		self.lockStatistics = Lock()
-		self.lockAppData = Lock()
+		# create transaction locks. Reads may run concurrently, writes are exclusive
+		self.lockResources = ReadWriteLock()
+		self.lockIdentifiers = ReadWriteLock()
+		self.lockSubscriptions = ReadWriteLock()
+		self.lockStatistics = ReadWriteLock()
+		self.lockAppData = ReadWriteLock()
+
+		# In-memory indexes. They are maintained by the methods that modify the
+		# tables and are rebuilt when the DB is opened.
+		# The index entries for ri reference the stored documents together with
+		# their TinyDB document IDs.
+		self.resourcesByRI: Dict[str, Tuple[int, dict]] = {}	# ri -> (doc_id, document)
+		self.resourcesByPI: Dict[str, Set[str]] = {}			# pi -> { ri }
+		self.resourcesByTY: Dict[int, Set[str]] = {}			# ty -> { ri }
+		self.identifiersByRI: Dict[str, Tuple[int, dict]] = {}	# ri -> (doc_id, identifier)
+		self.identifiersBySRN: Dict[str, str] = {}				# srn -> ri
+
+		self.walWorker: BackgroundWorker.BackgroundWorker = None
 
 
 	def openDB(self) -> None:
@@ -487,27 +1520,35 @@ class TinyDBBinding(object):
 		# TinyDB.table_class = SmartCacheTable 
 		if Configuration.get('db.inMemory'):
 			Logging.log('DB in memory')
-			self.dbResources = TinyDB(storage=MemoryStorage)
-			self.dbIdentifiers = TinyDB(storage=MemoryStorage)
-			self.dbSubscriptions = TinyDB(storage=MemoryStorage)
-			self.dbStatistics = TinyDB(storage=MemoryStorage)
-			self.dbAppData = TinyDB(storage=MemoryStorage)
+			self.dbResources = self._openMemoryDB()
+			self.dbIdentifiers = self._openMemoryDB()
+			self.dbSubscriptions = self._openMemoryDB()
+			self.dbStatistics = self._openMemoryDB()
+			self.dbAppData = self._openMemoryDB()
 		else:
 			Logging.log('DB in file system')
-			self.dbResources = TinyDB(self.path + '/resources.json')
-			self.dbIdentifiers = TinyDB(self.path + '/identifiers.json')
-			self.dbSubscriptions = TinyDB(self.path + '/subscriptions.json')
-			self.dbStatistics = TinyDB(self.path + '/statistics.json')
-			self.dbAppData = TinyDB(self.path + '/appdata.json')
+			self.dbResources = self._openFileDB('resources.json')
+			self.dbIdentifiers = self._openFileDB('identifiers.json')
+			self.dbSubscriptions = self._openFileDB('subscriptions.json')
+			self.dbStatistics = self._openFileDB('statistics.json')
+			self.dbAppData = self._openFileDB('appdata.json')
+
+			# Start background worker to sync and compact the write-ahead logs
+			self.lastCompaction = time.time()
+			self.walWorker = BackgroundWorker.BackgroundWorker(Configuration.get('db.walSyncInterval'), self.walDBWorker, 'walDBWorker')
+			self.walWorker.start()
 		self.tabResources = self.dbResources.table('resources', cache_size=self.cacheSize)
 		self.tabIdentifiers = self.dbIdentifiers.table('identifiers', cache_size=self.cacheSize)
 		self.tabSubscriptions = self.dbSubscriptions.table('subsriptions', cache_size=self.cacheSize)
 		self.tabStatistics = self.dbStatistics.table('statistics', cache_size=self.cacheSize)
 		self.tabAppData = self.dbAppData.table('appdata', cache_size=self.cacheSize)
+		self.rebuildIndexes()
 
 
 	def closeDB(self) -> None:
 		Logging.log('Closing DBs')
+		if self.walWorker is not None:
+			self.walWorker.stop()
 		self.dbResources.close()
 		self.dbIdentifiers.close()
 		self.dbSubscriptions.close()
@@ -522,6 +1563,57 @@ class TinyDBBinding(object):
 		self.tabSubscriptions.truncate()
 		self.tabStatistics.truncate()
 		self.tabAppData.truncate()
+		self.rebuildIndexes()
+
+
+	def _openMemoryDB(self) -> TinyDB:
+		""" Open a memory DB. It uses the in-place tables of the WAL storage,
+			but without a log, so that writes don't copy the whole table.
+		"""
+		db = TinyDB(storage=WALStorage.WALStorage)
+		db.table_class = WALStorage.WALTable
+		return db
+
+
+	def _openFileDB(self, filename: str) -> TinyDB:
+		""" Open a file based DB. Changes are appended to a write-ahead log
+			instead of re-writing the whole file.
+		"""
+		db = TinyDB(self.path + '/' + filename, storage=WALStorage.WALStorage, fsync=Configuration.get('db.walFsync'))
+		db.table_class = WALStorage.WALTable
+		return db
+
+
+	def walDBWorker(self) -> bool:
+		""" Sync the write-ahead logs and compact them into the DB files from time to time. """
+		compact = time.time() - self.lastCompaction >= Configuration.get('db.walCompactInterval')
+		for db in [ self.dbResources, self.dbIdentifiers, self.dbSubscriptions, self.dbStatistics, self.dbAppData ]:
+			try:
+				if compact and db.storage.records > 0:
+					db.storage.compact()
+				else:
+					db.storage.sync()
+			except Exception as e:
+				Logging.logErr('Exception: %s' % e)
+		if compact:
+			self.lastCompaction = time.time()
+		return True
+
+
+	def rebuildIndexes(self) -> None:
+		""" Rebuild the in-memory indexes from the resources and identifiers tables. """
+		with WriteRWLock(self.lockResources):
+			self.resourcesByRI = {}
+			self.resourcesByPI = {}
+			self.resourcesByTY = {}
+			for docID, doc in self._storedDocuments(self.dbResources, self.tabResources).items():
+				self._indexResource(int(docID), doc)
+		with WriteRWLock(self.lockIdentifiers):
+			self.identifiersByRI = {}
+			self.identifiersBySRN = {}
+			for docID, doc in self._storedDocuments(self.dbIdentifiers, self.tabIdentifiers).items():
+				self._indexIdentifier(int(docID), doc)
+		Logging.log('DB indexes built (resources: %d, identifiers: %d)' % (len(self.resourcesByRI), len(self.identifiersByRI)))
 
 
 	#
@@ -530,32 +1622,67 @@ class TinyDBBinding(object):
 
 
 	def insertResource(self, resource: Resource) -> None:
-		with self.lockResources:
-			self.tabResources.insert(resource.json)
+		with WriteRWLock(self.lockResources):
+			docID = self.tabResources.insert(Utils.copyJSON(resource.json))
+			self._indexResource(docID, self._storedDocument(self.dbResources, self.tabResources, docID))
+
+
+	def insertResources(self, resources: List[Resource]) -> None:
+		with WriteRWLock(self.lockResources):
+			docIDs = self.tabResources.insert_multiple([ Utils.copyJSON(resource.json) for resource in resources ])
+			for docID in docIDs:
+				self._indexResource(docID, self._storedDocument(self.dbResources, self.tabResources, docID))
 	
 
 	def upsertResource(self, resource: Resource) -> None:
 		#Logging.logDebug(resource)
-		with self.lockResources:
-			self.tabResources.upsert(resource.json, Query().ri == resource.ri)	# Update existing or insert new when overwriting
+		with WriteRWLock(self.lockResources):
+			# Update existing or insert new when overwriting
+			if (entry := self.resourcesByRI.get(resource.ri)) is not None:
+				docID = entry[0]
+				self._unindexResource(resource.ri)
+				self.tabResources.update(Utils.copyJSON(resource.json), doc_ids=[docID])
+			else:
+				docID = self.tabResources.insert(Utils.copyJSON(resource.json))
+			self._indexResource(docID, self._storedDocument(self.dbResources, self.tabResources, docID))
 	
 
 	def updateResource(self, resource: Resource) -> Resource:
 		#Logging.logDebug(resource)
-		with self.lockResources:
+		with WriteRWLock(self.lockResources):
 			ri = resource.ri
-			self.tabResources.update(resource.json, Query().ri == ri)
 			# remove nullified fields from db and resource
-			for k in list(resource.json):
-				if resource.json[k] is None:
-					self.tabResources.update(delete(k), Query().ri == ri)
-					del resource.json[k]
+			nullified = [ k for k in resource.json if resource.json[k] is None ]
+			if (entry := self.resourcesByRI.get(ri)) is not None:
+				docID = entry[0]
+				def _update(doc: dict) -> None:
+					doc.update(Utils.copyJSON(resource.json))
+					for k in nullified:
+						doc.pop(k, None)
+				self._unindexResource(ri)
+				self.tabResources.update(_update, doc_ids=[docID])
+				self._indexResource(docID, self._storedDocument(self.dbResources, self.tabResources, docID))
+			for k in nullified:
+				del resource.json[k]
 			return resource
 
 
 	def deleteResource(self, resource: Resource) -> None:
-		with self.lockResources:
-			self.tabResources.remove(Query().ri == resource.ri)
+		with WriteRWLock(self.lockResources):
+			if (entry := self.resourcesByRI.get(resource.ri)) is not None:
+				self.tabResources.remove(doc_ids=[entry[0]])
+				self._unindexResource(resource.ri)
+
+
+	def deleteResources(self, resources: List[Resource]) -> None:
+		with WriteRWLock(self.lockResources):
+			docIDs = []
+			for resource in resources:
+				if (entry := self.resourcesByRI.get(resource.ri)) is not None:
+					docIDs.append(entry[0])
+					self._unindexResource(resource.ri)
+			if len(docIDs) > 0:
+				self.tabResources.remove(doc_ids=docIDs)
 	
 
 	def searchResources(self, ri: str = None, csi: str = None, srn: str = None, pi: str = None, ty: int = None) -> List[dict]:
@@ -566,53 +1693,96 @@ class TinyDBBinding(object):
 				return self.searchResources(ri=identifiers[0]['ri'])
 			return []
 
-		with self.lockResources:
+		if ri is None and csi is not None:
+			with self._searchLock(self.lockResources):
+				return self._search(self.dbResources, self.tabResources, Query().csi == csi)
+
+		with ReadRWLock(self.lockResources):
 			if ri is not None:
-				return self.tabResources.search(Query().ri == ri)
-			elif csi is not None:
-				return self.tabResources.search(Query().csi == csi)
+				return [ Utils.copyJSON(entry[1]) ] if (entry := self.resourcesByRI.get(ri)) is not None else []
 			elif pi is not None and ty is not None:
-				return self.tabResources.search((Query().pi == pi) & (Query().ty == ty))
+				return [ Utils.copyJSON(doc) for ri in self.resourcesByPI.get(pi, []) if (doc := self.resourcesByRI[ri][1]).get('ty') == ty ]
 			elif pi is not None:
-				return self.tabResources.search(Query().pi == pi)
+				return [ Utils.copyJSON(self.resourcesByRI[ri][1]) for ri in self.resourcesByPI.get(pi, []) ]
 			elif ty is not None:
-				return self.tabResources.search(Query().ty == ty)
+				return [ Utils.copyJSON(self.resourcesByRI[ri][1]) for ri in self.resourcesByTY.get(ty, []) ]
 			return []
 
 
+	def searchChildResources(self, pi: str, excludeTypes: List[int]) -> List[dict]:
+		with ReadRWLock(self.lockResources):
+			return [ Utils.copyJSON(doc) for ri in self.resourcesByPI.get(pi, []) if (doc := self.resourcesByRI[ri][1]).get('ty') not in excludeTypes ]
+
+
+	def searchResourcesByRI(self, ris: List[str]) -> List[dict]:
+		with ReadRWLock(self.lockResources):
+			return [ Utils.copyJSON(entry[1]) for ri in ris if (entry := self.resourcesByRI.get(ri)) is not None ]
+
+
 	def discoverResources(self, func: Callable) -> List[dict]:
-		with self.lockResources:
-			return self.tabResources.search(func)
+		with self._searchLock(self.lockResources):
+			return self._search(self.dbResources, self.tabResources, func)
 
 
 	def hasResource(self, ri: str = None, csi: str = None, srn: str = None, ty: int = None) -> bool:
 
 		# find the ri first and then try again recursively
 		if srn is not None:
-			if len((identifiers := self.searchIdentifiers(srn=srn))) == 1:
-				return self.hasResource(ri=identifiers[0]['ri'])
-		with self.lockResources:
+			with ReadRWLock(self.lockIdentifiers):
+				ri = self.identifiersBySRN.get(srn)
+			return ri is not None and self.hasResource(ri=ri)
+		with ReadRWLock(self.lockResources):
 			if ri is not None:
-				return self.tabResources.contains(Query().ri == ri)
+				return ri in self.resourcesByRI
 			elif csi is not None:
 				return self.tabResources.contains(Query().csi == csi)
 			elif ty is not None:
-				return self.tabResources.contains(Query().ty == ty)
+				return len(self.resourcesByTY.get(ty, [])) > 0
 			else:
 				return False
 
 
 	def countResources(self) -> int:
-		with self.lockResources:
-			return len(self.tabResources)
+		with ReadRWLock(self.lockResources):
+			return len(self.resourcesByRI)
 
 
-	def  searchByTypeFieldValue(self, ty: int, field: str, value: Any) -> List[dict]:
+	def searchByTypeFieldValue(self, ty: int, field: str, value: Any) -> List[dict]:
 		"""Search and return all resources of a specific type and a value in a field,
 		and return them in an array."""
-		with self.lockResources:
-			return self.tabResources.search((Query().ty == ty) & (where(field).any(value)))
-
+		with ReadRWLock(self.lockResources):
+			result = []
+			for ri in self.resourcesByTY.get(ty, []):
+				doc = self.resourcesByRI[ri][1]
+				# same semantic as TinyDB's any() query
+				if isinstance(fieldValue := doc.get(field), list) and any(e in value for e in fieldValue):
+					result.append(Utils.copyJSON(doc))
+			return result
+
+
+	def _indexResource(self, docID: int, doc: dict) -> None:
+		""" Add a stored resource document to the indexes. Must be called while holding the lock. """
+		ri = doc['ri']
+		self.resourcesByRI[ri] = (docID, doc)
+		if (pi := doc.get('pi')) is not None:
+			self.resourcesByPI.setdefault(pi, set()).add(ri)
+		if (ty := doc.get('ty')) is not None:
+			self.resourcesByTY.setdefault(ty, set()).add(ri)
+
+
+	def _unindexResource(self, ri: str) -> None:
+		""" Remove a resource from the indexes. Must be called while holding the lock. """
+		if (entry := self.resourcesByRI.pop(ri, None)) is None:
+			return
+		doc = entry[1]
+		if (pi := doc.get('pi')) is not None and (ris := self.resourcesByPI.get(pi)) is not None:
+			ris.discard(ri)
+			if len(ris) == 0:
+				del self.resourcesByPI[pi]
+		if (ty := doc.get('ty')) is not None and (ris := self.resourcesByTY.get(ty)) is not None:
+			ris.discard(ri)
+			if len(ris) == 0:
+				del self.resourcesByTY[ty]
 
 
 	#
@@ -621,57 +1791,134 @@ class TinyDBBinding(object):
 
 
 	def insertIdentifier(self, resource: Resource, ri: str, srn: str) -> None:
-		with self.lockIdentifiers:
-			self.tabIdentifiers.upsert(
-				# ri, rn, srn 
-				{'ri' : ri, 'rn' : resource.rn, 'srn' : srn, 'ty' : resource.ty}, 
-				Query().ri == ri)
+		with WriteRWLock(self.lockIdentifiers):
+			# ri, rn, srn 
+			identifier = {'ri' : ri, 'rn' : resource.rn, 'srn' : srn, 'ty' : resource.ty}
+			if (entry := self.identifiersByRI.get(ri)) is not None:
+				docID = entry[0]
+				self._unindexIdentifier(ri)
+				self.tabIdentifiers.update(identifier, doc_ids=[docID])
+			else:
+				docID = self.tabIdentifiers.insert(identifier)
+			self._indexIdentifier(docID, self._storedDocument(self.dbIdentifiers, self.tabIdentifiers, docID))
+
+
+	def insertIdentifiers(self, resources: List[Resource]) -> None:
+		with WriteRWLock(self.lockIdentifiers):
+			# Identifiers of new resources, so there are no existing entries to update
+			docIDs = self.tabIdentifiers.insert_multiple([ {'ri' : resource.ri, 'rn' : resource.rn, 'srn' : resource.__srn__, 'ty' : resource.ty} for resource in resources ])
+			for docID in docIDs:
+				self._indexIdentifier(docID, self._storedDocument(self.dbIdentifiers, self.tabIdentifiers, docID))
 
 
 	def deleteIdentifier(self, resource: Resource) -> None:
-		with self.lockIdentifiers:
-			self.tabIdentifiers.remove(Query().ri == resource.ri)
+		with WriteRWLock(self.lockIdentifiers):
+			if (entry := self.identifiersByRI.get(resource.ri)) is not None:
+				self.tabIdentifiers.remove(doc_ids=[entry[0]])
+				self._unindexIdentifier(resource.ri)
+
+
+	def deleteIdentifiers(self, resources: List[Resource]) -> None:
+		with WriteRWLock(self.lockIdentifiers):
+			docIDs = []
+			for resource in resources:
+				if (entry := self.identifiersByRI.get(resource.ri)) is not None:
+					docIDs.append(entry[0])
+					self._unindexIdentifier(resource.ri)
+			if len(docIDs) > 0:
+				self.tabIdentifiers.remove(doc_ids=docIDs)
 
 
 	def searchIdentifiers(self, ri: str = None, srn: str = None) -> List[dict]:
-		with self.lockIdentifiers:
+		with ReadRWLock(self.lockIdentifiers):
 			if srn is not None:
-				return self.tabIdentifiers.search(Query().srn == srn)
+				ri = self.identifiersBySRN.get(srn)
+				return [ dict(self.identifiersByRI[ri][1]) ] if ri is not None else []
 			elif ri is not None:
-				return self.tabIdentifiers.search(Query().ri == ri) 
+				return [ dict(entry[1]) ] if (entry := self.identifiersByRI.get(ri)) is not None else []
 			return []
 
 
+	def allIdentifiers(self) -> List[dict]:
+		with ReadRWLock(self.lockIdentifiers):
+			return [ dict(entry[1]) for entry in self.identifiersByRI.values() ]
+
+
+	def _indexIdentifier(self, docID: int, doc: dict) -> None:
+		""" Add a stored identifier document to the indexes. Must be called while holding the lock. """
+		ri = doc['ri']
+		self.identifiersByRI[ri] = (docID, doc)
+		if (srn := doc.get('srn')) is not None:
+			self.identifiersBySRN[srn] = ri
+
+
+	def _unindexIdentifier(self, ri: str) -> None:
+		""" Remove an identifier from the indexes. Must be called while holding the lock. """
+		if (entry := self.identifiersByRI.pop(ri, None)) is None:
+			return
+		if (srn := entry[1].get('srn')) is not None and self.identifiersBySRN.get(srn) == ri:
+			del self.identifiersBySRN[srn]
+
+
+	#
+	#	Index and lock helpers
+	#
+
+
+	def _searchLock(self, lock: ReadWriteLock) -> Union[ReadRWLock, WriteRWLock]:
+		""" Return the lock to use for _search(). A TinyDB search modifies the query
+			cache, so it needs exclusive access when the cache is enabled.
+		"""
+		return WriteRWLock(lock) if self.cacheSize > 0 else ReadRWLock(lock)
+
+
+	def _search(self, db: TinyDB, table: Table, cond: Callable) -> List[dict]:
+		""" Return deep copies of all documents of a table that match *cond*. Without
+			a query cache the stored documents are scanned directly, because
+			TinyDB's search() always updates the cache, even if its size is 0.
+		"""
+		if self.cacheSize > 0:
+			return [ Utils.copyJSON(doc) for doc in table.search(cond) ]
+		return [ Utils.copyJSON(doc) for doc in self._storedDocuments(db, table).values() if cond(doc) ]
+
+
+	def _storedDocuments(self, db: TinyDB, table: Table) -> Dict[str, dict]:
+		""" Return the raw documents of a table, indexed by their document IDs. 
+			For memory storages these are the stored documents themselves, so they
+			must not be modified.
+		"""
+		if (tables := db.storage.read()) is None:
+			return {}
+		return tables.get(table.name, {})
+
+
+	def _storedDocument(self, db: TinyDB, table: Table, docID: int) -> dict:
+		""" Return a single raw document by its document ID. """
+		return self._storedDocuments(db, table).get(str(docID))
+
+
 	#
 	#	Subscriptions
 	#
 
 
 	def searchSubscriptions(self, ri : str = None, pi : str = None) -> List[dict]:
-		with self.lockSubscriptions:
+		with self._searchLock(self.lockSubscriptions):
 			if ri is not None:
-				return self.tabSubscriptions.search(Query().ri == ri)
+				return self._search(self.dbSubscriptions, self.tabSubscriptions, Query().ri == ri)
 			if pi is not None:
-				return self.tabSubscriptions.search(Query().pi == pi)
+				return self._search(self.dbSubscriptions, self.tabSubscriptions, Query().pi == pi)
 			return None
 
 
 	def upsertSubscription(self, subscription : Resource) -> bool:
-		with self.lockSubscriptions:
-			ri = subscription.ri
-			result = self.tabSubscriptions.upsert(
-									{	'ri'  : ri, 
-										'pi'  : subscription.pi,
-										'nct' : subscription.nct,
-										'net' : subscription['enc/net'],
-										'nus' : subscription.nu
-									}, 
-									Query().ri == ri)
+		with WriteRWLock(self.lockSubscriptions):
+			result = self.tabSubscriptions.upsert(self.subscriptionRecord(subscription), Query().ri == subscription.ri)
 			return result is not None
 
 
 	def removeSubscription(self, subscription: Resource) -> bool:
-		with self.lockSubscriptions:
+		with WriteRWLock(self.lockSubscriptions):
 			return self.tabSubscriptions.remove(Query().ri == subscription.ri)
 
 
@@ -680,13 +1927,13 @@ class TinyDBBinding(object):
 	#
 
 	def searchStatistics(self) -> dict:
-		with self.lockStatistics:
+		with ReadRWLock(self.lockStatistics):
 			stats = self.tabStatistics.get(doc_id=1)
 			return stats if stats is not None and len(stats) > 0 else None
 
 
 	def upsertStatistics(self, stats: dict) -> bool:
-		with self.lockStatistics:
+		with WriteRWLock(self.lockStatistics):
 			if len(self.tabStatistics) > 0:
 				return self.tabStatistics.update(stats, doc_ids=[1]) is not None
 			else:
@@ -698,13 +1945,13 @@ class TinyDBBinding(object):
 	#
 
 	def searchAppData(self, id: str) -> dict:
-		with self.lockAppData:
+		with ReadRWLock(self.lockAppData):
 			data = self.tabAppData.get(Query().id == id)
 			return data if data is not None and len(data) > 0 else None
 
 
 	def upsertAppData(self, data: dict) -> bool:
-		with self.lockAppData:
+		with WriteRWLock(self.lockAppData):
 			if 'id' not in data:
 				return None
 			if len(self.tabAppData) > 0:
@@ -714,7 +1961,343 @@ class TinyDBBinding(object):
 
 
 	def removeAppData(self, data: dict) -> bool:
-		with self.lockAppData:
+		with WriteRWLock(self.lockAppData):
 			if 'id' not in data:
 				return None	
 			return self.tabAppData.remove(Query().id == data['id'])
+
+
+
+#########################################################################
+#
+#	DB class that implements the SQLite binding
+#
+#	Resources are stored as JSON documents. The attributes that are used for
+#	lookups (ri, pi, ty, csi, srn) are additionally stored in indexed columns,
+#	so that those lookups don't need to scan the whole table.
+
+
+class SQLiteBinding(DBBinding):
+
+	def __init__(self, path: str = None) -> None:
+		self.path = path
+		self.connection: sqlite3.Connection = None
+
+		# create transaction lock. The connection is shared between all threads
+		self.lockDB = Lock()
+
+
+	def openDB(self) -> None:
+		if Configuration.get('db.inMemory'):
+			Logging.log('DB in memory')
+			self.connection = sqlite3.connect(':memory:', check_same_thread=False, isolation_level=None)
+		else:
+			Logging.log('DB in file system')
+			self.connection = sqlite3.connect(self.path + '/acme.db', check_same_thread=False, isolation_level=None)
+			# Use SQLite's write-ahead log. Its durability follows the WAL fsync policy
+			self.connection.execute('PRAGMA journal_mode=WAL')
+			self.connection.execute('PRAGMA synchronous=%s' % { WALStorage.fsyncAlways : 'FULL', WALStorage.fsyncInterval : 'NORMAL', WALStorage.fsyncNever : 'OFF' }[Configuration.get('db.walFsync')])
+		with self.lockDB:
+			self.connection.executescript('''
+				CREATE TABLE IF NOT EXISTS resources (ri TEXT PRIMARY KEY, pi TEXT, ty INTEGER, csi TEXT, srn TEXT, jsn TEXT NOT NULL);
+				CREATE INDEX IF NOT EXISTS resourcesPI ON resources (pi, ty);
+				CREATE INDEX IF NOT EXISTS resourcesTY ON resources (ty);
+				CREATE INDEX IF NOT EXISTS resourcesCSI ON resources (csi);
+				CREATE INDEX IF NOT EXISTS resourcesSRN ON resources (srn);
+				CREATE TABLE IF NOT EXISTS identifiers (ri TEXT PRIMARY KEY, rn TEXT, srn TEXT, ty INTEGER);
+				CREATE INDEX IF NOT EXISTS identifiersSRN ON identifiers (srn);
+				CREATE TABLE IF NOT EXISTS subscriptions (ri TEXT PRIMARY KEY, pi TEXT, jsn TEXT NOT NULL);
+				CREATE INDEX IF NOT EXISTS subscriptionsPI ON subscriptions (pi);
+				CREATE TABLE IF NOT EXISTS statistics (id INTEGER PRIMARY KEY, jsn TEXT NOT NULL);
+				CREATE TABLE IF NOT EXISTS appdata (id TEXT PRIMARY KEY, jsn TEXT NOT NULL);
+			''')
+
+
+	def closeDB(self) -> None:
+		Logging.log('Closing DBs')
+		with self.lockDB:
+			self.connection.close()
+
+
+	def purgeDB(self) -> None:
+		Logging.log('Purging DBs')
+		with self.lockDB:
+			self.connection.executescript('''
+				DELETE FROM resources;
+				DELETE FROM identifiers;
+				DELETE FROM subscriptions;
+				DELETE FROM statistics;
+				DELETE FROM appdata;
+			''')
+
+
+	#
+	#	Resources
+	#
+
+
+	def insertResource(self, resource: Resource) -> None:
+		with self.lockDB:
+			self._writeResource(resource.json)
+
+
+	def insertResources(self, resources: List[Resource]) -> None:
+		with self.lockDB:
+			self._executeMany('INSERT OR REPLACE INTO resources (ri, pi, ty, csi, srn, jsn) VALUES (?, ?, ?, ?, ?, ?)',
+							  [ self._resourceRow(resource.json) for resource in resources ])
+
+
+	def upsertResource(self, resource: Resource) -> None:
+		with self.lockDB:
+			# Update existing or insert new when overwriting
+			if (jsn := self._readResource(resource.ri)) is not None:
+				jsn.update(resource.json)
+			else:
+				jsn = resource.json
+			self._writeResource(jsn)
+
+
+	def updateResource(self, resource: Resource) -> Resource:
+		with self.lockDB:
+			jsn = self._readResource(resource.ri)
+			# remove nullified fields from db and resource
+			for k in list(resource.json):
+				if resource.json[k] is None:
+					del resource.json[k]
+					if jsn is not None:
+						jsn.pop(k, None)
+			if jsn is not None:
+				jsn.update(resource.json)
+				self._writeResource(jsn)
+			return resource
+
+
+	def deleteResource(self, resource: Resource) -> None:
+		with self.lockDB:
+			self.connection.execute('DELETE FROM resources WHERE ri = ?', (resource.ri,))
+
+
+	def deleteResources(self, resources: List[Resource]) -> None:
+		with self.lockDB:
+			self._executeMany('DELETE FROM resources WHERE ri = ?', [ (resource.ri,) for resource in resources ])
+
+
+	def searchResources(self, ri: str = None, csi: str = None, srn: str = None, pi: str = None, ty: int = None) -> List[dict]:
+		with self.lockDB:
+			if ri is not None:
+				cursor = self.connection.execute('SELECT jsn FROM resources WHERE ri = ?', (ri,))
+			elif srn is not None:
+				cursor = self.connection.execute('SELECT jsn FROM resources WHERE srn = ?', (srn,))
+			elif csi is not None:
+				cursor = self.connection.execute('SELECT jsn FROM resources WHERE csi = ?', (csi,))
+			elif pi is not None and ty is not None:
+				cursor = self.connection.execute('SELECT jsn FROM resources WHERE pi = ? AND ty = ?', (pi, ty))
+			elif pi is not None:
+				cursor = self.connection.execute('SELECT jsn FROM resources WHERE pi = ?', (pi,))
+			elif ty is not None:
+				cursor = self.connection.execute('SELECT jsn FROM resources WHERE ty = ?', (ty,))
+			else:
+				return []
+			return [ json.loads(row[0]) for row in cursor.fetchall() ]
+
+
+	def searchChildResources(self, pi: str, excludeTypes: List[int]) -> List[dict]:
+		with self.lockDB:
+			cursor = self.connection.execute('SELECT jsn FROM resources WHERE pi = ? AND ty NOT IN (%s)' % ','.join('?' * len(excludeTypes)), (pi, *excludeTypes))
+			return [ json.loads(row[0]) for row in cursor.fetchall() ]
+
+
+	def searchResourcesByRI(self, ris: List[str]) -> List[dict]:
+		if len(ris) == 0:
+			return []
+		with self.lockDB:
+			cursor = self.connection.execute('SELECT jsn FROM resources WHERE ri IN (%s)' % ','.join('?' * len(ris)), ris)
+			return [ json.loads(row[0]) for row in cursor.fetchall() ]
+
+
+	def discoverResources(self, func: Callable) -> List[dict]:
+		with self.lockDB:
+			rows = self.connection.execute('SELECT jsn FROM resources').fetchall()
+		return [ jsn for row in rows if func(jsn := json.loads(row[0])) ]
+
+
+	def hasResource(self, ri: str = None, csi: str = None, srn: str = None, ty: int = None) -> bool:
+		with self.lockDB:
+			if ri is not None:
+				cursor = self.connection.execute('SELECT 1 FROM resources WHERE ri = ?', (ri,))
+			elif srn is not None:
+				cursor = self.connection.execute('SELECT 1 FROM resources WHERE srn = ?', (srn,))
+			elif csi is not None:
+				cursor = self.connection.execute('SELECT 1 FROM resources WHERE csi = ?', (csi,))
+			elif ty is not None:
+				cursor = self.connection.execute('SELECT 1 FROM resources WHERE ty = ?', (ty,))
+			else:
+				return False
+			return cursor.fetchone() is not None
+
+
+	def countResources(self) -> int:
+		with self.lockDB:
+			return self.connection.execute('SELECT COUNT(*) FROM resources').fetchone()[0]
+
+
+	def searchByTypeFieldValue(self, ty: int, field: str, value: Any) -> List[dict]:
+		"""Search and return all resources of a specific type and a value in a field,
+		and return them in an array."""
+		result = []
+		for jsn in self.searchResources(ty=ty):
+			# same semantic as TinyDB's any() query
+			if isinstance(fieldValue := jsn.get(field), list) and any(e in value for e in fieldValue):
+				result.append(jsn)
+		return result
+
+
+	def _readResource(self, ri: str) -> dict:
+		if (row := self.connection.execute('SELECT jsn FROM resources WHERE ri = ?', (ri,)).fetchone()) is None:
+			return None
+		return json.loads(row[0])
+
+
+	def _executeMany(self, statement: str, parameters: List[tuple]) -> None:
+		""" Execute a statement for each of the parameters in a single transaction. """
+		self.connection.execute('BEGIN')
+		try:
+			self.connection.executemany(statement, parameters)
+		except Exception:
+			self.connection.execute('ROLLBACK')
+			raise
+		self.connection.execute('COMMIT')
+
+
+	def _writeResource(self, jsn: dict) -> None:
+		self.connection.execute('INSERT OR REPLACE INTO resources (ri, pi, ty, csi, srn, jsn) VALUES (?, ?, ?, ?, ?, ?)', self._resourceRow(jsn))
+
+
+	def _resourceRow(self, jsn: dict) -> tuple:
+		return (jsn.get('ri'), jsn.get('pi'), jsn.get('ty'), jsn.get('csi'), jsn.get(Resource._srn), json.dumps(jsn))
+
+
+	#
+	#	Identifiers
+	#
+
+
+	def insertIdentifier(self, resource: Resource, ri: str, srn: str) -> None:
+		with self.lockDB:
+			self.connection.execute('INSERT OR REPLACE INTO identifiers (ri, rn, srn, ty) VALUES (?, ?, ?, ?)', (ri, resource.rn, srn, resource.ty))
+
+
+	def insertIdentifiers(self, resources: List[Resource]) -> None:
+		with self.lockDB:
+			self._executeMany('INSERT OR REPLACE INTO identifiers (ri, rn, srn, ty) VALUES (?, ?, ?, ?)',
+							  [ (resource.ri, resource.rn, resource.__srn__, resource.ty) for resource in resources ])
+
+
+	def deleteIdentifier(self, resource: Resource) -> None:
+		with self.lockDB:
+			self.connection.execute('DELETE FROM identifiers WHERE ri = ?', (resource.ri,))
+
+
+	def deleteIdentifiers(self, resources: List[Resource]) -> None:
+		with self.lockDB:
+			self._executeMany('DELETE FROM identifiers WHERE ri = ?', [ (resource.ri,) for resource in resources ])
+
+
+	def searchIdentifiers(self, ri: str = None, srn: str = None) -> List[dict]:
+		with self.lockDB:
+			if srn is not None:
+				cursor = self.connection.execute('SELECT ri, rn, srn, ty FROM identifiers WHERE srn = ?', (srn,))
+			elif ri is not None:
+				cursor = self.connection.execute('SELECT ri, rn, srn, ty FROM identifiers WHERE ri = ?', (ri,))
+			else:
+				return []
+			return [ { 'ri' : row[0], 'rn' : row[1], 'srn' : row[2], 'ty' : row[3] } for row in cursor.fetchall() ]
+
+
+	def allIdentifiers(self) -> List[dict]:
+		with self.lockDB:
+			cursor = self.connection.execute('SELECT ri, rn, srn, ty FROM identifiers')
+			return [ { 'ri' : row[0], 'rn' : row[1], 'srn' : row[2], 'ty' : row[3] } for row in cursor.fetchall() ]
+
+
+	#
+	#	Subscriptions
+	#
+
+
+	def searchSubscriptions(self, ri: str = None, pi: str = None) -> List[dict]:
+		with self.lockDB:
+			if ri is not None:
+				cursor = self.connection.execute('SELECT jsn FROM subscriptions WHERE ri = ?', (ri,))
+			elif pi is not None:
+				cursor = self.connection.execute('SELECT jsn FROM subscriptions WHERE pi = ?', (pi,))
+			else:
+				return None
+			return [ json.loads(row[0]) for row in cursor.fetchall() ]
+
+
+	def upsertSubscription(self, subscription: Resource) -> bool:
+		with self.lockDB:
+			record = self.subscriptionRecord(subscription)
+			self.connection.execute('INSERT OR REPLACE INTO subscriptions (ri, pi, jsn) VALUES (?, ?, ?)', (record['ri'], record['pi'], json.dumps(record)))
+			return True
+
+
+	def removeSubscription(self, subscription: Resource) -> bool:
+		with self.lockDB:
+			return self.connection.execute('DELETE FROM subscriptions WHERE ri = ?', (subscription.ri,)).rowcount > 0
+
+
+	#
+	#	Statistics
+	#
+
+	def searchStatistics(self) -> dict:
+		with self.lockDB:
+			if (row := self.connection.execute('SELECT jsn FROM statistics WHERE id = 1').fetchone()) is None:
+				return None
+			stats = json.loads(row[0])
+			return stats if len(stats) > 0 else None
+
+
+	def upsertStatistics(self, stats: dict) -> bool:
+		with self.lockDB:
+			if (row := self.connection.execute('SELECT jsn FROM statistics WHERE id = 1').fetchone()) is not None:
+				jsn = json.loads(row[0])
+				jsn.update(stats)
+			else:
+				jsn = stats
+			self.connection.execute('INSERT OR REPLACE INTO statistics (id, jsn) VALUES (1, ?)', (json.dumps(jsn),))
+			return True
+
+
+	#
+	#	App Data
+	#
+
+	def searchAppData(self, id: str) -> dict:
+		with self.lockDB:
+			if (row := self.connection.execute('SELECT jsn FROM appdata WHERE id = ?', (id,)).fetchone()) is None:
+				return None
+			data = json.loads(row[0])
+			return data if len(data) > 0 else None
+
+
+	def upsertAppData(self, data: dict) -> bool:
+		with self.lockDB:
+			if 'id' not in data:
+				return None
+			if (row := self.connection.execute('SELECT jsn FROM appdata WHERE id = ?', (data['id'],)).fetchone()) is not None:
+				jsn = json.loads(row[0])
+				jsn.update(data)
+			else:
+				jsn = data
+			self.connection.execute('INSERT OR REPLACE INTO appdata (id, jsn) VALUES (?, ?)', (data['id'], json.dumps(jsn)))
+			return True
+
+
+	def removeAppData(self, data: dict) -> bool:
+		with self.lockDB:
+			if 'id' not in data:
+				return None	
+			return self.connection.execute('DELETE FROM appdata WHERE id = ?', (data['id'],)).rowcount > 0
@@ -10,7 +10,7 @@
 
 import datetime, random, string, sys, re
 from typing import Any, List, Tuple, Union
-from resources import ACP, AE, ANDI, ANI, BAT, CIN, CNT, CNT_LA, CNT_OL, CSEBase, CSR, DVC
+from resources import ACP, AE, ANDI, ANI, BAT, CIN, CNT, CNT_AGG, CNT_LA, CNT_OL, CSEBase, CSR, DVC
 from resources import DVI, EVL, FCI, FCNT, FCNT_LA, FCNT_OL, FWR, GRP, GRP_FOPT, MEM, NOD, RBO, SUB, SWR, Unknown, Resource
 from Constants import Constants as C
 from Configuration import Configuration
@@ -28,7 +28,7 @@ def uniqueID() -> str:
 
 
 def isUniqueRI(ri: str) -> bool:
-	return len(CSE.storage.identifier(ri)) == 0
+	return CSE.storage.structuredPathFromRI(ri) is None
 
 
 def uniqueRN(prefix: str = 'un') -> str:
@@ -109,6 +109,34 @@ def toISO8601Date(ts: Union[float, datetime.datetime]) -> str:
 	return ts.strftime('%Y%m%dT%H%M%S,%f')
 
 
+def fromISO8601Date(date: str) -> float:
+	"""	Return the UTC timestamp of an ISO 8601 date as created by toISO8601Date(),
+		with or without fractions of a second. Return None if it can't be parsed.
+	"""
+	try:
+		dt = datetime.datetime.strptime(date, '%Y%m%dT%H%M%S,%f' if ',' in date else '%Y%m%dT%H%M%S')
+	except (ValueError, TypeError):
+		return None
+	return dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def parseRetentionStages(value: str) -> List[Tuple[int, int]]:
+	"""	Parse the stages of a retention policy: "<age>:<interval>, ...". Instances that
+		are older than <age> seconds are downsampled to one instance per <interval> seconds.
+		Return the stages ordered by age, or None if the format is wrong.
+	"""
+	stages = []
+	try:
+		for stage in value.split(','):
+			age, _, interval = stage.partition(':')
+			if (age := int(age)) < 0 or (interval := int(interval)) <= 0:
+				return None
+			stages.append((age, interval))
+	except ValueError:
+		return None
+	return sorted(stages)
+
+
 def structuredPath(resource: Resource.Resource) -> str:
 	""" Determine the structured path of a resource. """
 	rn = resource.rn
@@ -119,25 +147,20 @@ def structuredPath(resource: Resource.Resource) -> str:
 	if (pi := resource.pi) is None:
 		# Logging.logErr('PI is None')
 		return rn
-	rpi = CSE.storage.identifier(pi) 
-	if len(rpi) == 1:
-		return rpi[0]['srn'] + '/' + rn
+	if (srn := CSE.storage.structuredPathFromRI(pi)) is not None:
+		return srn + '/' + rn
 	Logging.logErr('Parent %s not fount in DB' % pi)
 	return rn # fallback
 
 
 def structuredPathFromRI(ri: str) -> str:
 	""" Get the structured path of a resource by its ri. """
-	if len((identifiers := CSE.storage.identifier(ri))) == 1:
-		return identifiers[0]['srn']
-	return None
+	return CSE.storage.structuredPathFromRI(ri)
 
 
 def riFromStructuredPath(srn: str) -> str:
 	""" Get the ri from a resource by its structured path. """
-	if len((paths := CSE.storage.structuredPath(srn))) == 1:
-		return paths[0]['ri']
-	return None
+	return CSE.storage.riFromStructuredPath(srn)
 
 
 def riFromCSI(csi: str) -> str:
@@ -228,10 +251,12 @@ def retrieveIDFromPath(id: str, csern: str, cseri: str) -> Tuple[str, str, str]:
 	return None, None, None
 
 
-def resourceFromJSON(jsn: dict, pi: str = None, acpi: str = None, ty: int = None, create: bool = False, isImported: bool = False) -> Tuple[Resource.Resource, str]:
+def resourceFromJSON(jsn: dict, pi: str = None, acpi: str = None, ty: int = None, create: bool = False, isImported: bool = False, fromDB: bool = False) -> Tuple[Resource.Resource, str]:
 	""" Create a resource from a JSON structure.
 		This will *not* call the activate method, therefore some attributes
 		may be set separately.
+		If *fromDB* is True then *jsn* is a document from the database that is
+		taken as-is. See resourceFromDB().
 	"""
 	jsn, root = pureResource(jsn)	# remove optional "m2m:xxx" level
 	typ = jsn['ty'] if 'ty' in jsn else ty
@@ -250,59 +275,70 @@ def resourceFromJSON(jsn: dict, pi: str = None, acpi: str = None, ty: int = None
 
 	# sorted by assumed frequency (small optimization)
 	if typ == C.tCIN or root == C.tsCIN:
-		return CIN.CIN(jsn, pi=pi, create=create), None
+		return CIN.CIN(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tCNT or root == C.tsCNT:
-		return CNT.CNT(jsn, pi=pi, create=create), None
+		return CNT.CNT(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tGRP or root == C.tsGRP:
-		return GRP.GRP(jsn, pi=pi, create=create), None
+		return GRP.GRP(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tGRP_FOPT or root == C.tsGRP_FOPT:
-		return GRP_FOPT.GRP_FOPT(jsn, pi=pi, create=create), None
+		return GRP_FOPT.GRP_FOPT(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tACP or root == C.tsACP:
-		return ACP.ACP(jsn, pi=pi, create=create), None
+		return ACP.ACP(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tFCNT:
-		return FCNT.FCNT(jsn, pi=pi, fcntType=root, create=create), None
+		return FCNT.FCNT(jsn, pi=pi, fcntType=root, create=create, fromDB=fromDB), None
 	elif typ == C.tFCI:
-		return FCI.FCI(jsn, pi=pi, fcntType=root, create=create), None	
+		return FCI.FCI(jsn, pi=pi, fcntType=root, create=create, fromDB=fromDB), None	
 	elif typ == C.tAE or root == C.tsAE:
-		return AE.AE(jsn, pi=pi, create=create), None
+		return AE.AE(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tSUB or root == C.tsSUB:
-		return SUB.SUB(jsn, pi=pi, create=create), None
+		return SUB.SUB(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tCSR or root == C.tsCSR:
-		return CSR.CSR(jsn, pi=pi, create=create), None
+		return CSR.CSR(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tNOD or root == C.tsNOD:
-		return NOD.NOD(jsn, pi=pi, create=create), None
+		return NOD.NOD(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdFWR) or root == C.tsFWR:
-		return FWR.FWR(jsn, pi=pi, create=create), None
+		return FWR.FWR(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdSWR) or root == C.tsSWR:
-		return SWR.SWR(jsn, pi=pi, create=create), None
+		return SWR.SWR(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdMEM) or root == C.tsMEM:
-		return MEM.MEM(jsn, pi=pi, create=create), None
+		return MEM.MEM(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdANI) or root == C.tsANI:
-		return ANI.ANI(jsn, pi=pi, create=create), None
+		return ANI.ANI(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdANDI) or root == C.tsANDI:
-		return ANDI.ANDI(jsn, pi=pi, create=create), None
+		return ANDI.ANDI(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdBAT) or root == C.tsBAT:
-		return BAT.BAT(jsn, pi=pi, create=create), None
+		return BAT.BAT(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdDVI) or root == C.tsDVI:
-		return DVI.DVI(jsn, pi=pi, create=create), None
+		return DVI.DVI(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdDVC) or root == C.tsDVC:
-		return DVC.DVC(jsn, pi=pi, create=create), None
+		return DVC.DVC(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdRBO) or root == C.tsRBO:
-		return RBO.RBO(jsn, pi=pi, create=create), None
+		return RBO.RBO(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif (typ == C.tMGMTOBJ and mgd == C.mgdEVL) or root == C.tsEVL:
-		return EVL.EVL(jsn, pi=pi, create=create), None
+		return EVL.EVL(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tCNT_LA or root == C.tsCNT_LA:
-		return CNT_LA.CNT_LA(jsn, pi=pi, create=create), None
+		return CNT_LA.CNT_LA(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tCNT_OL or root == C.tsCNT_OL:
-		return CNT_OL.CNT_OL(jsn, pi=pi, create=create), None
+		return CNT_OL.CNT_OL(jsn, pi=pi, create=create, fromDB=fromDB), None
+	elif typ == C.tCNT_AGG or root == C.tsCNT_AGG:
+		return CNT_AGG.CNT_AGG(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tFCNT_LA:
-		return FCNT_LA.FCNT_LA(jsn, pi=pi, create=create), None
+		return FCNT_LA.FCNT_LA(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tFCNT_OL:
-		return FCNT_OL.FCNT_OL(jsn, pi=pi, create=create), None
+		return FCNT_OL.FCNT_OL(jsn, pi=pi, create=create, fromDB=fromDB), None
 	elif typ == C.tCSEBase or root == C.tsCSEBase:
-		return CSEBase.CSEBase(jsn, create=create), None
+		return CSEBase.CSEBase(jsn, create=create, fromDB=fromDB), None
+
+	return Unknown.Unknown(jsn, typ, root, pi=pi, create=create, fromDB=fromDB), None	# Capture-All resource
+
 
-	return Unknown.Unknown(jsn, typ, root, pi=pi, create=create), None	# Capture-All resource
+def resourceFromDB(jsn: dict) -> Resource.Resource:
+	""" Create a resource from a document that was read from the database.
+		The document is wrapped without copying, defaulting or re-computing the
+		structured path. The document must not be shared with the database.
+	"""
+	resource, _ = resourceFromJSON(jsn, fromDB=True)
+	return resource
 
 
 excludeFromRoot = [ 'pi' ]
@@ -340,6 +376,17 @@ def setXPath(jsn: dict, element: str, value: Any, overwrite: bool = True) -> Non
 	data[paths[ln-1]] = value
 
 
+def copyJSON(jsn: Any) -> Any:
+	""" Return a deep copy of a JSON structure. This is much cheaper than copy.deepcopy(),
+		because only dicts and lists need to be copied. All other JSON values are immutable.
+	"""
+	if isinstance(jsn, dict):
+		return { k: copyJSON(v) if isinstance(v, (dict, list)) else v for k, v in jsn.items() }
+	if isinstance(jsn, list):
+		return [ copyJSON(v) if isinstance(v, (dict, list)) else v for v in jsn ]
+	return jsn
+
+
 urlregex = re.compile(
         r'^(?:http|ftp)s?://' 						# http://, https://, ftp://, ftps://
         r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|' # domain
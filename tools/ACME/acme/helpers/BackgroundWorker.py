@@ -9,7 +9,7 @@
 
 from Logging import Logging
 import time
-from threading import Thread
+from threading import Thread, Event, Lock
 from typing import Callable
 
 class BackgroundWorker(object):
@@ -20,6 +20,9 @@ class BackgroundWorker(object):
 		self.doStop = True
 		self.workerThread: Thread = None
 		self.name = name
+		self.wakeUpEvent = Event()
+		self.wakeUpLock = Lock()
+		self.wakeUpAt: float = None		# timestamp of an earlier run, if requested
 
 
 	def start(self) -> None:
@@ -34,6 +37,7 @@ class BackgroundWorker(object):
 		Logging.logDebug('Stopping worker thread: %s' % self.name)
 		# Stop the thread
 		self.doStop = True
+		self.wakeUpEvent.set()
 		if self.workerThread is not None and self.workerUpdateIntervall is not None:
 			self.workerThread.join(self.workerUpdateIntervall + 5) # wait a short time for the thread to terminate
 			self.workerThread = None
@@ -48,13 +52,27 @@ class BackgroundWorker(object):
 				self.doStop = True
 
 
-	# self-made sleep. Helps in speed-up shutdown etc
-	divider = 5.0
+	def wakeUp(self, delay: float = 0.0) -> None:
+		"""	Run the worker after *delay* seconds, if that is earlier than its next
+			regular run.
+		"""
+		with self.wakeUpLock:
+			at = time.time() + delay
+			if self.wakeUpAt is None or at < self.wakeUpAt:
+				self.wakeUpAt = at
+			self.wakeUpEvent.set()
+
+
+	# self-made sleep. Returns early when stopped or woken up
 	def sleep(self) -> None:
-		if self.workerUpdateIntervall < 1.0:
-			time.sleep(self.workerUpdateIntervall)
-		else:
-			for i in range(0, int(self.workerUpdateIntervall * self.divider)):
-				time.sleep(1.0 / self.divider)
-				if self.doStop:
+		until = time.time() + self.workerUpdateIntervall
+		while not self.doStop:
+			with self.wakeUpLock:
+				self.wakeUpEvent.clear()
+				if self.wakeUpAt is not None and self.wakeUpAt < until:
+					until = self.wakeUpAt
+				if (remaining := until - time.time()) <= 0:
+					if self.wakeUpAt is not None and self.wakeUpAt <= time.time():
+						self.wakeUpAt = None
 					break
+			self.wakeUpEvent.wait(remaining)
@@ -17,6 +17,8 @@ class ReadWriteLock(object):
         self._promote = withPromotion
         self._readerList = []  # List of Reader thread IDs
         self._writerList = []  # List of Writer thread IDs
+        self._writer = None    # Thread ID of the current writer
+        self._writerDepth = 0  # Number of write locks held by the current writer
 
     def acquire_read(self):
         #logging.debug("RWL : acquire_read()")
@@ -46,26 +48,43 @@ class ReadWriteLock(object):
     def acquire_write(self):
         #logging.debug("RWL : acquire_write()")
         """ Acquire a write lock. Blocks until there are no
-	acquired read or write locks. """
-        self._read_ready.acquire()   # A re-entrant lock lets a thread re-acquire the lock
-        self._writers += 1
-        self._writerList.append(threading.get_ident())
-        while self._readers > 0:
-            # promote to write lock, only if all the readers are trying to promote to writer
-            # If there are other reader threads, then wait till they complete
-            # reading
-            if self._promote and threading.get_ident() in self._readerList and set(self._readerList).issubset(set(self._writerList)):
-                break
-            else:
-                self._read_ready.wait()
+	acquired read or write locks. The condition's lock is not held
+	while writing, so that waiting threads don't compete with the
+	writer for it. A thread may re-acquire its write lock. """
+        self._read_ready.acquire()
+        try:
+            ident = threading.get_ident()
+            self._writers += 1
+            self._writerList.append(ident)
+            if self._writer == ident:    # re-acquired by the writing thread
+                self._writerDepth += 1
+                return
+            while self._readers > 0 or self._writer is not None:
+                # promote to write lock, only if all the readers are trying to promote to writer
+                # If there are other reader threads, then wait till they complete
+                # reading
+                if self._writer is None and self._promote and ident in self._readerList and set(self._readerList).issubset(set(self._writerList)):
+                    break
+                else:
+                    self._read_ready.wait()
+            self._writer = ident
+            self._writerDepth = 1
+        finally:
+            self._read_ready.release()
 
     def release_write(self):
         #logging.debug("RWL : release_write()")
         """ Release a write lock. """
-        self._writers -= 1
-        self._writerList.remove(threading.get_ident())
-        self._read_ready.notifyAll()
-        self._read_ready.release()
+        self._read_ready.acquire()
+        try:
+            self._writers -= 1
+            self._writerList.remove(threading.get_ident())
+            self._writerDepth -= 1
+            if self._writerDepth == 0:
+                self._writer = None
+                self._read_ready.notifyAll()
+        finally:
+            self._read_ready.release()
 
 #-------------------------------------------------------------------------
 
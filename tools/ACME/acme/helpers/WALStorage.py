@@ -0,0 +1,251 @@
+#
+#	WALStorage.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	A TinyDB storage that keeps the data in memory and persists changes
+#	by appending them to a write-ahead log (WAL). The log is periodically
+#	compacted into a snapshot file in TinyDB's JSON format.
+#
+#	The WALTable class must be used for the tables of such a database. It
+#	changes the documents in place and logs each changed document, so that
+#	the cost of a write does not depend on the size of the database.
+#
+#	Without a path the storage only keeps the data in memory and doesn't log.
+#
+
+from tinydb.storages import Storage		# type: ignore
+from tinydb.table import Table 			# type: ignore
+from typing import Callable, Dict, Iterator, List, Any
+from threading import RLock
+from Logging import Logging
+import json, os
+
+
+# fsync policies
+fsyncAlways		= 'always'		# fsync after every log record
+fsyncInterval	= 'interval'	# fsync when sync() is called, e.g. periodically by a worker
+fsyncNever		= 'never'		# never fsync, leave it to the OS
+fsyncPolicies	= [ fsyncAlways, fsyncInterval, fsyncNever ]
+
+
+class WALStorage(Storage):
+
+	def __init__(self, path: str = None, fsync: str = fsyncInterval) -> None:
+		self.path = path				# snapshot file
+		self.walPath = path + '.wal' if path is not None else None	# log file
+		self.fsync = fsync
+		self.lock = RLock()				# protects the data and the log during writes and compaction
+		self.data: Dict[str, Dict[str, dict]] = {}
+		self.records = 0				# number of records in the log since the last snapshot
+		self.unsynced = False
+
+		self.walFile = None
+		if path is not None:
+			self._loadSnapshot()
+			self._replayLog()
+			self.walFile = open(self.walPath, 'a', encoding='utf-8')
+
+
+	def read(self) -> Dict[str, Dict[str, dict]]:
+		# Return the live data. Tables that change the data must use WALTable
+		return self.data
+
+
+	def write(self, data: Dict[str, Dict[str, dict]]) -> None:
+		# Full writes only happen for tables that are not WALTables. Write a new snapshot then.
+		with self.lock:
+			self.data = data
+			if self.path is not None:
+				self.compact()
+
+
+	def close(self) -> None:
+		with self.lock:
+			if self.walFile is None:
+				return
+			self.compact()
+			self.walFile.close()
+			self.walFile = None
+
+
+	#########################################################################
+	#
+	#	Log handling
+	#
+
+	def log(self, table: str, docID: str, doc: dict) -> None:
+		""" Append a record for a changed document to the log. *doc* is None
+			when the document was removed.
+		"""
+		self._append({ 't' : table, 'i' : docID, 'd' : doc })
+
+
+	def logTruncate(self, table: str) -> None:
+		""" Append a record for a truncated table to the log. """
+		self._append({ 't' : table, 'c' : True })
+
+
+	def sync(self) -> None:
+		""" fsync the log if there are unsynced records. """
+		with self.lock:
+			if self.unsynced and self.walFile is not None:
+				os.fsync(self.walFile.fileno())
+				self.unsynced = False
+
+
+	def compact(self) -> None:
+		""" Write the current data to a new snapshot and truncate the log. """
+		with self.lock:
+			tmpPath = self.path + '.tmp'
+			with open(tmpPath, 'w', encoding='utf-8') as file:
+				json.dump(self.data, file)
+				file.flush()
+				if self.fsync != fsyncNever:
+					os.fsync(file.fileno())
+			os.replace(tmpPath, self.path)
+			# The log is replayed idempotently, so a crash before truncating it is harmless
+			if self.walFile is not None:
+				self.walFile.truncate(0)
+				self.walFile.flush()
+			self.records = 0
+			self.unsynced = False
+
+
+	def _append(self, record: dict) -> None:
+		if self.walFile is None:	# memory only
+			return
+		with self.lock:
+			self.walFile.write(json.dumps(record) + '\n')
+			self.walFile.flush()
+			self.records += 1
+			if self.fsync == fsyncAlways:
+				os.fsync(self.walFile.fileno())
+			else:
+				self.unsynced = True
+
+
+	def _loadSnapshot(self) -> None:
+		if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+			return
+		with open(self.path, 'r', encoding='utf-8') as file:
+			self.data = json.load(file)
+
+
+	def _replayLog(self) -> None:
+		if not os.path.exists(self.walPath):
+			return
+		with open(self.walPath, 'r', encoding='utf-8') as file:
+			for line in file:
+				try:
+					record = json.loads(line)
+				except json.JSONDecodeError:
+					# Can only happen for the last record when writing it was interrupted
+					Logging.logWarn('Ignoring incomplete WAL record in: %s' % self.walPath)
+					break
+				table = self.data.setdefault(record['t'], {})
+				if record.get('c'):
+					table.clear()
+				elif (doc := record['d']) is None:
+					table.pop(record['i'], None)
+				else:
+					table[record['i']] = doc
+				self.records += 1
+		Logging.logDebug('Replayed %d WAL records from: %s' % (self.records, self.walPath))
+
+
+class WALTable(Table):
+	""" Table that changes the documents of a WALStorage in place and logs
+		every changed document instead of writing the whole database.
+	"""
+
+	# Conditional updates and removals are mapped to document IDs first. Otherwise
+	# every document that is checked against the condition would count as changed.
+
+	def update(self, fields: Any, cond: Callable = None, doc_ids: List[int] = None) -> List[int]:
+		if cond is not None and doc_ids is None:
+			doc_ids = self._matchingIDs(cond)
+		if doc_ids is not None:
+			return super().update(fields, doc_ids=doc_ids)
+		return super().update(fields)
+
+
+	def remove(self, cond: Callable = None, doc_ids: List[int] = None) -> List[int]:
+		if cond is not None and doc_ids is None:
+			doc_ids = self._matchingIDs(cond)
+		return super().remove(cond=None if doc_ids is not None else cond, doc_ids=doc_ids)
+
+
+	def _matchingIDs(self, cond: Callable) -> List[int]:
+		return [ int(docID) for docID, doc in self._storage.read().get(self.name, {}).items() if cond(doc) ]
+
+
+	def _update_table(self, updater: Callable[[Dict[int, dict]], None]) -> None:
+		storage = self._storage
+		with storage.lock:
+			table = _DocumentView(storage.read().setdefault(self.name, {}))
+			updater(table)
+			if table.truncated:
+				storage.logTruncate(self.name)
+			for docID in table.changed:
+				storage.log(self.name, docID, table.raw.get(docID))
+		self.clear_cache()
+
+
+class _DocumentView(object):
+	""" Present a raw table with string document IDs to the TinyDB table
+		operations, which use integer document IDs, and record the changed documents.
+	"""
+
+	def __init__(self, raw: Dict[str, dict]) -> None:
+		self.raw = raw
+		self.changed: List[str] = []
+		self.truncated = False
+
+
+	def __getitem__(self, docID: int) -> dict:
+		# The document might be changed in place by the caller
+		self._changed(docID)
+		return self.raw[str(docID)]
+
+
+	def __setitem__(self, docID: int, doc: dict) -> None:
+		self._changed(docID)
+		self.raw[str(docID)] = doc
+
+
+	def __contains__(self, docID: Any) -> bool:
+		return str(docID) in self.raw
+
+
+	def __iter__(self) -> Iterator[int]:
+		return iter(self.keys())
+
+
+	def __len__(self) -> int:
+		return len(self.raw)
+
+
+	def keys(self) -> List[int]:
+		return [ int(docID) for docID in self.raw.keys() ]
+
+
+	def get(self, docID: int, default: Any = None) -> dict:
+		return self.raw.get(str(docID), default)
+
+
+	def pop(self, docID: int, *default: Any) -> dict:
+		self._changed(docID)
+		return self.raw.pop(str(docID), *default)
+
+
+	def clear(self) -> None:
+		self.raw.clear()
+		self.changed.clear()
+		self.truncated = True
+
+
+	def _changed(self, docID: int) -> None:
+		if (docID := str(docID)) not in self.changed:
+			self.changed.append(docID)
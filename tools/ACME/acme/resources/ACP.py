@@ -22,10 +22,10 @@ attributePolicies = constructPolicy([
 
 class ACP(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, rn: str = None, create: bool = False, createdInternally: str = None) -> None:
-		super().__init__(C.tsACP, jsn, pi, C.tACP, create=create, inheritACP=True, rn=rn, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, rn: str = None, create: bool = False, createdInternally: str = None, fromDB: bool = False) -> None:
+		super().__init__(C.tsACP, jsn, pi, C.tACP, create=create, inheritACP=True, rn=rn, attributePolicies=attributePolicies, fromDB=fromDB)
 		
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('pv/acr', [], overwrite=False)
 			self.setAttribute('pvs/acr', [], overwrite=False)
 			if createdInternally is not None:
@@ -22,10 +22,10 @@ attributePolicies = constructPolicy([
 
 class AE(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(C.tsAE, jsn, pi, C.tAE, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsAE, jsn, pi, C.tAE, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('aei', Utils.uniqueAEI(), overwrite=False)
 			self.setAttribute('rr', False, overwrite=False)
 
@@ -25,10 +25,10 @@ defaultAreaNwkType = ''
 
 class ANDI(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsANDI, C.mgdANDI, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsANDI, C.mgdANDI, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('dvd', defaultAreaNwkType, overwrite=False)
 			self.setAttribute('dvt', '', overwrite=False)
 			self.setAttribute('awi', '', overwrite=False)
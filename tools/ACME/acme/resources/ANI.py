@@ -24,9 +24,9 @@ defaultAreaNwkType = ''
 
 class ANI(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsANI, C.mgdANI, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsANI, C.mgdANI, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('ant', defaultAreaNwkType, overwrite=False)
 
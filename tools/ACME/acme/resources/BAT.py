@@ -34,10 +34,10 @@ defaultBatteryStatus = btsUNKNOWN
 
 class BAT(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsBAT, C.mgdBAT, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsBAT, C.mgdBAT, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('btl', defaultBatteryLevel, overwrite=False)
 			self.setAttribute('bts', defaultBatteryStatus, overwrite=False)
 
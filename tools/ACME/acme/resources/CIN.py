@@ -22,10 +22,10 @@ attributePolicies = constructPolicy([
 
 class CIN(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(C.tsCIN, jsn, pi, C.tCIN, create=create, inheritACP=True, readOnly = True, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsCIN, jsn, pi, C.tCIN, create=create, inheritACP=True, readOnly = True, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('con', '', overwrite=False)
 			self.setAttribute('cs', len(self['con']))
 
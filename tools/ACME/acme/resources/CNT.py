@@ -26,10 +26,10 @@ attributePolicies = constructPolicy([
 class CNT(Resource):
 
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(C.tsCNT, jsn, pi, C.tCNT, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsCNT, jsn, pi, C.tCNT, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('mni', Configuration.get('cse.cnt.mni'), overwrite=False)
 			self.setAttribute('mbs', Configuration.get('cse.cnt.mbs'), overwrite=False)
 			self.setAttribute('cni', 0, overwrite=False)
@@ -50,8 +50,8 @@ class CNT(Resource):
 		if not (result := super().activate(parentResource, originator))[0]:
 			return result
 
-		# register latest and oldest virtual resources
-		Logging.logDebug('Registering latest and oldest virtual resources for: %s' % self.ri)
+		# register latest, oldest and aggregation virtual resources
+		Logging.logDebug('Registering latest, oldest and aggregation virtual resources for: %s' % self.ri)
 
 		# add latest
 		r, _ = Utils.resourceFromJSON({}, pi=self.ri, acpi=self.acpi, ty=C.tCNT_LA)
@@ -65,21 +65,35 @@ class CNT(Resource):
 		if res[0] is None:
 			return False, res[1], res[2]
 
+		# add aggregation
+		r, _ = Utils.resourceFromJSON({}, pi=self.ri, acpi=self.acpi, ty=C.tCNT_AGG)
+		res = CSE.dispatcher.createResource(r)
+		if res[0] is None:
+			return False, res[1], res[2]
+
 		return True, C.rcOK, None
 
 
+	# Remove the CINs that are older than the maxInstanceAge
+	def validateExpirations(self) -> None:
+		Logging.logDebug('Validate expirations')
+		super().validateExpirations()
+		if self.mia is not None:
+			self.validate()
+
+
 	# Get all content instances of a resource and return a sorted (by ct) list 
 	def contentInstances(self) -> List[Resource]:
-		return sorted(CSE.dispatcher.directChildResources(self.ri, C.tCIN), key=lambda x: (x.ct))
+		return CSE.storage.instances(self.ri)
 
 
 	def childWillBeAdded(self, childResource: Resource, originator: str) -> Tuple[bool, int, str]:
 		if not (res := super().childWillBeAdded(childResource, originator))[0]:
 			return res
 		
-		# Check whether the child's rn is "ol" or "la".
-		if (rn := childResource['rn']) is not None and rn in ['ol', 'la']:
-			return False, C.rcOperationNotAllowed, 'resource types "latest" or "oldest" cannot be added'
+		# Check whether the child's rn is "ol", "la" or "agg".
+		if (rn := childResource['rn']) is not None and rn in ['ol', 'la', 'agg']:
+			return False, C.rcOperationNotAllowed, 'resource types "latest", "oldest" or "aggregation" cannot be added'
 	
 		# Check whether the size of the CIN doesn't exceed the mbs
 		if childResource.ty == C.tCIN and self.mbs is not None:
@@ -94,6 +108,12 @@ class CNT(Resource):
 		if childResource.ty == C.tCIN:	# Validate if child is CIN
 			self.validate(originator)
 
+	# Handle the addition of multiple CINs at once. Validate only once.
+	def childrenAdded(self, childResources: List[Resource], originator: str) -> None:
+		CSE.notification.checkChildSubscriptions(self, C.netCreateDirectChild, childResources)
+		if any(childResource.ty == C.tCIN for childResource in childResources):
+			self.validate(originator)
+
 	# Handle the removal of a CIN. 
 	def childRemoved(self, childResource: Resource, originator: str) -> None:
 		super().childRemoved(childResource, originator)
@@ -101,44 +121,20 @@ class CNT(Resource):
 			self.validate(originator)
 
 
-	# Validating the Container. This means recalculating cni, cbs as well as
+	# Validating the Container. This means updating cni, cbs as well as
 	# removing ContentInstances when the limits are met.
 	def validate(self, originator: str = None, create: bool = False) -> Tuple[bool, int, str]:
 		if (res := super().validate(originator, create))[0] == False:
 			return res
 
-		# retrieve all children
-		cs = self.contentInstances()
-
-		# Check number of instances
-		mni = self.mni
-		cni = len(cs)
-		i = 0
-		l = cni
-		while cni > mni and i < l:
-			# remove oldest
-			CSE.dispatcher.deleteResource(cs[i])
-			cni -= 1
-			i += 1
+		# The number and size of the CINs are maintained by the storage.
+		# Only the oldest CINs are removed, and only when a limit is exceeded.
+		if len(ris := CSE.storage.instancesExceedingLimits(self.ri, self.mni, self.mbs, self.mia)) > 0:
+			CSE.dispatcher.evictInstances(self, ris)
+		cni, cbs = CSE.storage.instanceTotals(self.ri)
 		self['cni'] = cni
-
-		# check size
-		cs = self.contentInstances()	# get CINs again
-		mbs = self.mbs
-		cbs = 0
-		for c in cs:					# Calculate cbs
-			cbs += c['cs']
-		i = 0
-		l = len(cs)
-		while cbs > mbs and i < l:
-			# remove oldest
-			cbs -= cs[i]['cs']
-			CSE.dispatcher.deleteResource(cs[i])
-			i += 1
 		self['cbs'] = cbs
 
-		# TODO: support maxInstanceAge
-
 		# Some CNT resource may have been updated, so store the resource 
 		CSE.dispatcher.updateResource(self, doUpdateCheck=False) # To avoid recursion, dont do an update check
 
@@ -0,0 +1,148 @@
+#
+#	CNT_AGG.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	ResourceType: aggregation (virtual resource)
+#
+#	A RETRIEVE request returns the number, minimum, maximum, average and some
+#	percentiles of the numeric contents of the container's <contentInstance>
+#	resources. The request arguments "cra" and "crb" limit the aggregation
+#	to the instances that were created in a time range.
+#	NumPy is used for the computation when it is installed.
+#
+
+from flask import Request
+from typing import Tuple, Optional, List, Dict, Any
+from collections import OrderedDict
+from threading import Lock
+import math
+from Configuration import Configuration
+from Constants import Constants as C
+import CSE
+from .Resource import *
+from Logging import Logging
+
+try:
+	import numpy	# type: ignore
+except ImportError:
+	numpy = None
+
+
+class CNT_AGG(Resource):
+
+	# Aggregation results: (pi, cra, crb) -> ((st, cni), result)
+	# An aggregation is valid as long as no instance was added (st) or removed (cni)
+	aggregationCache: Dict[Tuple[str, str, str], Tuple[Tuple[int, int], dict]] = OrderedDict()
+	aggregationCacheLock = Lock()
+
+
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsCNT_AGG, jsn, pi, C.tCNT_AGG, create=create, inheritACP=True, readOnly=True, rn='agg', isVirtual=True, fromDB=fromDB)
+
+
+	# Enable check for allowed sub-resources
+	def canHaveChild(self, resource: Resource) -> bool:
+		return super()._canHaveChild(resource, [])
+
+
+	def handleRetrieveRequest(self, request: Request = None, id: str = None, originator: str = None) -> Tuple[Optional[Resource], int, str]:
+		""" Handle a RETRIEVE request. Return the resource with the aggregation of the instances. """
+		Logging.logDebug('Aggregating CIN contents of CNT')
+		cra = request.args.get('cra') if request is not None else None
+		crb = request.args.get('crb') if request is not None else None
+		if (container := CSE.storage.retrieveResource(ri=self.pi)[0]) is None:
+			return None, C.rcNotFound, 'no container for <aggregation>'
+
+		key = (self.pi, cra, crb)
+		state = (container.st, CSE.storage.instanceTotals(self.pi)[0])
+		if (result := self._cachedAggregation(key, state)) is None:
+			ris = CSE.storage.instancesInTimeRange(self.pi, cra, crb)
+			values = numericValues(CSE.storage.instanceAttributeValues(ris, 'con'))
+			result = aggregate(values, Configuration.get('cse.cnt.aggregationPercentiles'))
+			self._cacheAggregation(key, state, result)
+
+		if cra is not None:
+			self.setAttribute('cra', cra)
+		if crb is not None:
+			self.setAttribute('crb', crb)
+		for k, v in result.items():
+			self.setAttribute(k, v)
+		return self, C.rcOK, None
+
+
+	def handleCreateRequest(self, request: Request, id: str, originator: str, ct: str, ty: int) -> Tuple[Optional[Resource], int, str]:
+		""" Handle a CREATE request. Fail with error code. """
+		return None, C.rcOperationNotAllowed, 'operation not allowed for <aggregation> resource type'
+
+
+	def handleUpdateRequest(self, request: Request, id: str, originator: str, ct: str) -> Tuple[Optional[Resource], int, str]:
+		""" Handle a UPDATE request. Fail with error code. """
+		return None, C.rcOperationNotAllowed, 'operation not allowed for <aggregation> resource type'
+
+
+	def handleDeleteRequest(self, request: Request, id: str, originator: str) -> Tuple[Optional[Resource], int, str]:
+		""" Handle a DELETE request. Fail with error code. """
+		return None, C.rcOperationNotAllowed, 'operation not allowed for <aggregation> resource type'
+
+
+	def _cachedAggregation(self, key: Tuple[str, str, str], state: Tuple[int, int]) -> dict:
+		with CNT_AGG.aggregationCacheLock:
+			if (entry := CNT_AGG.aggregationCache.get(key)) is None or entry[0] != state:
+				return None
+			CNT_AGG.aggregationCache.move_to_end(key)	# type: ignore
+			return entry[1]
+
+
+	def _cacheAggregation(self, key: Tuple[str, str, str], state: Tuple[int, int], result: dict) -> None:
+		if (size := Configuration.get('cse.cnt.aggregationCacheSize')) <= 0:
+			return
+		with CNT_AGG.aggregationCacheLock:
+			CNT_AGG.aggregationCache[key] = (state, result)
+			CNT_AGG.aggregationCache.move_to_end(key)	# type: ignore
+			while len(CNT_AGG.aggregationCache) > size:
+				CNT_AGG.aggregationCache.popitem(last=False)	# type: ignore
+
+
+def numericValues(contents: List[Any]) -> List[float]:
+	""" Return the finite numbers of a list of contents. Other contents are ignored. """
+	result = []
+	for con in contents:
+		if isinstance(con, bool):
+			continue
+		try:
+			value = float(con)
+		except (TypeError, ValueError):
+			continue
+		if math.isfinite(value):
+			result.append(value)
+	return result
+
+
+def aggregate(values: List[float], percentiles: List[float]) -> dict:
+	""" Return the count, minimum, maximum, average and the *percentiles* of a list of numbers.
+		The percentiles are linearly interpolated. Only the count is returned for an empty list.
+	"""
+	if (cnt := len(values)) == 0:
+		return { 'cnt' : 0 }
+	if numpy is not None:
+		column = numpy.fromiter(values, dtype=float, count=cnt)
+		mn, mx, avg = float(column.min()), float(column.max()), float(column.mean())
+		pcts = [ float(v) for v in numpy.percentile(column, percentiles) ] if len(percentiles) > 0 else []
+	else:
+		column = sorted(values)
+		mn, mx, avg = column[0], column[-1], math.fsum(column) / cnt
+		pcts = []
+		for p in percentiles:
+			rank = p / 100.0 * (cnt - 1)
+			lo = int(rank)
+			hi = min(lo + 1, cnt - 1)
+			pcts.append(column[lo] + (column[hi] - column[lo]) * (rank - lo))
+	return {
+		'cnt' : cnt,
+		'min' : mn,
+		'max' : mx,
+		'avg' : avg,
+		'pct' : { '%g' % p : v for p, v in zip(percentiles, pcts) }
+	}
@@ -17,8 +17,8 @@ from Logging import Logging
 
 class CNT_LA(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(C.tsCNT_LA, jsn, pi, C.tCNT_LA, create=create, inheritACP=True, readOnly=True, rn='la', isVirtual=True)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsCNT_LA, jsn, pi, C.tCNT_LA, create=create, inheritACP=True, readOnly=True, rn='la', isVirtual=True, fromDB=fromDB)
 
 
 	# Enable check for allowed sub-resources
@@ -53,9 +53,4 @@ class CNT_LA(Resource):
 
 
 	def _getLatest(self) -> Resource:
-		pi = self['pi']
-		pr, _, _ = CSE.dispatcher.retrieveResource(pi)	# get parent
-		rs = []
-		if pr is not None:
-			rs = pr.contentInstances()						# ask parent for all CIN
-		return rs[-1] if len(rs) > 0 else None
+		return CSE.storage.latestInstance(self['pi'])
@@ -17,8 +17,8 @@ from Logging import Logging
 
 class CNT_OL(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(C.tsCNT_OL, jsn, pi, C.tCNT_OL, create=create, inheritACP=True, readOnly=True, rn='ol', isVirtual=True)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsCNT_OL, jsn, pi, C.tCNT_OL, create=create, inheritACP=True, readOnly=True, rn='ol', isVirtual=True, fromDB=fromDB)
 
 
 	# Enable check for allowed sub-resources
@@ -53,10 +53,5 @@ class CNT_OL(Resource):
 
 
 	def _getOldest(self) -> Resource:
-		pi = self['pi']
-		pr, _, _ = CSE.dispatcher.retrieveResource(pi)	# get parent
-		rs = []
-		if pr is not None:
-			rs = pr.contentInstances()						# ask parent for all CIN
-		return rs[0] if len(rs) > 0 else None
+		return CSE.storage.oldestInstance(self['pi'])
 
@@ -22,10 +22,10 @@ attributePolicies = constructPolicy([
 
 class CSEBase(Resource):
 
-	def __init__(self, jsn: dict = None, create: bool = False) -> None:
-		super().__init__(C.tsCSEBase, jsn, '', C.tCSEBase, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsCSEBase, jsn, '', C.tCSEBase, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('ri', 'cseid', overwrite=False)
 			self.setAttribute('rn', 'cse', overwrite=False)
 			self.setAttribute('csi', 'cse', overwrite=False)
@@ -14,10 +14,10 @@ from .Resource import *
 
 class CSR(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, rn: str = None, create: bool = False) -> None:
-		super().__init__(C.tsCSR, jsn, pi, C.tCSR, rn=rn, create=create)
+	def __init__(self, jsn: dict = None, pi: str = None, rn: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsCSR, jsn, pi, C.tCSR, rn=rn, create=create, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('csi', 'cse', overwrite=False)	# This shouldn't happen
 			self['ri'] = self.csi.split('/')[-1]				# overwrite ri (only after /'s')
 			self.setAttribute('rr', False, overwrite=False)
@@ -22,10 +22,10 @@ attributePolicies = constructPolicy([
 
 class DVC(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsDVC, C.mgdDVC, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsDVC, C.mgdDVC, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('can', 'unknown', overwrite=False)
 			self.setAttribute('att', False, overwrite=False)
 			self.setAttribute('cas', {	"acn" : "unknown", "sus" : 0 }, overwrite=False)
@@ -27,10 +27,10 @@ defaultDeviceLabel = "unknown serial id"
 
 class DVI(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsDVI, C.mgdDVI, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsDVI, C.mgdDVI, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('dty', defaultDeviceType, overwrite=False)
 			self.setAttribute('mod', defaultModel, overwrite=False)
 			self.setAttribute('man', defaultManufacturer, overwrite=False)
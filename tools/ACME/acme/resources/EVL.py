@@ -37,10 +37,10 @@ defaultLogStatus = lgstUnknown
 
 class EVL(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsEVL, C.mgdEVL, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsEVL, C.mgdEVL, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('lgt', defaultLogTypeId, overwrite=False)
 			self.setAttribute('lgd', '', overwrite=False)
 			self.setAttribute('lgst', defaultLogStatus, overwrite=False)
@@ -20,8 +20,8 @@ attributePolicies = constructPolicy([
 
 class FCI(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, fcntType: str = None, create: bool = False) -> None:
-		super().__init__(fcntType, jsn, pi, C.tFCI, create=create, inheritACP=True, readOnly=True, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, fcntType: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(fcntType, jsn, pi, C.tFCI, create=create, inheritACP=True, readOnly=True, attributePolicies=attributePolicies, fromDB=fromDB)
 
 
 	# Enable check for allowed sub-resources. No Child for CIN
@@ -24,16 +24,16 @@ attributePolicies = constructPolicy([
 
 class FCNT(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, fcntType: str = None, create: bool = False) -> None:
-		super().__init__(fcntType, jsn, pi, C.tFCNT, create=create, attributePolicies=attributePolicies)
-		if self.json is not None:
+	def __init__(self, jsn: dict = None, pi: str = None, fcntType: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(fcntType, jsn, pi, C.tFCNT, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
+		if self.json is not None and not fromDB:
 			self.setAttribute('cs', 0, overwrite=False)
 
 			# "current" attributes are added when necessary in the validate() method
 
-			# Indicates whether this FC has flexContainerInstances. 
-			# Might change during the lifetime of a resource. Used for optimization
-			self.hasInstances = False
+		# Indicates whether this FC has flexContainerInstances. 
+		# Might change during the lifetime of a resource. Used for optimization
+		self.hasInstances = False
 
 		self.ignoreAttributes = [ self._rtype, self._srn, self._node, self._originator, 'acpi', 'cbs', 'cni', 'cnd', 'cs', 'cr', 'ct', 'et', 'lt', 'mbs', 'mia', 'mni', 'or', 'pi', 'ri', 'rn', 'st', 'ty' ]
 
@@ -115,72 +115,56 @@ class FCNT(Resource):
 			self.hasInstances = True	# Change the internal flag whether this FC has flexContainerInstances
 
 			self.addFlexContainerInstance(originator)
-			fci = self.flexContainerInstances()
-
-			# check mni
-			if self.mni is not None:
-				mni = self.mni
-				fcii = len(fci)
-				i = 0
-				l = fcii
-				while fcii > mni and i < l:
-					# remove oldest
-					CSE.dispatcher.deleteResource(fci[i])
-					fcii -= 1
-					i += 1
-					changed = True
-				self['cni'] = fcii
-
-				# Add "current" atribute, if it is not there
-				self.setAttribute('cni', 0, overwrite=False)
-
-			# check size
-			if self.mbs is not None:
-				fci = self.flexContainerInstances()	# get FCIs again (bc may be different now)
-				mbs = self.mbs
-				cbs = 0
-				for f in fci:					# Calculate cbs
-					cbs += f.cs
-				i = 0
-				l = len(fci)
-				while cbs > mbs and i < l:
-					# remove oldest
-					cbs -= fci[i].cs
-					CSE.dispatcher.deleteResource(fci[i])
-					i += 1
-				self['cbs'] = cbs
-
-				# Add "current" atribute, if it is not there
-				self.setAttribute('cbs', 0, overwrite=False)
+
+			# check mni and mbs. The number and size of the FCIs are maintained by
+			# the storage. Only the oldest FCIs are removed, and only when a limit is exceeded.
+			if len(ris := CSE.storage.instancesExceedingLimits(self.ri, self.mni, self.mbs, self.mia)) > 0:
+				CSE.dispatcher.evictInstances(self, ris)
+			self._setInstanceTotals(*CSE.storage.instanceTotals(self.ri))
 
 		# TODO Remove la, ol, existing FCI when mni etc are not present anymore.
 
 
-		# TODO support maxInstanceAge
-		
 		# May have been changed, so store the resource 
 		x = CSE.dispatcher.updateResource(self, doUpdateCheck=False) # To avoid recursion, dont do an update check
 		
 		return True, C.rcOK, None
 
 
+	# Handle the removal of a FCI
+	def childRemoved(self, childResource: Resource, originator: str) -> None:
+		super().childRemoved(childResource, originator)
+		if childResource.ty == C.tFCI:
+			self._setInstanceTotals(*CSE.storage.instanceTotals(self.ri))
+			CSE.dispatcher.updateResource(self, doUpdateCheck=False) # To avoid recursion, dont do an update check
+
+
+	def _setInstanceTotals(self, cni: int, cbs: int) -> None:
+		# Only set the "current" attributes when the respective limit is set
+		if self.mni is not None:
+			self['cni'] = cni
+		if self.mbs is not None:
+			self['cbs'] = cbs
+
+
 	# Validate expirations of child resurces
 	def validateExpirations(self) -> None:
 		Logging.logDebug('Validate expirations')
 		super().validateExpirations()
 
+		# Remove the FCIs that are older than the maxInstanceAge
 		if (mia := self.mia) is None:
 			return
-		now = Utils.getResourceDate(-mia)
-		# fcis = self.flexContainerInstances()
-		# TODO
-		# for fci in fcis
+		if len(ris := CSE.storage.instancesExceedingLimits(self.ri, None, None, mia)) > 0:
+			CSE.dispatcher.evictInstances(self, ris)
+			self._setInstanceTotals(*CSE.storage.instanceTotals(self.ri))
+			CSE.dispatcher.updateResource(self, doUpdateCheck=False) # To avoid recursion, dont do an update check
 
 
 
 	# Get all flexContainerInstances of a resource and return a sorted (by ct) list 
 	def flexContainerInstances(self) -> List[Resource]:
-		return sorted(CSE.dispatcher.directChildResources(self.ri, C.tFCI), key=lambda x: (x.ct))
+		return CSE.storage.instances(self.ri)
 
 # TODO:
 # If the maxInstanceAge attribute is present in the targeted 
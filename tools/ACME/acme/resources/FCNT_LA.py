@@ -17,8 +17,8 @@ from Logging import Logging
 
 class FCNT_LA(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create:bool = False) -> None:
-		super().__init__(C.tsFCNT_LA, jsn, pi, C.tFCNT_LA, create=create, inheritACP=True, readOnly=True, rn='la', isVirtual=True)
+	def __init__(self, jsn: dict = None, pi: str = None, create:bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsFCNT_LA, jsn, pi, C.tFCNT_LA, create=create, inheritACP=True, readOnly=True, rn='la', isVirtual=True, fromDB=fromDB)
 
 
 	# Enable check for allowed sub-resources
@@ -63,9 +63,4 @@ class FCNT_LA(Resource):
 
 
 	def _getLatest(self) -> Resource:
-		pi = self['pi']
-		pr, _, _ = CSE.dispatcher.retrieveResource(pi)	# get parent
-		rs = []
-		if pr is not None:
-			rs = pr.flexContainerInstances()						# ask parent for all FCI
-		return rs[-1] if len(rs) > 0 else None
\ No newline at end of file
+		return CSE.storage.latestInstance(self['pi'])
\ No newline at end of file
@@ -33,10 +33,10 @@ defaultUDS = { 'acn' : '', 'sus' : statusUninitialized }
 
 class FWR(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsFWR, C.mgdFWR, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsFWR, C.mgdFWR, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('vr', defaultVersion, overwrite=False)
 			self.setAttribute('fwn', defaultFirmwareName, overwrite=False)
 			self.setAttribute('url', defaultURL, overwrite=False)
@@ -21,9 +21,9 @@ attributePolicies = constructPolicy([
 
 class GRP(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, fcntType: str = None, create: bool = False) -> None:
-		super().__init__(C.tsGRP, jsn, pi, C.tGRP, create=create, attributePolicies=attributePolicies)
-		if self.json is not None:
+	def __init__(self, jsn: dict = None, pi: str = None, fcntType: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsGRP, jsn, pi, C.tGRP, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
+		if self.json is not None and not fromDB:
 			self.setAttribute('mt', C.tMIXED, overwrite=False)
 			self.setAttribute('ssi', False, overwrite=True)
 			self.setAttribute('cnm', 0, overwrite=False)	# calculated later
@@ -25,8 +25,8 @@ from Constants import Constants as C
 
 class GRP_FOPT(Resource):
 
-	def __init__(self, jsn: dict = None, pi:str = None, create:bool = False) -> None:
-		super().__init__(C.tsGRP_FOPT, jsn, pi, C.tGRP_FOPT, create=create, inheritACP=True, readOnly=True, rn='fopt', isVirtual=True)
+	def __init__(self, jsn: dict = None, pi:str = None, create:bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsGRP_FOPT, jsn, pi, C.tGRP_FOPT, create=create, inheritACP=True, readOnly=True, rn='fopt', isVirtual=True, fromDB=fromDB)
 
 
 	# Enable check for allowed sub-resources
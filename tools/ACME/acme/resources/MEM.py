@@ -25,10 +25,10 @@ defaultMemTotal = 0
 
 class MEM(MgmtObj):
 
-	def __init__(self, jsn:dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsMEM, C.mgdMEM, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn:dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsMEM, C.mgdMEM, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('mma', defaultMemoryAvailable, overwrite=False)
 			self.setAttribute('mmt', defaultMemTotal, overwrite=False)
 
@@ -13,10 +13,10 @@ import Utils
 
 class MgmtObj(Resource):
 
-	def __init__(self, jsn: dict, pi: str, mgmtObjType: str, mgd: int, create: bool = False, attributePolicies: dict = None) -> None:
-		super().__init__(mgmtObjType, jsn, pi, C.tMGMTOBJ, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict, pi: str, mgmtObjType: str, mgd: int, create: bool = False, attributePolicies: dict = None, fromDB: bool = False) -> None:
+		super().__init__(mgmtObjType, jsn, pi, C.tMGMTOBJ, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 		
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('mgd', mgd, overwrite=True)
 
 
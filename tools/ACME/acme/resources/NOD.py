@@ -23,10 +23,10 @@ attributePolicies = constructPolicy([
 
 class NOD(Resource):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(C.tsNOD, jsn, pi, C.tNOD, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(C.tsNOD, jsn, pi, C.tNOD, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('ni', Utils.uniqueID(), overwrite=False)
 
 
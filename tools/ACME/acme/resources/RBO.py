@@ -21,10 +21,10 @@ attributePolicies = constructPolicy([
 
 class RBO(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsRBO, C.mgdRBO, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsRBO, C.mgdRBO, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('rbo', False, overwrite=False)
 			self.setAttribute('far', False, overwrite=False)
 
@@ -9,7 +9,7 @@
 
 # The following import allows to use "Resource" inside a method typing definition
 from __future__ import annotations
-from typing import Any, Tuple
+from typing import Any, List, Tuple
 from Logging import Logging
 from Constants import Constants as C
 from Configuration import Configuration
@@ -32,13 +32,24 @@ class Resource(object):
 
 	internalAttributes	= [ _rtype, _srn, _node, _createdInternally, _imported, _isVirtual, _isInstantiated, _originator ]
 
-	def __init__(self, tpe: str, jsn: dict = None, pi: str = None, ty:int = None, create: bool = False, inheritACP: bool = False, readOnly: bool = False, rn: str = None, attributePolicies: dict = None, isVirtual: bool = False) -> None:
+	def __init__(self, tpe: str, jsn: dict = None, pi: str = None, ty:int = None, create: bool = False, inheritACP: bool = False, readOnly: bool = False, rn: str = None, attributePolicies: dict = None, isVirtual: bool = False, fromDB: bool = False) -> None:
 		self.tpe = tpe
 		self.readOnly = readOnly
 		self.inheritACP = inheritACP
 		self.json = {}
 		self.attributePolicies = attributePolicies
 
+		# Fast path for resources loaded from the database. The stored document
+		# is already complete (defaults, ri, rn, srn etc), so just wrap it.
+		# Subclasses skip setting their default attributes then, too.
+		if fromDB and jsn is not None:
+			self.json = jsn
+			self.isImported = jsn.get(C.jsnIsImported)
+			self._originalJson = None	# only needed for validation during activation
+			if self.tpe is None:
+				self.tpe = jsn.get(self._rtype)
+			return
+
 		if jsn is not None: 
 			self.isImported = jsn.get(C.jsnIsImported)
 			if tpe in jsn:
@@ -158,11 +169,8 @@ class Resource(object):
 		# when the subresources are removed
 		CSE.notification.checkSubscriptions(self, C.netResourceDelete)
 		
-		# Remove directChildResources
-		rs = CSE.dispatcher.directChildResources(self.ri)
-		for r in rs:
-			self.childRemoved(r, originator)
-			CSE.dispatcher.deleteResource(r, originator)
+		# Remove all sub-resources in one batch
+		CSE.dispatcher.deleteChildResources(self, originator)
 
 
 	# Update this resource with (new) fields.
@@ -219,6 +227,12 @@ class Resource(object):
 		CSE.notification.checkSubscriptions(self, C.netCreateDirectChild, childResource)
 
 
+	def childrenAdded(self, childResources : List[Resource], originator : str) -> None:
+		""" Called when multiple child resources were added to the resource at once. """
+		for childResource in childResources:
+			self.childAdded(childResource, originator)
+
+
 	def childRemoved(self, childResource : Resource, originator : str) -> None:
 		""" Call when child resource was removed from the resource. """
 		CSE.notification.checkSubscriptions(self, C.netDeleteDirectChild, childResource)
@@ -369,6 +383,18 @@ class Resource(object):
 		return self.lt > otherResource.lt
 
 
+	def clone(self) -> Resource:
+		""" Return an independent copy of this resource. The JSON is copied deeply,
+			so nested attributes of the copy can be modified in place.
+		"""
+		# Don't use copy.copy() here, because __getattr__() would be called for
+		# attributes that the new, uninitialized object doesn't have yet.
+		resource = self.__class__.__new__(self.__class__)
+		resource.__dict__.update(self.__dict__)
+		resource.json = Utils.copyJSON(self.json)
+		return resource
+
+
 	def retrieveParentResource(self) -> Resource:
 		parentResource, _, _ = CSE.dispatcher.retrieveResource(self.pi)
 		return parentResource
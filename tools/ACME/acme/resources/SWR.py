@@ -32,10 +32,10 @@ defaultStatus = { 'acn' : '', 'sus' : statusUninitialized }
 
 class SWR(MgmtObj):
 
-	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False) -> None:
-		super().__init__(jsn, pi, C.tsSWR, C.mgdSWR, create=create, attributePolicies=attributePolicies)
+	def __init__(self, jsn: dict = None, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(jsn, pi, C.tsSWR, C.mgdSWR, create=create, attributePolicies=attributePolicies, fromDB=fromDB)
 
-		if self.json is not None:
+		if self.json is not None and not fromDB:
 			self.setAttribute('vr', defaultVersion, overwrite=False)
 			self.setAttribute('swn', defaultSoftwareName, overwrite=False)
 			self.setAttribute('url', defaultURL, overwrite=False)
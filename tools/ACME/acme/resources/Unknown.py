@@ -14,8 +14,8 @@ from .Resource import Resource
 
 class Unknown(Resource):
 
-	def __init__(self, jsn: dict, ty: int, tpe: str, pi: str = None, create: bool = False) -> None:
-		super().__init__(tpe, jsn, pi, ty, create=create)
+	def __init__(self, jsn: dict, ty: int, tpe: str, pi: str = None, create: bool = False, fromDB: bool = False) -> None:
+		super().__init__(tpe, jsn, pi, ty, create=create, fromDB=fromDB)
 
 	# Enable check for allowed sub-resources (ie. all)
 	def canHaveChild(self, resource: Resource) -> bool:
@@ -47,7 +47,9 @@ class AEStatistics(AEBase):
 				'lgErr'	: [ BT.nonNegInteger,	CAR.car01, 	RO.O,	RO.O,  AN.OA ],
 				'lgWrn'	: [ BT.nonNegInteger,	CAR.car01, 	RO.O,	RO.O,  AN.OA ],
 				'cseUT'	: [ BT.string,			CAR.car01, 	RO.O,	RO.O,  AN.OA ],
-				'ctRes'	: [ BT.nonNegInteger,	CAR.car01, 	RO.O,	RO.O,  AN.OA ]
+				'ctRes'	: [ BT.nonNegInteger,	CAR.car01, 	RO.O,	RO.O,  AN.OA ],
+				'rcHit'	: [ BT.nonNegInteger,	CAR.car01, 	RO.O,	RO.O,  AN.OA ],
+				'rcMis'	: [ BT.nonNegInteger,	CAR.car01, 	RO.O,	RO.O,  AN.OA ]
 			}
 		}
 
@@ -73,7 +75,9 @@ class AEStatistics(AEBase):
 												Statistics.logWarnings : 0,
 												Statistics.cseStartUpTime : '',
 												Statistics.cseUpTime : '',
-												Statistics.resourceCount: 0
+												Statistics.resourceCount: 0,
+												Statistics.resourceCacheHits: 0,
+												Statistics.resourceCacheMisses: 0
 											}
 										},
 										ty=C.tFCNT)
@@ -0,0 +1,123 @@
+#
+#	benchmarkStorage.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Contention benchmark for the TinyDB database binding. A number of reader,
+#	scanner (discovery) and writer threads concurrently access the resources
+#	of an in-memory database for some time, and the achieved operations are
+#	reported.
+#	With "--exclusive" the binding's locks only grant exclusive access, which
+#	gives the numbers for comparison.
+#
+
+import argparse, sys, threading, time, random
+sys.path.append('acme')
+sys.path.append('apps')
+from Configuration import Configuration, defaultConfigFile
+import CSE	# import first to resolve the circular imports of the other modules
+from helpers.ReadWriteLock import ReadWriteLock
+from Storage import TinyDBBinding
+import Utils
+
+
+class ExclusiveLock(ReadWriteLock):
+	""" A ReadWriteLock that only grants exclusive access, like a plain lock. """
+
+	def acquire_read(self) -> None:
+		self.acquire_write()
+
+	def release_read(self) -> None:
+		self.release_write()
+
+
+def parseArgs() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description='Contention benchmark for the TinyDB database binding')
+	parser.add_argument('--config', action='store', dest='configfile', default=defaultConfigFile, help='specify the configuration file')
+	parser.add_argument('--resources', action='store', dest='resources', default=10000, type=int, help='number of resources in the database (default: 10000)')
+	parser.add_argument('--children', action='store', dest='children', default=100, type=int, help='number of resources per parent (default: 100)')
+	parser.add_argument('--readers', action='store', dest='readers', default=8, type=int, help='number of reader threads (default: 8)')
+	parser.add_argument('--scanners', action='store', dest='scanners', default=1, type=int, help='number of threads that scan all resources (default: 1)')
+	parser.add_argument('--writers', action='store', dest='writers', default=2, type=int, help='number of writer threads (default: 2)')
+	parser.add_argument('--duration', action='store', dest='duration', default=5.0, type=float, help='duration of the benchmark in seconds (default: 5)')
+	parser.add_argument('--exclusive', action='store_true', dest='exclusive', default=False, help='use exclusive locks for reads as well')
+	return parser.parse_args()
+
+
+def createResources(db: TinyDBBinding, count: int, children: int) -> list:
+	ris = []
+	for i in range(count):
+		ri = 'cin%d' % i
+		db.insertResource(Utils.resourceFromDB({
+			'ri'		: ri,
+			'rn'		: ri,
+			'pi'		: 'cnt%d' % (i // children),
+			'ty'		: 4,
+			'con'		: str(i),
+			'__rtype__'	: 'm2m:cin'
+		}))
+		ris.append(ri)
+	return ris
+
+
+def benchmark(db: TinyDBBinding, ris: list, parents: int, args: argparse.Namespace) -> None:
+	reads = [ 0 ] * args.readers
+	scans = [ 0 ] * args.scanners
+	writes = [ 0 ] * args.writers
+	stop = threading.Event()
+
+	def reader(n: int) -> None:
+		while not stop.is_set():
+			if random.random() < 0.8:
+				db.searchResources(ri=random.choice(ris))
+			else:
+				db.searchResources(pi='cnt%d' % random.randrange(parents))
+			reads[n] += 1
+
+	def scanner(n: int) -> None:
+		while not stop.is_set():
+			db.discoverResources(lambda r: r.get('con') == '')
+			scans[n] += 1
+
+	def writer(n: int) -> None:
+		while not stop.is_set():
+			resource = Utils.resourceFromDB(db.searchResources(ri=random.choice(ris))[0])
+			resource['con'] = str(time.time())
+			db.updateResource(resource)
+			writes[n] += 1
+
+	threads = [ threading.Thread(target=reader, args=(n,)) for n in range(args.readers) ] + \
+			  [ threading.Thread(target=scanner, args=(n,)) for n in range(args.scanners) ] + \
+			  [ threading.Thread(target=writer, args=(n,)) for n in range(args.writers) ]
+	startTime = time.time()
+	for t in threads:
+		t.start()
+	time.sleep(args.duration)
+	stop.set()
+	for t in threads:
+		t.join()
+	duration = time.time() - startTime
+
+	print('Locks:   %s' % ('exclusive' if args.exclusive else 'reader/writer'))
+	print('Threads: %d readers, %d scanners, %d writers' % (args.readers, args.scanners, args.writers))
+	print('Reads:   %d (%.0f/s)' % (sum(reads), sum(reads) / duration))
+	print('Scans:   %d (%.1f/s)' % (sum(scans), sum(scans) / duration))
+	print('Writes:  %d (%.0f/s)' % (sum(writes), sum(writes) / duration))
+
+
+if __name__ == '__main__':
+	args = parseArgs()
+	args.dbstoragemode = 'memory'
+	args.dbreset = True
+	if not Configuration.init(args):
+		sys.exit(1)
+
+	db = TinyDBBinding()
+	if args.exclusive:
+		db.lockResources = ExclusiveLock()
+		db.lockIdentifiers = ExclusiveLock()
+	db.openDB()
+	ris = createResources(db, args.resources, args.children)
+	benchmark(db, ris, (args.resources + args.children - 1) // args.children, args)
+	db.closeDB()
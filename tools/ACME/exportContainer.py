@@ -0,0 +1,65 @@
+#
+#	exportContainer.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Export the <contentInstance> resources of a container from the database
+#	into a columnar file (NumPy .npz). See acme/Exporter.py for the layout.
+#	The CSE must not run while the database is exported.
+#
+#	The database is always read from the files in the configured (or given)
+#	directory, even if the CSE is configured to run in memory. It is only read,
+#	but when it is closed the write-ahead logs of a TinyDB database are
+#	compacted into its DB files, like when the CSE shuts down.
+#
+
+import argparse, sys
+sys.path.append('acme')
+sys.path.append('apps')
+from Configuration import Configuration, defaultConfigFile
+import CSE	# import first to resolve the circular imports of the other modules
+from Constants import Constants as C
+from Exporter import Exporter
+from Storage import Storage
+import Utils
+
+
+def parseArgs() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description='Export the instances of a container into a columnar file (NumPy .npz)')
+	parser.add_argument('--config', action='store', dest='configfile', default=defaultConfigFile, help='specify the configuration file')
+	parser.add_argument('--db-directory', action='store', dest='dbdirectory', default=None, help='specify the directory of the database files')
+	parser.add_argument('--cra', action='store', dest='cra', default=None, help='only export instances created after this timestamp')
+	parser.add_argument('--crb', action='store', dest='crb', default=None, help='only export instances created before this timestamp')
+	parser.add_argument('--compress', action='store_true', dest='compress', default=False, help='compress the file')
+	parser.add_argument('container', help='structured path or resource ID of the container')
+	parser.add_argument('file', help='the file to write')
+	return parser.parse_args()
+
+
+if __name__ == '__main__':
+	args = parseArgs()
+	if not Configuration.init(args):
+		sys.exit(1)
+	# Read the database files, and never reset them
+	Configuration.set('db.inMemory', False)
+	Configuration.set('db.resetAtStartup', False)
+	if args.dbdirectory is not None:
+		Configuration.set('db.path', args.dbdirectory)
+	# Only read the database. Don't expire resources or start the ingestion writer
+	Configuration.set('cse.checkExpirationsInterval', 0)
+	Configuration.set('cse.cnt.asyncIngestion', [])
+
+	CSE.storage = Storage()
+	try:
+		ri = CSE.storage.riFromStructuredPath(args.container) if Utils.isStructured(args.container) else args.container
+		if ri is None or (resource := CSE.storage.retrieveResource(ri=ri)[0]) is None:
+			print('Container not found: %s' % args.container)
+			sys.exit(1)
+		if resource.ty != C.tCNT:
+			print('Not a container: %s' % args.container)
+			sys.exit(1)
+		count = Exporter().exportInstances(resource.ri, args.file, args.cra, args.crb, args.compress)
+		print('Exported %d instances to: %s' % (count, args.file))
+	finally:
+		CSE.storage.shutdown()
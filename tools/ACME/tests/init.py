@@ -0,0 +1,169 @@
+#
+#	init.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Helpers for the tests. Each test module starts its own CSE with a
+#	temporary configuration, and sends requests to it via HTTP.
+#	Run the tests in this directory with: python -m unittest discover -p 'test*.py'
+#
+
+import configparser, json, os, subprocess, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, List, Tuple
+import requests
+
+ACMEDIR			= os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CSEPORT			= 18080
+CSEURL			= 'http://127.0.0.1:%d' % CSEPORT
+CSERN			= 'cse-in'
+ORIGINATOR		= 'CAdmin'
+NOTIFICATIONPORT= 18081
+NOTIFICATIONURL	= 'http://127.0.0.1:%d' % NOTIFICATIONPORT
+
+_process: subprocess.Popen = None
+_configFile: str = None
+
+
+#
+#	CSE
+#
+
+def startCSE(settings: Dict[str, Dict[str, Any]] = None) -> None:
+	""" Start a CSE with an empty in-memory database. *settings* overwrite the
+		settings of acme.ini, e.g. { 'cse.resource.cnt' : { 'mni' : 10 } }.
+	"""
+	global _process, _configFile
+
+	if _isRunning():
+		raise RuntimeError('another CSE is already running at %s' % CSEURL)
+
+	config = configparser.ConfigParser(interpolation=None)
+	config.read(os.path.join(ACMEDIR, 'acme.ini'))
+	config['server.http']['port'] = str(CSEPORT)
+	config['server.http']['address'] = CSEURL
+	config['database']['inMemory'] = 'true'
+	config['cse.webui']['enable'] = 'false'
+	for section, values in (settings or {}).items():
+		for key, value in values.items():
+			config[section][key] = str(value)
+	fd, _configFile = tempfile.mkstemp(suffix='.ini')
+	with os.fdopen(fd, 'w') as file:
+		config.write(file)
+
+	_process = subprocess.Popen([ sys.executable, 'acme.py', '--config', _configFile, '--db-reset', '--no-remote-cse', '--no-apps', '--log-level', 'off' ],
+								cwd=ACMEDIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+	for _ in range(100):
+		if _isRunning():
+			return
+		time.sleep(0.1)
+	stopCSE()
+	raise RuntimeError('CSE did not start')
+
+
+def _isRunning() -> bool:
+	try:
+		return requests.get('%s/%s' % (CSEURL, CSERN), headers=_headers(ORIGINATOR)).status_code == 200
+	except requests.exceptions.ConnectionError:
+		return False
+
+
+def stopCSE() -> None:
+	global _process, _configFile
+	if _process is not None:
+		_process.terminate()
+		_process.wait()
+		_process = None
+	if _configFile is not None:
+		os.remove(_configFile)
+		_configFile = None
+
+
+#
+#	Requests. They return the response's JSON, the response status code, and the headers.
+#
+
+def _headers(originator: str, ty: int = None) -> Dict[str, str]:
+	return {
+		'X-M2M-Origin'	: originator,
+		'X-M2M-RI'		: '123',
+		'X-M2M-RVI'		: '3',
+		'Accept'		: 'application/json',
+		'Content-Type'	: 'application/json' + (';ty=%d' % ty if ty is not None else '')
+	}
+
+
+def _result(response: requests.Response) -> Tuple[Any, int, Dict[str, str]]:
+	rsc = int(response.headers['X-M2M-RSC']) if 'X-M2M-RSC' in response.headers else response.status_code
+	return (response.json() if len(response.content) > 0 else None), rsc, response.headers
+
+
+def CREATE(path: str, ty: int, jsn: Any, originator: str = ORIGINATOR) -> Tuple[Any, int, Dict[str, str]]:
+	return _result(requests.post(CSEURL + path, headers=_headers(originator, ty), data=json.dumps(jsn)))
+
+
+def RETRIEVE(path: str, originator: str = ORIGINATOR) -> Tuple[Any, int, Dict[str, str]]:
+	return _result(requests.get(CSEURL + path, headers=_headers(originator)))
+
+
+def UPDATE(path: str, jsn: Any, originator: str = ORIGINATOR) -> Tuple[Any, int, Dict[str, str]]:
+	return _result(requests.put(CSEURL + path, headers=_headers(originator), data=json.dumps(jsn)))
+
+
+def DELETE(path: str, originator: str = ORIGINATOR) -> Tuple[Any, int, Dict[str, str]]:
+	return _result(requests.delete(CSEURL + path, headers=_headers(originator)))
+
+
+#
+#	Notification server. It accepts all requests and collects the notifications.
+#
+
+notifications: List[dict] = []
+_notificationServer: HTTPServer = None
+
+
+class _NotificationHandler(BaseHTTPRequestHandler):
+
+	def do_POST(self) -> None:
+		length = int(self.headers['Content-Length'])
+		notifications.append(json.loads(self.rfile.read(length)))
+		self.send_response(200)
+		self.send_header('X-M2M-RSC', '2000')
+		self.end_headers()
+
+	def log_message(self, format: str, *args: Any) -> None:
+		pass
+
+
+def startNotificationServer() -> None:
+	global _notificationServer
+	_notificationServer = HTTPServer(('127.0.0.1', NOTIFICATIONPORT), _NotificationHandler)
+	threading.Thread(target=_notificationServer.serve_forever, daemon=True).start()
+
+
+def stopNotificationServer() -> None:
+	global _notificationServer
+	if _notificationServer is not None:
+		_notificationServer.shutdown()
+		_notificationServer.server_close()
+		_notificationServer = None
+
+
+def waitForNotifications(count: int, timeout: float = 5.0) -> List[dict]:
+	""" Wait until at least *count* notifications were received, and return them. """
+	end = time.time() + timeout
+	while len(notifications) < count and time.time() < end:
+		time.sleep(0.05)
+	time.sleep(0.2)	# wait for notifications that shouldn't arrive
+	return notifications
+
+
+def notificationEvents(notifications: List[dict]) -> List[dict]:
+	""" Return the "nev" of all notifications in their order, including those in aggregated notifications. """
+	result = []
+	for notification in notifications:
+		for sgn in notification['m2m:agn']['m2m:sgn'] if 'm2m:agn' in notification else [ notification['m2m:sgn'] ]:
+			if 'nev' in sgn:
+				result.append(sgn['nev'])
+	return result
@@ -0,0 +1,81 @@
+#
+#	testBatchCreate.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Tests for creating multiple <contentInstance> resources with a single request
+#
+
+import unittest
+from init import *
+
+aeRN	= 'testAE'
+cntRN	= 'batch'
+cntPath	= '/%s/%s/%s' % (CSERN, aeRN, cntRN)
+
+
+def setUpModule() -> None:
+	startNotificationServer()
+	startCSE()
+	CREATE('/' + CSERN, 2, { 'm2m:ae' : { 'rn' : aeRN, 'api' : 'NtestBatchCreate', 'rr' : False, 'srv' : [ '3' ] } })
+	CREATE('/%s/%s' % (CSERN, aeRN), 3, { 'm2m:cnt' : { 'rn' : cntRN, 'mni' : 3 } })
+
+
+def tearDownModule() -> None:
+	stopCSE()
+	stopNotificationServer()
+
+
+class TestBatchCreate(unittest.TestCase):
+
+	def test_1_createReturnsAResponsePerInstance(self) -> None:
+		r, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : [	{ 'rn' : 'a', 'con' : 'A' },
+														{ 'rn' : 'a', 'con' : 'duplicate' },
+														{ 'con' : 'B' },
+														{ 'rn' : 'la', 'con' : 'reserved' },
+														'malformed',
+														{ 'con' : 'C' } ] })
+		self.assertEqual(rsc, 2000)
+		responses = r['m2m:agr']['m2m:rsp']
+		self.assertEqual([ rsp['rsc'] for rsp in responses ], [ 2001, 4105, 2001, 4005, 4000, 2001 ])
+		self.assertEqual(responses[0]['pc']['m2m:cin']['con'], 'A')
+		self.assertEqual(responses[0]['to'], '%s/%s/%s/a' % (CSERN, aeRN, cntRN))
+
+
+	def test_2_containerAttributesAreConsistent(self) -> None:
+		r, rsc, _ = RETRIEVE(cntPath)
+		self.assertEqual(rsc, 2000)
+		cnt = r['m2m:cnt']
+		self.assertEqual(cnt['cni'], 3)
+		self.assertEqual(cnt['cbs'], 3)
+		self.assertEqual(cnt['st'], 3)	# increased for each created instance
+		self.assertEqual(RETRIEVE(cntPath + '/ol')[0]['m2m:cin']['con'], 'A')
+		self.assertEqual(RETRIEVE(cntPath + '/la')[0]['m2m:cin']['con'], 'C')
+
+
+	def test_3_batchExceedingMniEvictsOldest(self) -> None:
+		_, rsc, _ = CREATE(cntPath, 23, { 'm2m:sub' : { 'rn' : 'sub', 'nu' : [ NOTIFICATIONURL ], 'su' : NOTIFICATIONURL, 'enc' : { 'net' : [ 3, 4 ] } } })
+		self.assertEqual(rsc, 2001)
+		notifications.clear()
+		r, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : [ { 'con' : 'D' }, { 'con' : 'E' } ] })
+		self.assertEqual(rsc, 2000)
+		self.assertEqual([ rsp['rsc'] for rsp in r['m2m:agr']['m2m:rsp'] ], [ 2001, 2001 ])
+		self.assertEqual(RETRIEVE(cntPath)[0]['m2m:cnt']['cni'], 3)
+		self.assertEqual(RETRIEVE(cntPath + '/ol')[0]['m2m:cin']['con'], 'C')
+
+		# One notification for the created and one for the evicted instances
+		received = waitForNotifications(2)
+		self.assertEqual(len(received), 2)
+		events = notificationEvents(received)
+		self.assertEqual(sorted((e['net'], e['rep']['m2m:cin']['con']) for e in events), [ (3, 'D'), (3, 'E'), (4, 'A'), (4, 'B') ])
+
+
+	def test_4_batchNeedsPermissions(self) -> None:
+		_, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : [ { 'con' : 'X' } ] }, originator='Cother')
+		self.assertEqual(rsc, 4103)
+		self.assertEqual(RETRIEVE(cntPath)[0]['m2m:cnt']['cni'], 3)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,110 @@
+#
+#	testEviction.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Tests for removing the oldest <contentInstance> resources of a container
+#	when its limits (mni, mbs, mia) are exceeded
+#
+
+import time, unittest
+from init import *
+
+aeRN	= 'testAE'
+aePath	= '/%s/%s' % (CSERN, aeRN)
+
+
+def setUpModule() -> None:
+	startNotificationServer()
+	startCSE()
+	CREATE('/' + CSERN, 2, { 'm2m:ae' : { 'rn' : aeRN, 'api' : 'NtestEviction', 'rr' : False, 'srv' : [ '3' ] } })
+
+
+def tearDownModule() -> None:
+	stopCSE()
+	stopNotificationServer()
+
+
+def instanceContents(cntPath: str) -> List[str]:
+	return [ RETRIEVE('/' + uri)[0]['m2m:cin']['con'] for uri in sorted(RETRIEVE(cntPath + '?fu=1&ty=4')[0]['m2m:uril']) ]
+
+
+class TestEviction(unittest.TestCase):
+
+	def test_1_mniEvictsOldest(self) -> None:
+		cntPath = aePath + '/mni'
+		CREATE(aePath, 3, { 'm2m:cnt' : { 'rn' : 'mni', 'mni' : 2 } })
+		CREATE(cntPath, 23, { 'm2m:sub' : { 'rn' : 'sub', 'nu' : [ NOTIFICATIONURL ], 'su' : NOTIFICATIONURL, 'enc' : { 'net' : [ 4 ] } } })
+		notifications.clear()
+		for i in range(5):
+			_, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : { 'rn' : 'cin%d' % i, 'con' : str(i) } })
+			self.assertEqual(rsc, 2001)
+		cnt = RETRIEVE(cntPath)[0]['m2m:cnt']
+		self.assertEqual(cnt['cni'], 2)
+		self.assertEqual(cnt['cbs'], 2)
+		self.assertEqual(instanceContents(cntPath), [ '3', '4' ])
+		self.assertEqual(RETRIEVE(cntPath + '/ol')[0]['m2m:cin']['con'], '3')
+
+		# Each evicted instance is notified when it is evicted
+		events = notificationEvents(waitForNotifications(3))
+		self.assertEqual([ (e['net'], e['rep']['m2m:cin']['con']) for e in events ], [ (4, '0'), (4, '1'), (4, '2') ])
+
+
+	def test_2_lowerMniEvictsInOneNotification(self) -> None:
+		cntPath = aePath + '/lower'
+		CREATE(aePath, 3, { 'm2m:cnt' : { 'rn' : 'lower', 'mni' : 5 } })
+		for i in range(5):
+			CREATE(cntPath, 4, { 'm2m:cin' : { 'con' : str(i) } })
+		CREATE(cntPath, 23, { 'm2m:sub' : { 'rn' : 'sub', 'nu' : [ NOTIFICATIONURL ], 'su' : NOTIFICATIONURL, 'enc' : { 'net' : [ 4 ] } } })
+		notifications.clear()
+		_, rsc, _ = UPDATE(cntPath, { 'm2m:cnt' : { 'mni' : 1 } })
+		self.assertEqual(rsc, 2004)
+		cnt = RETRIEVE(cntPath)[0]['m2m:cnt']
+		self.assertEqual(cnt['cni'], 1)
+		self.assertEqual(RETRIEVE(cntPath + '/la')[0]['m2m:cin']['con'], '4')
+
+		received = waitForNotifications(1)
+		self.assertEqual(len(received), 1)
+		self.assertIn('m2m:agn', received[0])
+		self.assertEqual([ e['rep']['m2m:cin']['con'] for e in notificationEvents(received) ], [ '0', '1', '2', '3' ])
+
+
+	def test_3_mbsEvictsOldest(self) -> None:
+		cntPath = aePath + '/mbs'
+		CREATE(aePath, 3, { 'm2m:cnt' : { 'rn' : 'mbs', 'mbs' : 10 } })
+		for con in [ 'aaaa', 'bbbb', 'cccc', 'dd' ]:
+			CREATE(cntPath, 4, { 'm2m:cin' : { 'con' : con } })
+		cnt = RETRIEVE(cntPath)[0]['m2m:cnt']
+		self.assertEqual(cnt['cbs'], 10)
+		self.assertEqual(cnt['cni'], 3)
+		self.assertEqual(RETRIEVE(cntPath + '/ol')[0]['m2m:cin']['con'], 'bbbb')
+		_, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : { 'con' : 'x' * 11 } })
+		self.assertEqual(rsc, 5207)	# not acceptable: larger than mbs
+
+
+	def test_4_miaRemovesExpiredInstances(self) -> None:
+		cntPath = aePath + '/mia'
+		CREATE(aePath, 3, { 'm2m:cnt' : { 'rn' : 'mia', 'mia' : 2 } })
+		CREATE(cntPath, 4, { 'm2m:cin' : { 'rn' : 'old', 'con' : 'old' } })
+		time.sleep(1.5)
+		CREATE(cntPath, 4, { 'm2m:cin' : { 'rn' : 'new', 'con' : 'new' } })
+
+		# The instances are removed when they expire, not only with the next request
+		end = time.time() + 10
+		while time.time() < end and RETRIEVE(cntPath + '/old')[1] == 2000:
+			time.sleep(0.2)
+		_, rsc, _ = RETRIEVE(cntPath + '/old')
+		self.assertEqual(rsc, 4004)
+		_, rsc, _ = RETRIEVE(cntPath + '/new')
+		self.assertEqual(rsc, 2000)
+		self.assertEqual(RETRIEVE(cntPath)[0]['m2m:cnt']['cni'], 1)
+
+		while time.time() < end and RETRIEVE(cntPath)[0]['m2m:cnt']['cni'] > 0:
+			time.sleep(0.2)
+		self.assertEqual(RETRIEVE(cntPath)[0]['m2m:cnt']['cni'], 0)
+		self.assertEqual(RETRIEVE(cntPath + '?fu=1&ty=4')[0]['m2m:uril'], [])
+
+
+if __name__ == '__main__':
+	unittest.main()
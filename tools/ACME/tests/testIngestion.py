@@ -0,0 +1,76 @@
+#
+#	testIngestion.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Tests for the asynchronous ingestion of <contentInstance> resources
+#
+
+import time, unittest
+from init import *
+
+aeRN	= 'testAE'
+cntRN	= 'ingest'
+cntPath	= '/%s/%s/%s' % (CSERN, aeRN, cntRN)
+count	= 50
+
+
+def setUpModule() -> None:
+	startNotificationServer()
+	startCSE({ 'cse.resource.cnt' : { 'asyncIngestion' : '%s/%s/%s' % (CSERN, aeRN, cntRN) } })
+	CREATE('/' + CSERN, 2, { 'm2m:ae' : { 'rn' : aeRN, 'api' : 'NtestIngestion', 'rr' : False, 'srv' : [ '3' ] } })
+	CREATE('/%s/%s' % (CSERN, aeRN), 3, { 'm2m:cnt' : { 'rn' : cntRN, 'mni' : 1000 } })
+
+
+def tearDownModule() -> None:
+	stopCSE()
+	stopNotificationServer()
+
+
+class TestIngestion(unittest.TestCase):
+
+	def test_1_createIsRetrievableImmediately(self) -> None:
+		r, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : { 'rn' : 'first', 'con' : 'first' } })
+		self.assertEqual(rsc, 2001)
+		self.assertEqual(r['m2m:cin']['con'], 'first')
+		r, rsc, _ = RETRIEVE(cntPath + '/first')
+		self.assertEqual(rsc, 2000)
+		self.assertEqual(r['m2m:cin']['con'], 'first')
+		_, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : { 'rn' : 'first', 'con' : 'again' } })
+		self.assertEqual(rsc, 4105)	# conflict, although the first one might not be written yet
+		DELETE(cntPath + '/first')
+
+
+	def test_2_instancesKeepTheirOrder(self) -> None:
+		_, rsc, _ = CREATE(cntPath, 23, { 'm2m:sub' : { 'rn' : 'sub', 'nu' : [ NOTIFICATIONURL ], 'su' : NOTIFICATIONURL, 'enc' : { 'net' : [ 3 ] } } })
+		self.assertEqual(rsc, 2001)
+		notifications.clear()
+		for i in range(count):
+			_, rsc, _ = CREATE(cntPath, 4, { 'm2m:cin' : { 'rn' : 'cin%03d' % i, 'con' : str(i) } })
+			self.assertEqual(rsc, 2001)
+
+		# The notifications are sent after the instances were written, in the order of their creation
+		events = notificationEvents(waitForNotifications(count))
+		self.assertEqual([ e['rep']['m2m:cin']['con'] for e in events ], [ str(i) for i in range(count) ])
+
+		r, rsc, _ = RETRIEVE(cntPath)
+		self.assertEqual(rsc, 2000)
+		self.assertEqual(r['m2m:cnt']['cni'], count)
+		self.assertEqual(RETRIEVE(cntPath + '/la')[0]['m2m:cin']['con'], str(count - 1))
+		self.assertEqual(RETRIEVE(cntPath + '/ol')[0]['m2m:cin']['con'], '0')
+
+		# The creation times are in the order of the requests
+		cts = [ RETRIEVE('%s/cin%03d' % (cntPath, i))[0]['m2m:cin']['ct'] for i in range(count) ]
+		self.assertEqual(cts, sorted(cts))
+
+
+	def test_3_discoveryFindsAllInstances(self) -> None:
+		time.sleep(0.5)	# wait until all instances are written
+		r, rsc, _ = RETRIEVE(cntPath + '?fu=1&ty=4')
+		self.assertEqual(rsc, 2000)
+		self.assertEqual(sorted(r['m2m:uril']), [ '%s/%s/%s/cin%03d' % (CSERN, aeRN, cntRN, i) for i in range(count) ])
+
+
+if __name__ == '__main__':
+	unittest.main()
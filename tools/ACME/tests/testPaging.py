@@ -0,0 +1,85 @@
+#
+#	testPaging.py
+#
+#	(c) 2020 by Andreas Kraft
+#	License: BSD 3-Clause License. See the LICENSE file for further details.
+#
+#	Tests for paging discovery results with "lim", "ofst" and continuation tokens
+#
+
+import unittest
+from init import *
+
+aeRN	= 'testAE'
+aePath	= '/%s/%s' % (CSERN, aeRN)
+count	= 250
+
+
+def setUpModule() -> None:
+	startCSE()
+	CREATE('/' + CSERN, 2, { 'm2m:ae' : { 'rn' : aeRN, 'api' : 'NtestPaging', 'rr' : False, 'srv' : [ '3' ] } })
+	for rn in [ 'a', 'b' ]:
+		CREATE(aePath, 3, { 'm2m:cnt' : { 'rn' : rn, 'mni' : 1000 } })
+	for i in range(0, count, 50):
+		CREATE(aePath + '/a', 4, { 'm2m:cin' : [ { 'rn' : 'cin%03d' % (i + k), 'con' : str(i + k) } for k in range(50) ] })
+	CREATE(aePath + '/b', 4, { 'm2m:cin' : { 'con' : 'b' } })
+
+
+def tearDownModule() -> None:
+	stopCSE()
+
+
+def discoverAllPages(query: str, lim: int) -> Tuple[List[str], int]:
+	"""	Discover all pages, following the continuation tokens. Return the result and the number of pages. """
+	result: List[str] = []
+	pages = 0
+	token = None
+	while True:
+		r, rsc, headers = RETRIEVE('%s?fu=1%s&lim=%d%s' % (aePath, query, lim, '&ctk=' + token if token is not None else ''))
+		if rsc != 2000:
+			raise AssertionError('discovery failed: %d' % rsc)
+		result += r['m2m:uril']
+		pages += 1
+		if (token := headers.get('X-M2M-CTK')) is None:
+			return result, pages
+
+
+class TestPaging(unittest.TestCase):
+
+	def test_1_pagesContainAllResults(self) -> None:
+		for query in [ '', '&ty=4', '&ty=3', '&ty=4&cra=20200101T000000' ]:
+			with self.subTest(query=query):
+				full = RETRIEVE('%s?fu=1%s' % (aePath, query))[0]['m2m:uril']
+				paged, pages = discoverAllPages(query, 37)
+				self.assertEqual(len(paged), len(set(paged)))	# no duplicates
+				self.assertEqual(sorted(paged), sorted(full))
+				self.assertEqual(pages, max(1, -(-len(full) // 37)))
+
+
+	def test_2_limitAndContentStatus(self) -> None:
+		r, rsc, headers = RETRIEVE(aePath + '?fu=1&ty=4&lim=10')
+		self.assertEqual(rsc, 2000)
+		self.assertEqual(len(r['m2m:uril']), 10)
+		self.assertIsNotNone(headers.get('X-M2M-CTK'))
+		self.assertEqual(headers.get('X-M2M-CTS'), '1')	# partial content
+
+		r, rsc, headers = RETRIEVE(aePath + '?fu=1&ty=4&lim=%d' % (count + 10))
+		self.assertEqual(len(r['m2m:uril']), count + 1)	# the instances of "a" and "b"
+		self.assertIsNone(headers.get('X-M2M-CTK'))
+		self.assertIsNone(headers.get('X-M2M-CTS'))
+
+
+	def test_3_offset(self) -> None:
+		full = RETRIEVE(aePath + '?fu=1&ty=4&lim=20')[0]['m2m:uril']
+		r, rsc, _ = RETRIEVE(aePath + '?fu=1&ty=4&lim=5&ofst=3')
+		self.assertEqual(rsc, 2000)
+		self.assertEqual(r['m2m:uril'], full[2:7])	# ofst is 1-based
+
+
+	def test_4_invalidToken(self) -> None:
+		_, rsc, _ = RETRIEVE(aePath + '?fu=1&ty=4&ctk=invalid')
+		self.assertEqual(rsc, 4000)
+
+
+if __name__ == '__main__':
+	unittest.main()